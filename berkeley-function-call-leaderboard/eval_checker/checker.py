@@ -4,8 +4,10 @@ from model_handler.constant import (
     JS_TYPE_CONVERSION,
 )
 from eval_checker_constant import REAL_TIME_MATCH_ALLOWED_DIFFERENCE
-from custom_exception import NoAPIKeyError
+from execution_pool import get_execution_pool
+from http_cassette import get_http_mode
 import re
+from functools import lru_cache
 import requests  # Do not remove this import even though it seems to be unused. It's used in the executable_checker_rest function.
 import time
 import json
@@ -59,6 +61,31 @@ def get_possible_answer_type(possible_answer: list):
     return None
 
 
+def make_hashable(value):
+    # Converts a (possibly nested) value into a hashable one with the same `==` semantics, so it can be looked up in a set.
+    # Containers are tagged with their type, because `[1] != (1,)` and a dict is never equal to a list.
+    # Raises TypeError if the value contains something unhashable that is not a list, tuple or dict.
+    if type(value) == list or type(value) == tuple:
+        return (type(value), tuple(make_hashable(item) for item in value))
+    if type(value) == dict:
+        return (
+            dict,
+            frozenset((key, make_hashable(item)) for key, item in value.items()),
+        )
+    hash(value)
+    return value
+
+
+def is_in_answers(value, answers: list, answer_set):
+    # `value in answers`, but using the pre-built `answer_set` (from `make_hashable`) when there is one
+    if answer_set is not None:
+        try:
+            return make_hashable(value) in answer_set
+        except TypeError:
+            pass
+    return value in answers
+
+
 def convert_func_name(function_name, model_name: str):
     model_name_escaped = model_name.replace("_", "/")
     if "." in function_name:
@@ -76,6 +103,7 @@ def type_checker(
     expected_type_description: str,
     expected_type_converted,
     nested_type_converted,
+    compiled_param=None,
 ):
     # NOTE: This type checker only supports nested type checking for one level deep.
     # We didn't implement recursive type checking for nested types, as it's not needed for the current use case and it's very complex.
@@ -90,7 +118,10 @@ def type_checker(
     is_variable = False
     # check for the case where a variable is used instead of a actual value.
     # use the type in possible_answer as the expected type
-    possible_answer_type = get_possible_answer_type(possible_answer)
+    if compiled_param is not None:
+        possible_answer_type = compiled_param["answer_type"]
+    else:
+        possible_answer_type = get_possible_answer_type(possible_answer)
     # if possible_answer only contains optional parameters, we can't determine the type
     if possible_answer_type != None:
         # we are being precise here.
@@ -132,8 +163,7 @@ def type_checker(
             result["error_type"] = "type_error:nested"
 
     # value is not as expected, check for the case where a variable is used instead of a actual value
-    # use the type in possible_answer as the expected type
-    possible_answer_type = get_possible_answer_type(possible_answer)
+    # use the type in possible_answer as the expected type (`possible_answer_type`, from above)
     # if possible_answer only contains optional parameters, we can't determine the type
     if possible_answer_type != None:
         # we are being precise here.
@@ -150,6 +180,7 @@ def type_checker(
     return result
 
 
+@lru_cache(maxsize=1 << 16)
 def standardize_string(input_string: str):
     # This function standardizes the string by removing all the spaces, ",./-_*^" punctuation, and converting it to lowercase
     # It will also convert all the single quotes to double quotes
@@ -159,12 +190,15 @@ def standardize_string(input_string: str):
     return re.sub(regex_string, "", input_string).lower().replace("'", '"')
 
 
-def string_checker(param: str, model_output: str, possible_answer: list):
-    standardize_possible_answer = []
+def string_checker(param: str, model_output: str, possible_answer: list, compiled_param=None):
     standardize_model_output = standardize_string(model_output)
-    for i in range(len(possible_answer)):
-        if type(possible_answer[i]) == str:
-            standardize_possible_answer.append(standardize_string(possible_answer[i]))
+    if compiled_param is not None:
+        standardize_possible_answer = compiled_param["strings"]
+    else:
+        standardize_possible_answer = []
+        for i in range(len(possible_answer)):
+            if type(possible_answer[i]) == str:
+                standardize_possible_answer.append(standardize_string(possible_answer[i]))
 
     if standardize_model_output not in standardize_possible_answer:
         return {
@@ -178,16 +212,7 @@ def string_checker(param: str, model_output: str, possible_answer: list):
     return {"valid": True, "error": []}
 
 
-def list_checker(param: str, model_output: list, possible_answer: list):
-    # Convert the tuple to a list
-
-    standardize_model_output = list(model_output)
-
-    # If the element in the list is a string, we need to standardize it
-    for i in range(len(standardize_model_output)):
-        if type(standardize_model_output[i]) == str:
-            standardize_model_output[i] = standardize_string(model_output[i])
-
+def standardize_list_answers(possible_answer: list):
     standardize_possible_answer = []
     # We also need to standardize the possible answers
     for i in range(len(possible_answer)):
@@ -199,8 +224,25 @@ def list_checker(param: str, model_output: list, possible_answer: list):
                 )
             else:
                 standardize_possible_answer[i].append(possible_answer[i][j])
+    return standardize_possible_answer
 
-    if standardize_model_output not in standardize_possible_answer:
+
+def list_checker(param: str, model_output: list, possible_answer: list, compiled_param=None):
+    # Convert the tuple to a list
+
+    standardize_model_output = list(model_output)
+
+    # If the element in the list is a string, we need to standardize it
+    for i in range(len(standardize_model_output)):
+        if type(standardize_model_output[i]) == str:
+            standardize_model_output[i] = standardize_string(model_output[i])
+
+    if compiled_param is not None and compiled_param["lists"] is not None:
+        standardize_possible_answer, answer_set = compiled_param["lists"]
+    else:
+        standardize_possible_answer, answer_set = standardize_list_answers(possible_answer), None
+
+    if not is_in_answers(standardize_model_output, standardize_possible_answer, answer_set):
         return {
             "valid": False,
             "error": [
@@ -212,9 +254,20 @@ def list_checker(param: str, model_output: list, possible_answer: list):
     return {"valid": True, "error": []}
 
 
-def dict_checker(param: str, model_output: dict, possible_answers: list):
+def standardize_dict_answer_values(values: list):
+    standardize_possible_answer = []
+    for i in range(len(values)):
+        if type(values[i]) == str:
+            standardize_possible_answer.append(standardize_string(values[i]))
+        else:
+            standardize_possible_answer.append(values[i])
+    return standardize_possible_answer
+
+
+def dict_checker(param: str, model_output: dict, possible_answers: list, compiled_answers=None):
     # This function works for simple dictionaries, but not dictionaries with nested dictionaries.
     # The current dataset only contains simple dictionaries, so this is sufficient.
+    # `compiled_answers`, if given, holds for each dictionary in `possible_answers` its pre-standardized values by key (see `possible_answer_index.py`).
 
     result = {"valid": False, "error": [], "error_type": "dict_checker:unclear"}
     for i in range(len(possible_answers)):
@@ -243,16 +296,15 @@ def dict_checker(param: str, model_output: dict, possible_answers: list):
                 standardize_value = standardize_string(value)
                 
             # We also need to standardize the possible answers if they are string
-            standardize_possible_answer = []
-            for i in range(len(possible_answer[key])):
-                if type(possible_answer[key][i]) == str:
-                    standardize_possible_answer.append(
-                        standardize_string(possible_answer[key][i])
-                    )
-                else:
-                    standardize_possible_answer.append(possible_answer[key][i])
+            if compiled_answers is not None and compiled_answers[i] is not None:
+                standardize_possible_answer, answer_set = compiled_answers[i][key]
+            else:
+                standardize_possible_answer, answer_set = (
+                    standardize_dict_answer_values(possible_answer[key]),
+                    None,
+                )
 
-            if standardize_value not in standardize_possible_answer:
+            if not is_in_answers(standardize_value, standardize_possible_answer, answer_set):
                 result["valid"] = False
                 result["error"].append(
                     f"Invalid value for parameter {repr(key)}: {repr(value)}. Expected one of {standardize_possible_answer}."
@@ -275,7 +327,7 @@ def dict_checker(param: str, model_output: dict, possible_answers: list):
     return result
 
 
-def list_dict_checker(param: str, model_output: list, possible_answers: list):
+def list_dict_checker(param: str, model_output: list, possible_answers: list, compiled_param=None):
     # This function takes in a list of dictionaries and checks if each dictionary is valid
     # The order of the dictionaries in the list must match the order of the possible answers
 
@@ -293,10 +345,19 @@ def list_dict_checker(param: str, model_output: list, possible_answers: list):
             continue
 
         for dict_index in range(len(model_output)):
+            compiled_answers = None
+            if (
+                compiled_param is not None
+                and compiled_param["list_dicts"][answer_index] is not None
+            ):
+                compiled_answers = [
+                    compiled_param["list_dicts"][answer_index][dict_index]
+                ]
             result = dict_checker(
                 param,
                 model_output[dict_index],
                 [possible_answers[answer_index][dict_index]],
+                compiled_answers,
             )
             if not result["valid"]:
                 flag = False
@@ -313,8 +374,14 @@ def simple_function_checker(
     possible_answer: dict,
     language: str,
     model_name: str,
+    compiled_possible_answer: dict = None,
 ):
+    # `compiled_possible_answer`, if given, is the entry of the possible answer index (see `possible_answer_index.py`) for `possible_answer`.
+    # It holds the same answers, pre-standardized and in hashable form, and the pre-resolved types of each parameter.
     possible_answer = list(possible_answer.values())[0]
+    compiled_params = None
+    if compiled_possible_answer is not None:
+        compiled_params = list(compiled_possible_answer.values())[0]
     # Extract function name and parameters details
     func_name = func_description["name"]
     param_details = func_description["parameters"]["properties"]
@@ -360,11 +427,20 @@ def simple_function_checker(
         expected_type_description = full_param_details["type"]  # This is a string
         is_variable = False
         nested_type_converted = None
+        compiled_param = compiled_params[param] if compiled_params is not None else None
+        # Only use the pre-resolved types if they were resolved from this same parameter type
+        resolved_types = None
+        if compiled_param is not None and compiled_param["types"] is not None:
+            if compiled_param["types"][0] == expected_type_description:
+                resolved_types = compiled_param["types"]
 
         if language == "Java":
             from java_type_converter import java_type_converter
 
-            expected_type_converted = JAVA_TYPE_CONVERSION[expected_type_description]
+            if resolved_types is not None:
+                expected_type_converted = resolved_types[1]
+            else:
+                expected_type_converted = JAVA_TYPE_CONVERSION[expected_type_description]
 
             if expected_type_description in JAVA_TYPE_CONVERSION:
                 if type(value) != str:
@@ -387,7 +463,10 @@ def simple_function_checker(
         elif language == "JavaScript":
             from js_type_converter import js_type_converter
 
-            expected_type_converted = JS_TYPE_CONVERSION[expected_type_description]
+            if resolved_types is not None:
+                expected_type_converted = resolved_types[1]
+            else:
+                expected_type_converted = JS_TYPE_CONVERSION[expected_type_description]
 
             if expected_type_description in JS_TYPE_CONVERSION:
                 if type(value) != str:
@@ -408,10 +487,13 @@ def simple_function_checker(
                     value = js_type_converter(value, expected_type_description)
 
         elif language == "Python":
-            expected_type_converted = PYTHON_TYPE_MAPPING[expected_type_description]
-            if expected_type_description in PYTHON_NESTED_TYPE_CHECK_LIST:
-                nested_type = param_details[param]["items"]["type"]
-                nested_type_converted = PYTHON_TYPE_MAPPING[nested_type]
+            if resolved_types is not None:
+                expected_type_converted, nested_type_converted = resolved_types[1:]
+            else:
+                expected_type_converted = PYTHON_TYPE_MAPPING[expected_type_description]
+                if expected_type_description in PYTHON_NESTED_TYPE_CHECK_LIST:
+                    nested_type = param_details[param]["items"]["type"]
+                    nested_type_converted = PYTHON_TYPE_MAPPING[nested_type]
 
         # We convert all tuple value to list when the expected type is tuple.
         # The conversion is necessary because any tuple in the possible answer would become a list after being processed through json.dump() and json.load().
@@ -437,6 +519,7 @@ def simple_function_checker(
             expected_type_description,
             expected_type_converted,
             nested_type_converted,
+            compiled_param,
         )
         is_variable = type_check_result["is_variable"]
         if not type_check_result["valid"]:
@@ -447,14 +530,19 @@ def simple_function_checker(
         if not is_variable:
             # Special handle for dictionaries
             if expected_type_converted == dict:
-                result = dict_checker(param, value, possible_answer[param])
+                result = dict_checker(
+                    param,
+                    value,
+                    possible_answer[param],
+                    compiled_param["dicts"] if compiled_param is not None else None,
+                )
                 if not result["valid"]:
                     return result
                 continue
 
             # Special handle for list of dictionaries
             elif expected_type_converted == list and nested_type_converted == dict:
-                result = list_dict_checker(param, value, possible_answer[param])
+                result = list_dict_checker(param, value, possible_answer[param], compiled_param)
                 if not result["valid"]:
                     return result
                 continue
@@ -462,19 +550,20 @@ def simple_function_checker(
             # Special handle for strings
             elif expected_type_converted == str:
                 # We don't check for case sensitivity for string, as long as it's not a variable
-                result = string_checker(param, value, possible_answer[param])
+                result = string_checker(param, value, possible_answer[param], compiled_param)
                 if not result["valid"]:
                     return result
                 continue
 
             elif expected_type_converted == list:
-                result = list_checker(param, value, possible_answer[param])
+                result = list_checker(param, value, possible_answer[param], compiled_param)
                 if not result["valid"]:
                     return result
                 continue
 
         # Check if the value is within the possible answers
-        if value not in possible_answer[param]:
+        answer_set = compiled_param["values"] if compiled_param is not None else None
+        if not is_in_answers(value, possible_answer[param], answer_set):
             result["valid"] = False
             result["error"].append(
                 f"Invalid value for parameter {repr(param)}: {repr(value)}. Expected one of {possible_answer[param]}."
@@ -495,6 +584,59 @@ def simple_function_checker(
     return result
 
 
+def find_matching(num_expected, num_outputs, get_candidates, check_pair):
+    """
+    Matches every expected call to a distinct model output (maximum bipartite matching, by augmenting paths).
+
+    `get_candidates(i)` lists the output indices that may match expected call `i` (a cheap prefilter), and `check_pair(i, j)`
+    runs the full check and returns the checker result. Each pair is checked at most once, and only when needed:
+    a greedy pass runs first, so the cost is the same as a greedy match whenever that succeeds, and augmenting paths
+    are only searched for the calls it leaves unmatched.
+
+    Returns (failure, checked). `failure` is None if every expected call is matched. Otherwise it is the first expected call
+    the greedy pass left unmatched, with the outputs that were still free at that point, so that the error reported is the
+    same as a greedy match would report. `checked` maps (i, j) to the checker results computed.
+    """
+    checked = {}
+
+    def is_match(i, j):
+        if (i, j) not in checked:
+            checked[(i, j)] = check_pair(i, j)
+        return checked[(i, j)]["valid"]
+
+    match = [None] * num_expected
+    matched_by = [None] * num_outputs
+    greedy_failure = None
+
+    for i in range(num_expected):
+        for j in get_candidates(i):
+            if matched_by[j] is None and is_match(i, j):
+                match[i], matched_by[j] = j, i
+                break
+        if match[i] is None and greedy_failure is None:
+            greedy_failure = (
+                i,
+                [j for j in range(num_outputs) if matched_by[j] is None],
+            )
+
+    def augment(i, visited):
+        for j in get_candidates(i):
+            if j in visited or not is_match(i, j):
+                continue
+            visited.add(j)
+            if matched_by[j] is None or augment(matched_by[j], visited):
+                match[i], matched_by[j] = j, i
+                return True
+        return False
+
+    for i in range(num_expected):
+        # With as many outputs as expected calls, one call that cannot be matched means the whole entry is invalid
+        if match[i] is None and not augment(i, set()):
+            return greedy_failure, checked
+
+    return None, checked
+
+
 def parallel_function_checker_enforce_order(
     func_descriptions: list,
     model_output: list,
@@ -537,6 +679,7 @@ def parallel_function_checker_no_order(
     possible_answers: list,
     language: str,
     model_name: str,
+    compiled_possible_answers: list = None,
 ):
     if len(model_output) != len(possible_answers):
         return {
@@ -545,58 +688,59 @@ def parallel_function_checker_no_order(
             "error_type": "parallel_function_checker_no_order:wrong_count",
         }
 
-    matched_indices = []
-
-    # We go throught the possible answers one by one, and eliminate the model output that matches the possible answer
-    # It must be this way because we need ground truth to fetch the correct function description
-    for i in range(len(possible_answers)):
-        # possible_answers[i] is a dictionary with only one key
-        func_name_expected = list(possible_answers[i].keys())[0]
-        func_description = find_description(func_descriptions, func_name_expected)
-
-
-        all_errors = []
-
-        for index in range(len(model_output)):
-            if index in matched_indices:
-                continue
+    # possible_answers[i] is a dictionary with only one key
+    func_names_expected = [list(possible_answer.keys())[0] for possible_answer in possible_answers]
+    func_descriptions_expected = [
+        find_description(func_descriptions, func_name_expected)
+        for func_name_expected in func_names_expected
+    ]
+
+    def get_candidates(i):
+        # Only an output that calls the expected function can match it; `simple_function_checker` would reject the rest on the name alone
+        func_name = convert_func_name(func_names_expected[i], model_name)
+        return [
+            index for index in range(len(model_output)) if func_name in model_output[index]
+        ]
+
+    def check_pair(i, index):
+        return simple_function_checker(
+            func_descriptions_expected[i],
+            model_output[index],
+            possible_answers[i],
+            language,
+            model_name,
+            compiled_possible_answers[i] if compiled_possible_answers else None,
+        )
 
-            result = simple_function_checker(
-                func_description,
-                model_output[index],
-                possible_answers[i],
-                language,
-                model_name,
-            )
+    # A model output may fit more than one possible answer, so the outputs are matched as a whole rather than greedily
+    failure, checked = find_matching(
+        len(possible_answers), len(model_output), get_candidates, check_pair
+    )
 
-            if result["valid"]:
-                matched_indices.append(index)
-                break
-            else:
-                all_errors.append(
-                    {
-                        f"Model Result Index {index}": {
-                            "sub_error": result["error"],
-                            "sub_error_type": result["error_type"],
-                            "model_output_item": model_output[index],
-                            "possible_answer_item": possible_answers[i],
-                        }
+    if failure is not None:
+        i, considered_indices = failure
+        all_errors = [
+            f"Could not find a matching function among index {considered_indices} of model output for index {i} of possible answers.",
+        ]
+        for index in considered_indices:
+            if (i, index) not in checked:
+                checked[(i, index)] = check_pair(i, index)
+            result = checked[(i, index)]
+            all_errors.append(
+                {
+                    f"Model Result Index {index}": {
+                        "sub_error": result["error"],
+                        "sub_error_type": result["error_type"],
+                        "model_output_item": model_output[index],
+                        "possible_answer_item": possible_answers[i],
                     }
-                )
-
-        if not result["valid"]:
-            considered_indices = [
-                i for i in range(len(model_output)) if i not in matched_indices
-            ]
-            all_errors.insert(
-                0,
-                f"Could not find a matching function among index {considered_indices} of model output for index {i} of possible answers.",
+                }
             )
-            return {
-                "valid": False,
-                "error": all_errors,
-                "error_type": "parallel_function_checker_no_order:cannot_find_match",
-            }
+        return {
+            "valid": False,
+            "error": all_errors,
+            "error_type": "parallel_function_checker_no_order:cannot_find_match",
+        }
 
     return {"valid": True, "error": []}
 
@@ -607,6 +751,7 @@ def multiple_function_checker(
     possible_answers: list,
     language: str,
     model_name: str,
+    compiled_possible_answers: list = None,
 ):
     if len(model_output) != len(possible_answers):
         return {
@@ -624,6 +769,7 @@ def multiple_function_checker(
         possible_answers[0],
         language,
         model_name,
+        compiled_possible_answers[0] if compiled_possible_answers else None,
     )
 
 
@@ -689,36 +835,48 @@ def patten_matcher(exec_output, expected_result, function_call, is_sanity_check)
 
 
 #### Helper functions for Exec ####
+def execute_function_call(function_call: str):
+    # Returns (exec_output, None) on success, or (None, error result) if the call raised.
+    # The call runs in a worker process of the execution pool; `NoAPIKeyError` is raised here if the API keys are missing.
+    success, exec_output = get_execution_pool().execute(function_call)
+    if not success:
+        return None, {
+            "valid": False,
+            "error": [f"Error in execution: {repr(function_call)}. Error: {exec_output}"],
+            "error_type": "executable_checker:execution_error",
+        }
+
+    # We need to special handle the case where the execution result is a tuple and convert it to a list
+    # Because when json is stored, the tuple is converted to a list, and so the expected result is a list when loaded from json
+    if isinstance(exec_output, tuple):
+        exec_output = list(exec_output)
+
+    return exec_output, None
+
+
 def executable_checker_simple(
     function_call: str,
     expected_result,
     expected_result_type: str,
     is_sanity_check=False,
 ):
-    result = {"valid": True, "error": [], "error_type": "executable_checker:unclear"}
+    exec_output, error_result = execute_function_call(function_call)
+    if error_result is not None:
+        return error_result
 
-    exec_dict = {}
+    return execution_result_checker(
+        function_call, exec_output, expected_result, expected_result_type, is_sanity_check
+    )
 
-    try:
-        exec(
-            "from executable_python_function import *" + "\nresult=" + function_call,
-            exec_dict,
-        )
-        exec_output = exec_dict["result"]
-    except NoAPIKeyError as e:
-        raise e
-    except Exception as e:
-        result["valid"] = False
-        result["error"].append(
-            f"Error in execution: {repr(function_call)}. Error: {str(e)}"
-        )
-        result["error_type"] = "executable_checker:execution_error"
-        return result
 
-    # We need to special handle the case where the execution result is a tuple and convert it to a list
-    # Because when json is stored, the tuple is converted to a list, and so the expected result is a list when loaded from json
-    if isinstance(exec_output, tuple):
-        exec_output = list(exec_output)
+def execution_result_checker(
+    function_call: str,
+    exec_output,
+    expected_result,
+    expected_result_type: str,
+    is_sanity_check=False,
+):
+    result = {"valid": True, "error": [], "error_type": "executable_checker:unclear"}
 
     if expected_result_type == "exact_match":
         if exec_output != expected_result:
@@ -780,58 +938,66 @@ def executable_checker_parallel_no_order(
             "error_type": "value_error:exec_result_count",
         }
 
-    matched_indices = []
-    for i in range(len(expected_exec_result)):
-        all_errors = []
-        for index in range(len(decoded_result)):
-            if index in matched_indices:
-                continue
+    # Each model output is executed once, however many expected results it is compared against
+    executions = {}
+
+    def check_pair(i, index):
+        if index not in executions:
+            executions[index] = execute_function_call(decoded_result[index])
+        exec_output, error_result = executions[index]
+        if error_result is not None:
+            return error_result
+        return execution_result_checker(
+            decoded_result[index],
+            exec_output,
+            expected_exec_result[i],
+            expected_exec_result_type[i],
+            False,
+        )
 
-            result = executable_checker_simple(
-                decoded_result[index],
-                expected_exec_result[i],
-                expected_exec_result_type[i],
-                False,
-            )
+    # A model output may fit more than one expected result, so the outputs are matched as a whole rather than greedily
+    failure, checked = find_matching(
+        len(expected_exec_result),
+        len(decoded_result),
+        lambda i: range(len(decoded_result)),
+        check_pair,
+    )
 
-            if result["valid"]:
-                matched_indices.append(index)
-                break
-            else:
-                all_errors.append(
-                    {
-                        f"Model Result Index {index}": {
-                            "sub_error": result["error"],
-                            "sub_error_type": result["error_type"],
-                            "model_executed_output": (
-                                result["model_executed_output"]
-                                if "model_executed_output" in result
-                                else None
-                            ),
-                        }
+    if failure is not None:
+        i, considered_indices = failure
+        all_errors = [
+            f"Could not find a matching function among index {considered_indices} of model output for index {i} of possible answers.",
+        ]
+        for index in considered_indices:
+            if (i, index) not in checked:
+                checked[(i, index)] = check_pair(i, index)
+            result = checked[(i, index)]
+            all_errors.append(
+                {
+                    f"Model Result Index {index}": {
+                        "sub_error": result["error"],
+                        "sub_error_type": result["error_type"],
+                        "model_executed_output": (
+                            result["model_executed_output"]
+                            if "model_executed_output" in result
+                            else None
+                        ),
                     }
-                )
-
-        if not result["valid"]:
-            considered_indices = [
-                i for i in range(len(decoded_result)) if i not in matched_indices
-            ]
-            all_errors.insert(
-                0,
-                f"Could not find a matching function among index {considered_indices} of model output for index {i} of possible answers.",
+                }
             )
-            return {
-                "valid": False,
-                "error": all_errors,
-                "error_type": "executable_checker:cannot_find_match",
-            }
+        return {
+            "valid": False,
+            "error": all_errors,
+            "error_type": "executable_checker:cannot_find_match",
+        }
 
     return {"valid": True, "error": [], "error_type": "executable_checker:unclear"}
 
 
 #### Main function ####
 def executable_checker_rest(func_call, idx):
-    if "https://geocode.maps.co" in func_call:
+    # The pause only paces live requests to geocode.maps.co; replayed responses do not need it
+    if "https://geocode.maps.co" in func_call and get_http_mode()[0] != "replay":
         time.sleep(2)
     if "requests_get" in func_call:
         func_call = func_call.replace("requests_get", "requests.get")
@@ -927,16 +1093,33 @@ def executable_checker_rest(func_call, idx):
 
 
 def ast_checker(
-    func_description, model_output, possible_answer, language, test_category, model_name
+    func_description,
+    model_output,
+    possible_answer,
+    language,
+    test_category,
+    model_name,
+    compiled_possible_answer=None,
 ):
+    # `compiled_possible_answer` is the optional entry of the possible answer index for `possible_answer`; the result is the same with or without it.
     if "parallel" in test_category:
         return parallel_function_checker_no_order(
-            func_description, model_output, possible_answer, language, model_name
+            func_description,
+            model_output,
+            possible_answer,
+            language,
+            model_name,
+            compiled_possible_answer,
         )
         
     elif "multiple" in test_category:
         return multiple_function_checker(
-            func_description, model_output, possible_answer, language, model_name
+            func_description,
+            model_output,
+            possible_answer,
+            language,
+            model_name,
+            compiled_possible_answer,
         )
         
     else:
@@ -948,7 +1131,12 @@ def ast_checker(
             }
 
         return simple_function_checker(
-            func_description[0], model_output[0], possible_answer[0], language, model_name
+            func_description[0],
+            model_output[0],
+            possible_answer[0],
+            language,
+            model_name,
+            compiled_possible_answer[0] if compiled_possible_answer else None,
         )
 
 
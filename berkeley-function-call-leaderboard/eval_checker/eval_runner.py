@@ -6,284 +6,500 @@ from checker import ast_checker, exec_checker, executable_checker_rest
 from custom_exception import BadAPIStatusError
 from eval_runner_helper import *
 from eval_checker_constant import TEST_COLLECTION_MAPPING
+from execution_pool import close_execution_pool, set_execution_pool_size
+from expected_output_cache import DEFAULT_EXPECTED_OUTPUT_TTL, ExpectedOutputCache
+from http_cassette import DEFAULT_CASSETTE_PATH, HTTP_MODES, set_http_mode
+from fingerprint_store import (
+    get_checker_version,
+    get_entry_fingerprints,
+    load_fingerprint_store,
+    save_fingerprint_store,
+)
+from possible_answer_index import load_possible_answer_index
 from tqdm import tqdm
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 import argparse
 
 
 # NOTE: This file should be run in the `eval_checker` directory
 
 
-def single_executable_file_runner(
-    handler, model_result, prompt, model_name, test_category
-):
-    assert len(model_result) == len(prompt)
-
-    result = []
-    correct_count = 0
-    for i in tqdm(range(len(model_result)), desc="Running tests"):
-        raw_result = model_result[i]["result"]
-        try:
-            decoded_result = handler.decode_execute(raw_result)
-        except Exception as e:
-            result.append(
-                {
-                    "id": i + 1,
-                    "model_name": model_name,
-                    "test_category": test_category,
-                    "valid": False,
-                    "error": [f"Failed to decode executable. {str(e)}"],
-                    "error_type": "executable_decoder:decoder_failed",
-                    "prompt": prompt[i],
-                    "model_result_raw": raw_result,
-                }
-            )
-            continue
-
-        if "rest" in test_category:
-            # REST is always single-functioned. Therefore we take the first one and pass it to the REST checker.
-            if not is_rest_format_output(decoded_result):
-                result.append(
-                    {
-                        "id": i + 1,
-                        "model_name": model_name,
-                        "test_category": test_category,
-                        "valid": False,
-                        "error": [
-                            "Did not output in the specified format. Note: the model_result is wrapped in a string to ensure json serializability."
-                        ],
-                        "error_type": "executable_decoder:rest_wrong_output_format",
-                        "prompt": prompt[i],
-                        "model_result_raw": str(raw_result),
-                        "model_result_decoded": str(decoded_result),
-                    }
-                )
-                continue
-
-            checker_result = executable_checker_rest(decoded_result[0], i)
-
-        else:
-            if not is_executable_format_output(decoded_result):
-                result.append(
-                    {
-                        "id": i + 1,
-                        "model_name": model_name,
-                        "test_category": test_category,
-                        "valid": False,
-                        "error": [
-                            "Did not output in the specified format. Note: the model_result is wrapped in a string to ensure json serializability."
-                        ],
-                        "error_type": "executable_decoder:wrong_output_format",
-                        "prompt": prompt[i],
-                        "model_result_raw": str(raw_result),
-                        "model_result_decoded": str(decoded_result),
-                    }
-                )
-                continue
-
-            prompt_item = prompt[i]
-            checker_result = exec_checker(decoded_result, prompt_item, test_category)
-
-        if checker_result["valid"]:
-            correct_count += 1
-        else:
-            temp = {}
-            temp["id"] = i + 1
-            temp["model_name"] = model_name
-            temp["test_category"] = test_category
-            temp["valid"] = checker_result["valid"]
-            temp["error"] = checker_result["error"]
-            temp["error_type"] = checker_result["error_type"]
-            temp["prompt"] = prompt[i]
-            temp["model_result_raw"] = raw_result
-            temp["model_result_decoded"] = decoded_result
-            if "model_executed_output" in checker_result:
-                temp["model_executed_output"] = checker_result["model_executed_output"]
-            result.append(temp)
-
-    accuracy = correct_count / len(model_result)
+def write_score_file(result, correct_count, total_count, model_name, test_category):
+    accuracy = correct_count / total_count
     result.insert(
         0,
         {
             "accuracy": accuracy,
             "correct_count": correct_count,
-            "total_count": len(model_result),
+            "total_count": total_count,
         },
     )
     output_file_name = f"BFCL_v2_{test_category}_score.json"
     output_file_dir = os.path.join(OUTPUT_PATH, model_name)
     write_list_of_dicts_to_file(output_file_name, result, output_file_dir)
 
+    return accuracy
+
+
+def evaluate_executable_entry(handler, i, model_result_item, prompt_item, model_name, test_category):
+    # Returns None if the entry passes, otherwise the error record for the score file.
+    raw_result = model_result_item["result"]
+    try:
+        decoded_result = handler.decode_execute(raw_result)
+    except Exception as e:
+        return {
+            "id": i + 1,
+            "model_name": model_name,
+            "test_category": test_category,
+            "valid": False,
+            "error": [f"Failed to decode executable. {str(e)}"],
+            "error_type": "executable_decoder:decoder_failed",
+            "prompt": prompt_item,
+            "model_result_raw": raw_result,
+        }
+
+    if "rest" in test_category:
+        # REST is always single-functioned. Therefore we take the first one and pass it to the REST checker.
+        if not is_rest_format_output(decoded_result):
+            return {
+                "id": i + 1,
+                "model_name": model_name,
+                "test_category": test_category,
+                "valid": False,
+                "error": [
+                    "Did not output in the specified format. Note: the model_result is wrapped in a string to ensure json serializability."
+                ],
+                "error_type": "executable_decoder:rest_wrong_output_format",
+                "prompt": prompt_item,
+                "model_result_raw": str(raw_result),
+                "model_result_decoded": str(decoded_result),
+            }
+
+        checker_result = executable_checker_rest(decoded_result[0], i)
+
+    else:
+        if not is_executable_format_output(decoded_result):
+            return {
+                "id": i + 1,
+                "model_name": model_name,
+                "test_category": test_category,
+                "valid": False,
+                "error": [
+                    "Did not output in the specified format. Note: the model_result is wrapped in a string to ensure json serializability."
+                ],
+                "error_type": "executable_decoder:wrong_output_format",
+                "prompt": prompt_item,
+                "model_result_raw": str(raw_result),
+                "model_result_decoded": str(decoded_result),
+            }
+
+        checker_result = exec_checker(decoded_result, prompt_item, test_category)
+
+    if checker_result["valid"]:
+        return None
+
+    temp = {}
+    temp["id"] = i + 1
+    temp["model_name"] = model_name
+    temp["test_category"] = test_category
+    temp["valid"] = checker_result["valid"]
+    temp["error"] = checker_result["error"]
+    temp["error_type"] = checker_result["error_type"]
+    temp["prompt"] = prompt_item
+    temp["model_result_raw"] = raw_result
+    temp["model_result_decoded"] = decoded_result
+    if "model_executed_output" in checker_result:
+        temp["model_executed_output"] = checker_result["model_executed_output"]
+    return temp
+
+
+def single_executable_file_runner(
+    handler, model_result, prompt, model_name, test_category, exec_workers=1
+):
+    assert len(model_result) == len(prompt)
+
+    def evaluate(i):
+        return evaluate_executable_entry(
+            handler, i, model_result[i], prompt[i], model_name, test_category
+        )
+
+    # The calls are mostly waiting on external APIs, so entries are checked concurrently, one per execution pool worker.
+    # Results are collected in entry order either way.
+    if exec_workers > 1:
+        with ThreadPoolExecutor(max_workers=exec_workers) as thread_pool:
+            entry_results = list(
+                tqdm(
+                    thread_pool.map(evaluate, range(len(model_result))),
+                    total=len(model_result),
+                    desc="Running tests",
+                )
+            )
+    else:
+        entry_results = [
+            evaluate(i) for i in tqdm(range(len(model_result)), desc="Running tests")
+        ]
+
+    result = [entry_result for entry_result in entry_results if entry_result is not None]
+    correct_count = len(model_result) - len(result)
+
+    accuracy = write_score_file(
+        result, correct_count, len(model_result), model_name, test_category
+    )
     return accuracy, len(model_result)
 
 
-def single_relevance_file_runner(handler, model_result, prompt, model_name, test_category):
+def evaluate_relevance_entry(handler, i, model_result_item, prompt_item, model_name, test_category):
+    # Returns None if the entry passes, otherwise the error record for the score file.
     # This function serves for both relevance and irrelevance tests, which share the exact opposite logic.
     # If `test_category` is "irrelevance", the model is expected to output no function call. 
     # No function call means either the AST decoding fails (a error message is generated) or the decoded AST does not contain any function call (such as a empty list, `[]`).
     # If `test_category` is "relevance", the model is expected to output to a function call, and empty list doesn't count as a function call.
-    result = []
-    correct_count = 0
-    for i in range(len(model_result)):
-        model_result_item = model_result[i]["result"]
-        contain_func_call = False
-        decoded_result = None
-        decode_error = None
-
-        try:
-            decoded_result = handler.decode_ast(model_result_item, language="Python")
-            # Decode successfully, which means the model output is in valid function call format
-            contain_func_call = True
-            if is_empty_output(decoded_result):
-                # Empty output is not considered as a valid function call
-                contain_func_call = False
-
-        except Exception as e:
-            # Decode failed, which means the model output is not in valid function call format
+    contain_func_call = False
+    decoded_result = None
+    decode_error = None
+
+    try:
+        decoded_result = handler.decode_ast(model_result_item, language="Python")
+        # Decode successfully, which means the model output is in valid function call format
+        contain_func_call = True
+        if is_empty_output(decoded_result):
+            # Empty output is not considered as a valid function call
             contain_func_call = False
-            decode_error = str(e)
 
-        # irrelevance test means no function call outputted
-        if "irrelevance" in test_category:
-            success = not contain_func_call
-        else:
-            success = contain_func_call
-
-        if success:
-            correct_count += 1
-        else:
-            temp = {}
-            temp["id"] = i + 1
-            temp["model_name"] = model_name
-            temp["test_category"] = test_category
-            temp["valid"] = success
-            if "irrelevance" in test_category:
-                temp["error"] = [
-                    f"Valid syntax. Successfully decode AST when it should not."
-                ]
-                temp["error_type"] = "irrelevance_error:decoder_success"
-            else: 
-                temp["error"] = [
-                    f"Invalid syntax. Failed to decode AST when it should have. {decode_error}"
-                ]
-                temp["error_type"] = "relevance_error:decoder_failed"
-            temp["prompt"] = prompt[i]
-            temp["model_result"] = model_result_item
-            temp["decoded_result"] = decoded_result
-
-            result.append(temp)
-
-    accuracy = correct_count / len(model_result)
-    result.insert(
-        0,
-        {
-            "accuracy": accuracy,
-            "correct_count": correct_count,
-            "total_count": len(model_result),
-        },
+    except Exception as e:
+        # Decode failed, which means the model output is not in valid function call format
+        contain_func_call = False
+        decode_error = str(e)
+
+    # irrelevance test means no function call outputted
+    if "irrelevance" in test_category:
+        success = not contain_func_call
+    else:
+        success = contain_func_call
+
+    if success:
+        return None
+
+    temp = {}
+    temp["id"] = i + 1
+    temp["model_name"] = model_name
+    temp["test_category"] = test_category
+    temp["valid"] = success
+    if "irrelevance" in test_category:
+        temp["error"] = [
+            f"Valid syntax. Successfully decode AST when it should not."
+        ]
+        temp["error_type"] = "irrelevance_error:decoder_success"
+    else: 
+        temp["error"] = [
+            f"Invalid syntax. Failed to decode AST when it should have. {decode_error}"
+        ]
+        temp["error_type"] = "relevance_error:decoder_failed"
+    temp["prompt"] = prompt_item
+    temp["model_result"] = model_result_item
+    temp["decoded_result"] = decoded_result
+    return temp
+
+
+def single_relevance_file_runner(
+    handler, model_result, prompt, model_name, test_category, incremental=False
+):
+    verdicts, indices, fingerprints = get_stale_entries(
+        handler, model_result, prompt, None, test_category, model_name, incremental
     )
-    output_file_name = f"BFCL_v2_{test_category}_score.json"
-    output_file_dir = os.path.join(OUTPUT_PATH, model_name)
-    write_list_of_dicts_to_file(output_file_name, result, output_file_dir)
+    for i in indices:
+        verdicts[i] = evaluate_relevance_entry(
+            handler, i, model_result[i]["result"], prompt[i], model_name, test_category
+        )
 
-    return accuracy, len(model_result)
+    return write_verdicts(verdicts, fingerprints, model_name, test_category)
 
 
-def single_ast_file_runner(
-    handler, model_result, prompt, possible_answer, language, test_category, model_name
+def evaluate_ast_entry(
+    handler,
+    i,
+    model_result_item,
+    prompt_item,
+    possible_answer_item,
+    language,
+    test_category,
+    model_name,
+    compiled_possible_answer_item=None,
 ):
+    # Returns None if the entry passes, otherwise the error record for the score file.
+    try:
+        model_result_item_raw = model_result_item
+        model_result_item = handler.decode_ast(model_result_item, language)
+    except Exception as e:
+        return {
+            "id": i + 1,
+            "model_name": model_name,
+            "test_category": test_category,
+            "valid": False,
+            "error": [f"Invalid syntax. Failed to decode AST. {str(e)}"],
+            "error_type": "ast_decoder:decoder_failed",
+            "prompt": prompt_item,
+            "model_result_raw": model_result_item_raw,
+            "possible_answer": possible_answer_item,
+        }
+
+    decoder_output_valid = is_function_calling_format_output(model_result_item)
+    if not decoder_output_valid:
+        return {
+            "id": i + 1,
+            "model_name": model_name,
+            "test_category": test_category,
+            "valid": False,
+            "error": [
+                "Did not output in the specified format. Note: the model_result is wrapped in a string to ensure json serializability."
+            ],
+            "error_type": "ast_decoder:decoder_wrong_output_format",
+            "prompt": prompt_item,
+            "model_result_raw": str(model_result_item_raw),
+            "model_result_decoded": str(model_result_item),
+            "possible_answer": possible_answer_item,
+        }
+
+    checker_result = ast_checker(
+        prompt_item["function"],
+        model_result_item,
+        possible_answer_item,
+        language,
+        test_category,
+        model_name,
+        compiled_possible_answer_item,
+    )
+
+    if checker_result["valid"]:
+        return None
+
+    temp = {}
+    temp["id"] = i + 1
+    temp["model_name"] = model_name
+    temp["test_category"] = test_category
+    temp["valid"] = checker_result["valid"]
+    temp["error"] = checker_result["error"]
+    temp["error_type"] = checker_result["error_type"]
+    temp["prompt"] = prompt_item
+    temp["model_result_raw"] = model_result_item_raw
+    temp["model_result_decoded"] = model_result_item
+    temp["possible_answer"] = possible_answer_item
+    return temp
+
+
+def check_ast_file_lengths(model_result, prompt, possible_answer):
     assert (
         len(model_result) == len(prompt) == len(possible_answer)
     ), f"The length of the model result ({len(model_result)}) does not match the length of the prompt ({len(prompt)}) or possible answer ({len(possible_answer)}). Please check the input files for completeness."
 
-    result = []
-    correct_count = 0
+
+#### Incremental (--incremental) mode ####
+# The verdict of every AST and relevance entry (None if it passes, otherwise its error record) is stored together with
+# a fingerprint of the entry's raw result, prompt, possible answer and the checker's source. In incremental mode, only
+# the entries whose fingerprint changed are checked again, and the score file is rebuilt from the merged verdicts.
+
+
+def get_stale_entries(
+    handler, model_result, prompt, possible_answer, test_category, model_name, incremental
+):
+    """
+    Returns (verdicts, indices, fingerprints): the verdicts still valid from the last run (None for the others),
+    the indices of the entries that have to be checked, and the fingerprints of all entries.
+    Outside of incremental mode, every entry is checked.
+    """
+    fingerprints = get_entry_fingerprints(
+        get_checker_version(handler),
+        model_result,
+        prompt,
+        possible_answer,
+        test_category,
+        model_name,
+    )
+    verdicts = [None] * len(model_result)
+    if not incremental:
+        return verdicts, list(range(len(model_result))), fingerprints
+
+    stored_fingerprints, stored_verdicts = load_fingerprint_store(
+        FINGERPRINT_STORE_PATH, model_name, test_category
+    )
+    indices = []
     for i in range(len(model_result)):
-        model_result_item = model_result[i]["result"]
-        prompt_item = prompt[i]["function"]
-        possible_answer_item = possible_answer[i]["ground_truth"]
-
-        try:
-            model_result_item_raw = model_result_item
-            model_result_item = handler.decode_ast(model_result_item, language)
-        except Exception as e:
-            result.append(
-                {
-                    "id": i + 1,
-                    "model_name": model_name,
-                    "test_category": test_category,
-                    "valid": False,
-                    "error": [f"Invalid syntax. Failed to decode AST. {str(e)}"],
-                    "error_type": "ast_decoder:decoder_failed",
-                    "prompt": prompt[i],
-                    "model_result_raw": model_result_item_raw,
-                    "possible_answer": possible_answer_item,
-                }
-            )
-            continue
+        if i < len(stored_fingerprints) and stored_fingerprints[i] == fingerprints[i]:
+            verdicts[i] = stored_verdicts[i]
+        else:
+            indices.append(i)
+    return verdicts, indices, fingerprints
 
-        decoder_output_valid = is_function_calling_format_output(model_result_item)
-        if not decoder_output_valid:
-            result.append(
-                {
-                    "id": i + 1,
-                    "model_name": model_name,
-                    "test_category": test_category,
-                    "valid": False,
-                    "error": [
-                        "Did not output in the specified format. Note: the model_result is wrapped in a string to ensure json serializability."
-                    ],
-                    "error_type": "ast_decoder:decoder_wrong_output_format",
-                    "prompt": prompt[i],
-                    "model_result_raw": str(model_result_item_raw),
-                    "model_result_decoded": str(model_result_item),
-                    "possible_answer": possible_answer_item,
-                }
-            )
-            continue
 
-        checker_result = ast_checker(
-            prompt_item,
-            model_result_item,
-            possible_answer_item,
+def write_verdicts(verdicts, fingerprints, model_name, test_category):
+    result = [verdict for verdict in verdicts if verdict is not None]
+    correct_count = len(verdicts) - len(result)
+    accuracy = write_score_file(
+        result, correct_count, len(verdicts), model_name, test_category
+    )
+    save_fingerprint_store(
+        FINGERPRINT_STORE_PATH, model_name, test_category, fingerprints, verdicts
+    )
+    return accuracy, len(verdicts)
+
+
+def single_ast_file_runner(
+    handler,
+    model_result,
+    prompt,
+    possible_answer,
+    language,
+    test_category,
+    model_name,
+    possible_answer_index=None,
+    incremental=False,
+):
+    check_ast_file_lengths(model_result, prompt, possible_answer)
+
+    verdicts, indices, fingerprints = get_stale_entries(
+        handler, model_result, prompt, possible_answer, test_category, model_name, incremental
+    )
+    for i in indices:
+        verdicts[i] = evaluate_ast_entry(
+            handler,
+            i,
+            model_result[i]["result"],
+            prompt[i],
+            possible_answer[i]["ground_truth"],
             language,
             test_category,
             model_name,
+            possible_answer_index[i] if possible_answer_index else None,
         )
 
-        if checker_result["valid"]:
-            correct_count += 1
+    return write_verdicts(verdicts, fingerprints, model_name, test_category)
+
+
+#### Parallel (--workers) mode ####
+# AST and relevance entries are independent, so they are checked in a process pool.
+# Each (model, category) file is split into shards of consecutive entries; a worker returns the number of passing entries in its shard
+# and the error records of the failing ones, in entry order. Shards are merged in order, so the score files are identical to a serial run.
+
+# Number of entries in one shard. Small categories become a single shard; the large live categories are spread over several workers.
+ENTRIES_PER_SHARD = 100
+
+# Handlers built by this worker process, by model name
+_WORKER_HANDLERS = {}
+
+
+def _get_worker_handler(model_name_escaped):
+    if model_name_escaped not in _WORKER_HANDLERS:
+        _WORKER_HANDLERS[model_name_escaped] = get_handler(model_name_escaped)
+    return _WORKER_HANDLERS[model_name_escaped]
+
+
+def run_shard(
+    indices,
+    model_result,
+    prompt,
+    possible_answer,
+    language,
+    test_category,
+    model_name,
+    possible_answer_index=None,
+):
+    # The lists hold the entries at `indices` of the file, in order. Returns the verdict of each of them.
+    # `possible_answer` and `possible_answer_index` are None for relevance and irrelevance tests
+    handler = _get_worker_handler(model_name.replace("_", "/"))
+    verdicts = []
+    for offset, i in enumerate(indices):
+        if possible_answer is None:
+            verdict = evaluate_relevance_entry(
+                handler,
+                i,
+                model_result[offset]["result"],
+                prompt[offset],
+                model_name,
+                test_category,
+            )
         else:
-            temp = {}
-            temp["id"] = i + 1
-            temp["model_name"] = model_name
-            temp["test_category"] = test_category
-            temp["valid"] = checker_result["valid"]
-            temp["error"] = checker_result["error"]
-            temp["error_type"] = checker_result["error_type"]
-            temp["prompt"] = prompt[i]
-            temp["model_result_raw"] = model_result_item_raw
-            temp["model_result_decoded"] = model_result_item
-            temp["possible_answer"] = possible_answer_item
-            result.append(temp)
-
-    accuracy = correct_count / len(model_result)
-    result.insert(
-        0,
-        {
-            "accuracy": accuracy,
-            "correct_count": correct_count,
-            "total_count": len(model_result),
-        },
+            verdict = evaluate_ast_entry(
+                handler,
+                i,
+                model_result[offset]["result"],
+                prompt[offset],
+                possible_answer[offset]["ground_truth"],
+                language,
+                test_category,
+                model_name,
+                possible_answer_index[offset] if possible_answer_index else None,
+            )
+        verdicts.append(verdict)
+    return verdicts
+
+
+def submit_sharded_file(
+    executor,
+    handler,
+    model_result,
+    prompt,
+    possible_answer,
+    language,
+    test_category,
+    model_name,
+    possible_answer_index=None,
+    incremental=False,
+):
+    # Returns a job to be passed to `collect_sharded_file` once all files have been submitted
+    if possible_answer is not None:
+        check_ast_file_lengths(model_result, prompt, possible_answer)
+
+    verdicts, indices, fingerprints = get_stale_entries(
+        handler, model_result, prompt, possible_answer, test_category, model_name, incremental
     )
-    output_file_name = f"BFCL_v2_{test_category}_score.json"
-    output_file_dir = os.path.join(OUTPUT_PATH, model_name)
-    write_list_of_dicts_to_file(output_file_name, result, output_file_dir)
 
-    return accuracy, len(model_result)
+    shards = []
+    for start in range(0, len(indices), ENTRIES_PER_SHARD):
+        shard_indices = indices[start : start + ENTRIES_PER_SHARD]
+        future = executor.submit(
+            run_shard,
+            shard_indices,
+            [model_result[i] for i in shard_indices],
+            [prompt[i] for i in shard_indices],
+            (
+                [possible_answer[i] for i in shard_indices]
+                if possible_answer is not None
+                else None
+            ),
+            language,
+            test_category,
+            model_name,
+            (
+                [possible_answer_index[i] for i in shard_indices]
+                if possible_answer_index
+                else None
+            ),
+        )
+        shards.append((shard_indices, future))
+    return model_name, test_category, verdicts, fingerprints, shards
+
+
+def collect_sharded_file(job):
+    model_name, test_category, verdicts, fingerprints, shards = job
+    for shard_indices, future in shards:
+        for i, verdict in zip(shard_indices, future.result()):
+            verdicts[i] = verdict
+
+    return write_verdicts(verdicts, fingerprints, model_name, test_category)
 
 
 #### Main runner function ####
-def runner(model_names, test_categories, api_sanity_check):
+def runner(
+    model_names,
+    test_categories,
+    api_sanity_check,
+    workers=1,
+    exec_workers=1,
+    http_mode="live",
+    cassette_path=DEFAULT_CASSETTE_PATH,
+    expected_output_ttl=DEFAULT_EXPECTED_OUTPUT_TTL,
+    incremental=False,
+):
 
     # A flag to indicate if the API has been tested.
     # We should always test the API with ground truth first before running the executable tests.
@@ -296,6 +512,18 @@ def runner(model_names, test_categories, api_sanity_check):
     # So we need a list of all the test categories that we have ran the ground truth evaluation on.
     # We only get the expected output once for each test category.
     EXECUTABLE_TEST_CATEGORIES_HAVE_RUN = []
+    # The expected outputs are cached across runs, and only recomputed once stale (see `expected_output_cache.py`)
+    expected_output_cache = None
+
+    # With more than one worker, AST and relevance files are checked in a process pool while the executable tests run here.
+    # Their results are collected, in submission order, after all files have been visited.
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    sharded_jobs = []
+
+    # Function calls of the executable test categories, including the ground truth, run in this many worker processes
+    set_execution_pool_size(exec_workers)
+    # HTTP requests of the executable categories (REST checks and the execution pool workers) go through the cassette store
+    set_http_mode(http_mode, cassette_path)
 
     # Get a list of all entries in the folder
     entries = os.scandir(INPUT_PATH)
@@ -338,7 +566,7 @@ def runner(model_names, test_categories, api_sanity_check):
 
             print(f"🔍 Running test: {test_category}")
 
-            model_result = load_file(model_result_json)
+            model_result = load_file(model_result_json, MODEL_RESULT_FIELDS)
             record_cost_latency(LEADERBOARD_TABLE, model_name, model_result)
 
             # Find the corresponding test file
@@ -346,8 +574,24 @@ def runner(model_names, test_categories, api_sanity_check):
             prompt = load_file(prompt_file)
 
             if is_relevance_or_irrelevance(test_category):
+                if executor is not None:
+                    sharded_jobs.append(
+                        submit_sharded_file(
+                            executor,
+                            handler,
+                            model_result,
+                            prompt,
+                            None,
+                            language,
+                            test_category,
+                            model_name,
+                            incremental=incremental,
+                        )
+                    )
+                    continue
+
                 accuracy, total_count = single_relevance_file_runner(
-                    handler, model_result, prompt, model_name, test_category
+                    handler, model_result, prompt, model_name, test_category, incremental
                 )
                 record_result(
                     LEADERBOARD_TABLE, model_name, test_category, accuracy, total_count
@@ -374,23 +618,25 @@ def runner(model_names, test_categories, api_sanity_check):
                     
                     API_TESTED = True
 
-                if (
-                    test_category not in EXECUTABLE_TEST_CATEGORIES_HAVE_RUN
-                    and not is_rest(test_category)
-                ):
-                    print(
-                        f"---- Getting real-time execution result from ground truth for {test_category} ----"
-                    )
-                    get_executable_expected_output(prompt_file)
-                    print(
-                        f"---- Ground truth real-time execution result obtained for {test_category} 🌟 ----"
-                    )
-                    EXECUTABLE_TEST_CATEGORIES_HAVE_RUN.append(test_category)
-                    # Need to re-load the prompt file after getting the expected output, as the prompt file has been updated
-                    prompt = load_file(prompt_file)
+                if not is_rest(test_category):
+                    if expected_output_cache is None:
+                        expected_output_cache = ExpectedOutputCache(
+                            EXPECTED_OUTPUT_CACHE_PATH, expected_output_ttl
+                        )
+                    if test_category not in EXECUTABLE_TEST_CATEGORIES_HAVE_RUN:
+                        print(
+                            f"---- Getting real-time execution result from ground truth for {test_category} ----"
+                        )
+                    # Outputs computed for an earlier model are served from memory
+                    get_executable_expected_output(prompt, expected_output_cache)
+                    if test_category not in EXECUTABLE_TEST_CATEGORIES_HAVE_RUN:
+                        print(
+                            f"---- Ground truth real-time execution result obtained for {test_category} 🌟 ----"
+                        )
+                        EXECUTABLE_TEST_CATEGORIES_HAVE_RUN.append(test_category)
 
                 accuracy, total_count = single_executable_file_runner(
-                    handler, model_result, prompt, model_name, test_category
+                    handler, model_result, prompt, model_name, test_category, exec_workers
                 )
                 record_result(
                     LEADERBOARD_TABLE, model_name, test_category, accuracy, total_count
@@ -403,7 +649,33 @@ def runner(model_names, test_categories, api_sanity_check):
             possible_answer_file = find_file_with_suffix(
                 POSSIBLE_ANSWER_PATH, test_category
             )
-            possible_answer = load_file(possible_answer_file)
+            possible_answer = load_file(possible_answer_file, ["id", "ground_truth"])
+            # The ground truth is compiled once per category and shared by all models
+            possible_answer_index = load_possible_answer_index(
+                possible_answer_file,
+                prompt_file,
+                possible_answer,
+                prompt,
+                language,
+                POSSIBLE_ANSWER_INDEX_CACHE_PATH,
+            )
+            if executor is not None:
+                sharded_jobs.append(
+                    submit_sharded_file(
+                        executor,
+                        handler,
+                        model_result,
+                        prompt,
+                        possible_answer,
+                        language,
+                        test_category,
+                        model_name,
+                        possible_answer_index,
+                        incremental,
+                    )
+                )
+                continue
+
             accuracy, total_count = single_ast_file_runner(
                 handler,
                 model_result,
@@ -412,24 +684,34 @@ def runner(model_names, test_categories, api_sanity_check):
                 language,
                 test_category,
                 model_name,
+                possible_answer_index,
+                incremental,
             )
             record_result(
                 LEADERBOARD_TABLE, model_name, test_category, accuracy, total_count
             )
             print(f"✅ Test completed: {test_category}. 🎯 Accuracy: {accuracy}")
 
+    if executor is not None:
+        for job in sharded_jobs:
+            model_name, test_category = job[0], job[1]
+            accuracy, total_count = collect_sharded_file(job)
+            record_result(
+                LEADERBOARD_TABLE, model_name, test_category, accuracy, total_count
+            )
+            print(f"✅ Test completed: {model_name} {test_category}. 🎯 Accuracy: {accuracy}")
+        executor.shutdown()
+    close_execution_pool()
+
     # This function reads all the score files from local folder and updates the leaderboard table.
     # This is helpful when you only want to run the evaluation for a subset of models and test categories.
     update_leaderboard_table_with_score_file(LEADERBOARD_TABLE, OUTPUT_PATH)
     # Write the leaderboard table to a file
     generate_leaderboard_csv(LEADERBOARD_TABLE, OUTPUT_PATH, model_names, test_categories)
 
-    # Clean up the executable expected output files
-    # They should be re-generated the next time the evaluation is run
-    clean_up_executable_expected_output(
-        PROMPT_PATH, EXECUTABLE_TEST_CATEGORIES_HAVE_RUN
-    )
-    
+    if expected_output_cache is not None:
+        expected_output_cache.close()
+
     display_api_status_error(API_STATUS_ERROR_REST, API_STATUS_ERROR_EXECUTABLE, display_success=False)
     
     print(
@@ -444,6 +726,19 @@ INPUT_PATH = "../result/"
 PROMPT_PATH = "../data/"
 POSSIBLE_ANSWER_PATH = "../data/possible_answer/"
 OUTPUT_PATH = "../score/"
+# Not inside OUTPUT_PATH, as every directory there is read as a model's scores
+POSSIBLE_ANSWER_INDEX_CACHE_PATH = "../.cache/possible_answer_index/"
+EXPECTED_OUTPUT_CACHE_PATH = "../.cache/expected_output.sqlite3"
+FINGERPRINT_STORE_PATH = "../.cache/score_fingerprints/"
+# The checkers only read the model's response; the other keys are for `record_cost_latency`
+MODEL_RESULT_FIELDS = [
+    "id",
+    "result",
+    "latency",
+    "amortized_latency",
+    "input_token_count",
+    "output_token_count",
+]
 
 # A dictionary to store the results
 # Key is model name, value is a dictionary with keys as test category and values as a dictionary with accuracy and total count
@@ -471,6 +766,48 @@ if __name__ == "__main__":
         help="Perform the REST API status sanity check before running the evaluation. By default, the sanity check is skipped.",
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of worker processes for the AST and relevance checks. Executable tests are scheduled from the main process (see --exec-workers). By default, everything runs in the main process.",
+    )
+
+    parser.add_argument(
+        "--exec-workers",
+        type=int,
+        default=1,
+        help="Number of worker processes that execute the function calls of the executable test categories. Each call is subject to a timeout, and results of deterministic functions are computed only once. By default, one worker is used.",
+    )
+
+    parser.add_argument(
+        "--http-mode",
+        type=str,
+        default="live",
+        choices=HTTP_MODES,
+        help="How the executable categories make HTTP requests. 'live' sends them; 'record' sends them and saves the responses to the cassette path; 'replay' answers them from the cassette path only, without network access or rate-limit pauses. By default, 'live'.",
+    )
+    parser.add_argument(
+        "--cassette-path",
+        type=str,
+        default=DEFAULT_CASSETTE_PATH,
+        help=f"Directory of the recorded HTTP responses used by --http-mode record/replay. Default: {DEFAULT_CASSETTE_PATH}",
+    )
+
+    parser.add_argument(
+        "--expected-output-ttl",
+        type=int,
+        default=DEFAULT_EXPECTED_OUTPUT_TTL,
+        help=f"Seconds for which the cached execution results of ground-truth calls that depend on live APIs stay valid. Results checked by exact match are kept until the cache version changes. Set to 0 to recompute them on every run. Default: {DEFAULT_EXPECTED_OUTPUT_TTL}",
+    )
+
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        default=False,
+        help="Only check the AST and relevance entries whose raw result, prompt or possible answer (or the checker code) changed since the last run, and merge their verdicts with the stored ones. Executable categories are always checked in full, as they depend on live APIs.",
+    )
+
     args = parser.parse_args()
 
     api_sanity_check = args.api_sanity_check
@@ -492,4 +829,14 @@ if __name__ == "__main__":
             # We patch it here to avoid confusing the user.
             model_names.append(model_name.replace("/", "_"))
 
-    runner(model_names, test_categories, api_sanity_check)
+    runner(
+        model_names,
+        test_categories,
+        api_sanity_check,
+        args.workers,
+        args.exec_workers,
+        args.http_mode,
+        args.cassette_path,
+        args.expected_output_ttl,
+        args.incremental,
+    )
@@ -1,12 +1,12 @@
 import glob
 import json
 import os
-import statistics
 import subprocess
 import re
 import numpy as np
 from custom_exception import BadAPIStatusError
 from model_handler.handler_map import handler_map
+from model_handler.jsonl_loader import load_jsonl
 from tqdm import tqdm
 
 REST_API_GROUND_TRUTH_FILE_PATH = "api_status_check_ground_truth_REST.json"
@@ -88,6 +88,167 @@ COLUMNS_COMBINED = [
     "Latency 95th Percentile (s)",
 ]
 
+# Test categories that are scored on the leaderboard, as read from the score files
+LEADERBOARD_CATEGORIES = [
+    "simple",
+    "multiple",
+    "parallel",
+    "parallel_multiple",
+    "java",
+    "javascript",
+    "exec_simple",
+    "exec_multiple",
+    "exec_parallel",
+    "exec_parallel_multiple",
+    "rest",
+    "irrelevance",
+    "live_simple",
+    "live_multiple",
+    "live_parallel",
+    "live_parallel_multiple",
+    "live_irrelevance",
+    "live_relevance",
+]
+
+# Summary scores, as (averaging method, scores averaged). "unweighted" is the mean of the accuracies; "weighted" weighs them by test count.
+# A summary may average categories and the summaries defined before it.
+LEADERBOARD_SUMMARIES = {
+    # Non-Live
+    "simple_ast_non_live": ("unweighted", ["simple", "java", "javascript"]),
+    "simple_exec_non_live": ("unweighted", ["exec_simple", "rest"]),
+    "summary_ast_non_live": (
+        "unweighted",
+        ["simple_ast_non_live", "multiple", "parallel", "parallel_multiple"],
+    ),
+    "summary_exec_non_live": (
+        "unweighted",
+        ["simple_exec_non_live", "exec_multiple", "exec_parallel", "exec_parallel_multiple"],
+    ),
+    "overall_non_live": (
+        "unweighted",
+        [
+            "simple_ast_non_live",
+            "multiple",
+            "parallel",
+            "parallel_multiple",
+            "simple_exec_non_live",
+            "exec_multiple",
+            "exec_parallel",
+            "exec_parallel_multiple",
+            "irrelevance",
+        ],
+    ),
+    # Live
+    "summary_ast_live": (
+        "weighted",
+        ["live_simple", "live_multiple", "live_parallel", "live_parallel_multiple"],
+    ),
+    "overall_live": (
+        "weighted",
+        [
+            "live_simple",
+            "live_multiple",
+            "live_parallel",
+            "live_parallel_multiple",
+            "live_irrelevance",
+            "live_relevance",
+        ],
+    ),
+    # Combined
+    "total_simple_ast": ("unweighted", ["simple_ast_non_live", "live_simple"]),
+    "total_multiple_ast": ("unweighted", ["multiple", "live_multiple"]),
+    "total_parallel_ast": ("unweighted", ["parallel", "live_parallel"]),
+    "total_parallel_multiple_ast": (
+        "unweighted",
+        ["parallel_multiple", "live_parallel_multiple"],
+    ),
+    "total_irrelevance": ("unweighted", ["irrelevance", "live_irrelevance"]),
+    "total_summary_ast": (
+        "unweighted",
+        ["total_simple_ast", "total_multiple_ast", "total_parallel_ast", "total_parallel_multiple_ast"],
+    ),
+    "total_summary_exec": (
+        "unweighted",
+        ["simple_exec_non_live", "exec_multiple", "exec_parallel", "exec_parallel_multiple"],
+    ),
+    "total_overall": (
+        "unweighted",
+        [
+            "total_simple_ast",
+            "total_multiple_ast",
+            "total_parallel_ast",
+            "total_parallel_multiple_ast",
+            "simple_exec_non_live",
+            "exec_multiple",
+            "exec_parallel",
+            "exec_parallel_multiple",
+            "total_irrelevance",
+            "live_relevance",
+        ],
+    ),
+}
+
+# The leaderboard tables, as (file name without extension, columns, scores shown).
+# Every row is: rank, the first score (overall accuracy, by which rows are ranked), the model metadata, the other scores, cost and latency.
+LEADERBOARD_TABLES = [
+    (
+        "data_non_live",
+        COLUMNS_NON_LIVE,
+        [
+            "overall_non_live",
+            "summary_ast_non_live",
+            "summary_exec_non_live",
+            "simple_ast_non_live",
+            "simple",
+            "java",
+            "javascript",
+            "multiple",
+            "parallel",
+            "parallel_multiple",
+            "simple_exec_non_live",
+            "exec_simple",
+            "rest",
+            "exec_multiple",
+            "exec_parallel",
+            "exec_parallel_multiple",
+            "irrelevance",
+        ],
+    ),
+    (
+        "data_live",
+        COLUMNS_LIVE,
+        [
+            "overall_live",
+            "summary_ast_live",
+            "live_simple",
+            "live_multiple",
+            "live_parallel",
+            "live_parallel_multiple",
+            "live_irrelevance",
+            "live_relevance",
+        ],
+    ),
+    (
+        "data_combined",
+        COLUMNS_COMBINED,
+        [
+            "total_overall",
+            "total_summary_ast",
+            "total_summary_exec",
+            "total_simple_ast",
+            "total_multiple_ast",
+            "total_parallel_ast",
+            "total_parallel_multiple_ast",
+            "simple_exec_non_live",
+            "exec_multiple",
+            "exec_parallel",
+            "exec_parallel_multiple",
+            "total_irrelevance",
+            "live_relevance",
+        ],
+    ),
+]
+
 MODEL_METADATA_MAPPING = {
     "gpt-4o-2024-08-06": [
         "GPT-4o-2024-08-06 (Prompt)",
@@ -644,7 +805,7 @@ OUTPUT_PRICE_PER_MILLION_TOKEN = {
 }
 
 # The latency of the open-source models are hardcoded here.
-# Because we do batching when generating the data, so the latency is not accurate from the result data.
+# Result files generated now carry the measured timing of each request (see `amortized_latency`), so this table is only used for older result files without it.
 # This is the latency for the whole batch of data, when using 8 V100 GPUs.
 OSS_LATENCY = {
     "deepseek-ai/deepseek-coder-6.7b-instruct": 909,
@@ -729,13 +890,15 @@ def is_sql(test_category):
     return "sql" in test_category
 
 
-def load_file(file_path):
-    result = []
+def load_file(file_path, fields=None):
+    # Streamed line by line; `fields` keeps only those keys of each entry
+    return load_jsonl(file_path, fields)
+
+
+def load_score_header(file_path):
+    # The first line of a score file holds the accuracy and total count; the error records after it are not needed
     with open(file_path) as f:
-        file = f.readlines()
-        for line in file:
-            result.append(json.loads(line))
-    return result
+        return json.loads(f.readline())
 
 
 def get_handler(model_name):
@@ -885,33 +1048,16 @@ def display_api_status_error(rest_error, executable_error, display_success=False
     print(f"{RED_FONT}{'-' * 100}\n{RESET}")
 
 
-def get_executable_expected_output(prompt_file_path):
-    # Before we run the evaluation, we need to add the "execution_result" field to the prompt file, using the ground truth data.
-    prompt_content = load_file(prompt_file_path)
-    exec_dict = {}
+def get_executable_expected_output(prompt_content, expected_output_cache):
+    # Before we run the evaluation, we need to add the "execution_result" field to the prompt entries, using the ground truth data.
+    # It is only added in memory; the prompt files are left untouched.
     for item in tqdm(prompt_content, desc="Getting Executable Expected Output"):
-        execution_result = []
-        ground_truth = item["ground_truth"]
-        for i in range(len(ground_truth)):
-            exec(
-                "from executable_python_function import *"
-                + "\nresult="
-                + ground_truth[i],
-                exec_dict,
+        item["execution_result"] = [
+            expected_output_cache.get_expected_output(
+                item["ground_truth"][i], item["execution_result_type"][i]
             )
-            execution_result.append(exec_dict["result"])
-        item["execution_result"] = execution_result
-
-    write_list_of_dicts_to_file(prompt_file_path, prompt_content)
-
-
-def clean_up_executable_expected_output(prompt_path, categories):
-    for category in categories:
-        prompt_file = find_file_with_suffix(prompt_path, category)
-        prompt_content = load_file(prompt_file)
-        for item in prompt_content:
-            del item["execution_result"]
-        write_list_of_dicts_to_file(prompt_file, prompt_content)
+            for i in range(len(item["ground_truth"]))
+        ]
 
 
 def calculate_weighted_accuracy(accuracy_dict_list):
@@ -950,54 +1096,70 @@ def record_result(leaderboard_table, model_name, test_category, accuracy, total_
 
 
 def record_cost_latency(leaderboard_table, model_name, model_output_data):
+    # The values of each result file are kept as one NumPy array; `get_cost_letency_info` concatenates them
     if model_name not in leaderboard_table:
         leaderboard_table[model_name] = {}
         leaderboard_table[model_name]["cost"] = {"input_data": [], "output_data": []}
-        leaderboard_table[model_name]["latency"] = {"data": []}
-
-    input_token = []
-    output_token = []
-    latency = []
-    for data in model_output_data:
-        if "latency" in data:
-            latency.append(data["latency"])
-            if data["latency"] > 60:
-                print("*" * 100)
-                print(
-                    f"❗️Warning: Latency for one of {model_name} response is {data['latency']}."
-                )
-                print("*" * 100)
-        if "input_token_count" in data:
-            if data["input_token_count"] != 0:
-                input_token.append(data["input_token_count"])
-        if "output_token_count" in data:
-            if data["output_token_count"] != 0:
-                output_token.append(data["output_token_count"])
-
-    leaderboard_table[model_name]["cost"]["input_data"].extend(input_token)
-    leaderboard_table[model_name]["cost"]["output_data"].extend(output_token)
-    leaderboard_table[model_name]["latency"]["data"].extend(latency)
+        leaderboard_table[model_name]["latency"] = {"data": [], "amortized_data": []}
+
+    latency = np.array(
+        [data["latency"] for data in model_output_data if "latency" in data],
+        dtype=float,
+    )
+    for slow_latency in latency[latency > 60]:
+        print("*" * 100)
+        print(
+            f"❗️Warning: Latency for one of {model_name} response is {slow_latency}."
+        )
+        print("*" * 100)
+    # Only present for OSS models: this request's share of the vLLM engine time, since requests are served in batches
+    amortized_latency = np.array(
+        [data["amortized_latency"] for data in model_output_data if "amortized_latency" in data],
+        dtype=float,
+    )
+    input_token = np.array(
+        [data.get("input_token_count", 0) for data in model_output_data], dtype=float
+    )
+    output_token = np.array(
+        [data.get("output_token_count", 0) for data in model_output_data], dtype=float
+    )
+
+    leaderboard_table[model_name]["cost"]["input_data"].append(input_token[input_token != 0])
+    leaderboard_table[model_name]["cost"]["output_data"].append(output_token[output_token != 0])
+    leaderboard_table[model_name]["latency"]["data"].append(latency)
+    leaderboard_table[model_name]["latency"]["amortized_data"].append(amortized_latency)
+
+
+def _concatenate(arrays):
+    if len(arrays) == 0:
+        return np.array([], dtype=float)
+    return np.concatenate(arrays)
 
 
 def get_cost_letency_info(model_name, cost_data, latency_data):
 
     cost, mean_latency, std_latency, percentile_95_latency = "N/A", "N/A", "N/A", "N/A"
 
+    input_data = _concatenate(cost_data["input_data"])
+    output_data = _concatenate(cost_data["output_data"])
+    latency = _concatenate(latency_data["data"])
+    amortized_latency = _concatenate(latency_data.get("amortized_data", []))
+
     if (
         model_name in INPUT_PRICE_PER_MILLION_TOKEN
-        and len(cost_data["input_data"]) > 0
-        and len(cost_data["output_data"]) > 0
+        and len(input_data) > 0
+        and len(output_data) > 0
     ):
 
-        mean_input_token = statistics.mean(cost_data["input_data"])
-        mean_output_token = statistics.mean(cost_data["output_data"])
+        mean_input_token = input_data.mean()
+        mean_output_token = output_data.mean()
         cost = (
             mean_input_token * INPUT_PRICE_PER_MILLION_TOKEN[model_name]
             + mean_output_token * OUTPUT_PRICE_PER_MILLION_TOKEN[model_name]
         ) / 1000
-        cost = round(cost, 2)
+        cost = round(float(cost), 2)
 
-    if model_name in OSS_LATENCY:
+    if model_name in OSS_LATENCY and len(amortized_latency) == 0:
         mean_latency, std_latency, percentile_95_latency = (
             OSS_LATENCY[model_name] / 1700,
             "N/A",
@@ -1007,17 +1169,18 @@ def get_cost_letency_info(model_name, cost_data, latency_data):
         cost = mean_latency * 1000 * V100_x8_PRICE_PER_HOUR / 3600
         cost = round(cost, 2)
 
-    elif len(latency_data["data"]) != 0:
-        mean_latency = statistics.mean(latency_data["data"])
-        std_latency = statistics.stdev(latency_data["data"])
-        percentile_95_latency = np.percentile(latency_data["data"], 95)
-        mean_latency = round(mean_latency, 2)
-        std_latency = round(std_latency, 2)
-        percentile_95_latency = round(percentile_95_latency, 2)
+    elif len(latency) != 0:
+        mean_latency = round(float(latency.mean()), 2)
+        std_latency = round(float(latency.std(ddof=1)), 2)
+        percentile_95_latency = round(float(np.percentile(latency, 95)), 2)
 
-        if model_name not in INPUT_PRICE_PER_MILLION_TOKEN:
-            cost = sum(latency_data["data"]) * V100_x8_PRICE_PER_HOUR / 3600
-            cost = round(cost, 2)
+        if len(amortized_latency) != 0:
+            # OSS models: GPU time per 1000 function calls, priced at the same 8 V100 rate as `OSS_LATENCY`
+            cost = amortized_latency.mean() * 1000 * V100_x8_PRICE_PER_HOUR / 3600
+            cost = round(float(cost), 2)
+        elif model_name not in INPUT_PRICE_PER_MILLION_TOKEN:
+            cost = latency.sum() * V100_x8_PRICE_PER_HOUR / 3600
+            cost = round(float(cost), 2)
 
     if model_name in NO_COST_MODELS:
         cost = "N/A"
@@ -1025,304 +1188,131 @@ def get_cost_letency_info(model_name, cost_data, latency_data):
     return cost, mean_latency, std_latency, percentile_95_latency
 
 
+def _average_scores(method, scores):
+    # `scores` is a list of (accuracy, total_count) pairs of arrays, with one value per model.
+    # They are added up one after the other, in the same order as `calculate_weighted_accuracy` and `calculate_unweighted_accuracy`,
+    # so that the results are the same to the last bit (and ties in the ranking stay ties).
+    total_count = scores[0][1]
+    for _, count in scores[1:]:
+        total_count = total_count + count
+
+    if method == "unweighted":
+        total_accuracy = scores[0][0]
+        for accuracy, _ in scores[1:]:
+            total_accuracy = total_accuracy + accuracy
+        return total_accuracy / len(scores), total_count
+
+    total_accuracy = scores[0][0] * scores[0][1]
+    for accuracy, count in scores[1:]:
+        total_accuracy = total_accuracy + accuracy * count
+    weighted_accuracy = np.divide(
+        total_accuracy,
+        total_count,
+        out=np.zeros_like(total_accuracy),
+        where=total_count != 0,
+    )
+    return weighted_accuracy, total_count
+
+
+def compute_leaderboard_scores(leaderboard_table, model_names):
+    """
+    Returns the accuracy of every category and summary in `LEADERBOARD_SUMMARIES`, as arrays aligned with `model_names`.
+    """
+    scores = {}
+    for category in LEADERBOARD_CATEGORIES:
+        category_results = [
+            leaderboard_table[model_name].get(category, {"accuracy": 0, "total_count": 0})
+            for model_name in model_names
+        ]
+        scores[category] = (
+            np.array([result["accuracy"] for result in category_results], dtype=float),
+            np.array([result["total_count"] for result in category_results], dtype=float),
+        )
+    for summary, (method, averaged) in LEADERBOARD_SUMMARIES.items():
+        scores[summary] = _average_scores(method, [scores[name] for name in averaged])
+    return {name: accuracy for name, (accuracy, _) in scores.items()}
+
+
+def write_leaderboard_parquet(filepath, columns, rows):
+    # Parquet output is optional, so that pyarrow is not a required dependency
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return False
+
+    table = {}
+    for j, column in enumerate(columns):
+        values = [row[j] for row in rows]
+        # Accuracy, cost and latency columns are stored as numbers, with "N/A" as null
+        if j == 1 or j >= 6:
+            values = [None if value == "N/A" else float(value) for value in values]
+        table[column] = values
+    pq.write_table(pa.table(table), filepath)
+    return True
+
+
 def generate_leaderboard_csv(
     leaderboard_table, output_path, eval_models=None, eval_categories=None
 ):
     print("📈 Aggregating data to generate leaderboard score table...")
-    data_non_live = []
-    data_live = []
-    data_combined = []
-    for model_name, value in leaderboard_table.items():
-        model_name_escaped = model_name.replace("_", "/")
-        
+    model_names = list(leaderboard_table.keys())
+    scores = compute_leaderboard_scores(leaderboard_table, model_names)
+
+    cost_latency = []
+    for model_name in model_names:
+        value = leaderboard_table[model_name]
         cost_data = value.get("cost", {"input_data": [], "output_data": []})
         latency_data = value.get("latency", {"data": []})
-        cost, latency_mean, latency_std, percentile_95_latency = get_cost_letency_info(
-            model_name_escaped, cost_data, latency_data
-        )
-        
-        # Non-Live Score
-        python_simple_ast_non_live = value.get("simple", {"accuracy": 0, "total_count": 0})
-        python_multiple_ast_non_live = value.get(
-            "multiple", {"accuracy": 0, "total_count": 0}
-        )
-        python_parallel_ast_non_live = value.get(
-            "parallel", {"accuracy": 0, "total_count": 0}
-        )
-        python_parallel_multiple_ast_non_live = value.get(
-            "parallel_multiple", {"accuracy": 0, "total_count": 0}
-        )
-        python_simple_exec_non_live = value.get(
-            "exec_simple", {"accuracy": 0, "total_count": 0}
-        )
-        python_multiple_exec_non_live = value.get(
-            "exec_multiple", {"accuracy": 0, "total_count": 0}
-        )
-        python_parallel_exec_non_live = value.get(
-            "exec_parallel", {"accuracy": 0, "total_count": 0}
-        )
-        python_parallel_multiple_exec_non_live = value.get(
-            "exec_parallel_multiple", {"accuracy": 0, "total_count": 0}
-        )
-        java_simple_ast_non_live = value.get("java", {"accuracy": 0, "total_count": 0})
-        javascript_simple_ast_non_live = value.get(
-            "javascript", {"accuracy": 0, "total_count": 0}
+        cost_latency.append(
+            list(
+                get_cost_letency_info(
+                    model_name.replace("_", "/"), cost_data, latency_data
+                )
+            )
         )
-        rest_simple_exec_non_live = value.get("rest", {"accuracy": 0, "total_count": 0})
-        irrelevance_non_live = value.get("irrelevance", {"accuracy": 0, "total_count": 0})
 
-        simple_ast_non_live = calculate_unweighted_accuracy(
-            [python_simple_ast_non_live, java_simple_ast_non_live, javascript_simple_ast_non_live]
-        )
-        multiple_ast_non_live = python_multiple_ast_non_live
-        parallel_ast_non_live = python_parallel_ast_non_live
-        parallel_multiple_ast_non_live = python_parallel_multiple_ast_non_live
-        simple_exec_non_live = calculate_unweighted_accuracy(
-            [python_simple_exec_non_live, rest_simple_exec_non_live]
-        )
-        multiple_exec_non_live = python_multiple_exec_non_live
-        parallel_exec_non_live = python_parallel_exec_non_live
-        parallel_multiple_exec_non_live = python_parallel_multiple_exec_non_live
+    parquet_written = True
+    for file_name, columns, score_names in LEADERBOARD_TABLES:
+        data = []
+        for j, model_name in enumerate(model_names):
+            model_name_escaped = model_name.replace("_", "/")
+            row_scores = [float(scores[score_name][j]) for score_name in score_names]
+            data.append(
+                ["N/A", row_scores[0]]
+                + MODEL_METADATA_MAPPING[model_name_escaped][:4]
+                + row_scores[1:]
+                + cost_latency[j]
+            )
 
-        summary_ast_non_live = calculate_unweighted_accuracy(
-            [simple_ast_non_live, multiple_ast_non_live, parallel_ast_non_live, parallel_multiple_ast_non_live]
-        )
-        summary_exec_non_live = calculate_unweighted_accuracy(
-            [simple_exec_non_live, multiple_exec_non_live, parallel_exec_non_live, parallel_multiple_exec_non_live]
-        )
-        overall_accuracy_non_live = calculate_unweighted_accuracy(
-            [
-                simple_ast_non_live,
-                multiple_ast_non_live,
-                parallel_ast_non_live,
-                parallel_multiple_ast_non_live,
-                simple_exec_non_live,
-                multiple_exec_non_live,
-                parallel_exec_non_live,
-                parallel_multiple_exec_non_live,
-                irrelevance_non_live,
-            ]
+        # Ranked by overall accuracy; models with the same accuracy keep their order
+        data.sort(key=lambda x: x[1], reverse=True)
+        for i in range(len(data)):
+            data[i][0] = i + 1
+        parquet_written = (
+            write_leaderboard_parquet(
+                os.path.join(output_path, f"{file_name}.parquet"), columns, data
+            )
+            and parquet_written
         )
 
-        data_non_live.append(
-            [
-                "N/A",
-                overall_accuracy_non_live["accuracy"],
-                MODEL_METADATA_MAPPING[model_name_escaped][0],
-                MODEL_METADATA_MAPPING[model_name_escaped][1],
-                MODEL_METADATA_MAPPING[model_name_escaped][2],
-                MODEL_METADATA_MAPPING[model_name_escaped][3],
-                summary_ast_non_live["accuracy"],
-                summary_exec_non_live["accuracy"],
-                simple_ast_non_live["accuracy"],
-                python_simple_ast_non_live["accuracy"],
-                java_simple_ast_non_live["accuracy"],
-                javascript_simple_ast_non_live["accuracy"],
-                multiple_ast_non_live["accuracy"],
-                parallel_ast_non_live["accuracy"],
-                parallel_multiple_ast_non_live["accuracy"],
-                simple_exec_non_live["accuracy"],
-                python_simple_exec_non_live["accuracy"],
-                rest_simple_exec_non_live["accuracy"],
-                multiple_exec_non_live["accuracy"],
-                parallel_exec_non_live["accuracy"],
-                parallel_multiple_exec_non_live["accuracy"],
-                irrelevance_non_live["accuracy"],
-                cost,
-                latency_mean,
-                latency_std,
-                percentile_95_latency,
-            ]
-        )
-        
-        # Live Score
-        python_simple_ast_live = value.get(
-            "live_simple", {"accuracy": 0, "total_count": 0}
-        )
-        python_multiple_ast_live = value.get(
-            "live_multiple", {"accuracy": 0, "total_count": 0}
-        )
-        python_parallel_ast_live = value.get(
-            "live_parallel", {"accuracy": 0, "total_count": 0}
-        )
-        python_parallel_multiple_ast_live = value.get(
-            "live_parallel_multiple", {"accuracy": 0, "total_count": 0}
-        )
-        irrelevance_live = value.get(
-            "live_irrelevance", {"accuracy": 0, "total_count": 0}
-        )
-        relevance_live = value.get("live_relevance", {"accuracy": 0, "total_count": 0})
-        summary_ast_live = calculate_weighted_accuracy(
-            [
-                python_simple_ast_live,
-                python_multiple_ast_live,
-                python_parallel_ast_live,
-                python_parallel_multiple_ast_live,
-            ]
-        )
+        for i in range(len(data)):
+            data[i][0] = str(i + 1)
+            data[i][1] = "{:.2f}%".format(data[i][1] * 100)
+            for j in range(6, len(data[i]) - 4):
+                data[i][j] = "{:.2f}%".format(data[i][j] * 100)
+            for j in range(len(data[i]) - 4, len(data[i])):
+                data[i][j] = str(data[i][j])
 
-        overall_accuracy_live = calculate_weighted_accuracy(
-            [
-                python_simple_ast_live,
-                python_multiple_ast_live,
-                python_parallel_ast_live,
-                python_parallel_multiple_ast_live,
-                irrelevance_live,
-                relevance_live,
-            ]
-        )
-        
-
-        data_live.append(
-            [
-                "N/A",
-                overall_accuracy_live["accuracy"],
-                MODEL_METADATA_MAPPING[model_name_escaped][0],
-                MODEL_METADATA_MAPPING[model_name_escaped][1],
-                MODEL_METADATA_MAPPING[model_name_escaped][2],
-                MODEL_METADATA_MAPPING[model_name_escaped][3],
-                summary_ast_live["accuracy"],
-                python_simple_ast_live["accuracy"],
-                python_multiple_ast_live["accuracy"],
-                python_parallel_ast_live["accuracy"],
-                python_parallel_multiple_ast_live["accuracy"],
-                irrelevance_live["accuracy"],
-                relevance_live["accuracy"],
-                cost,
-                latency_mean,
-                latency_std,
-                percentile_95_latency,
-            ]
-        )
-        
-        # Total Score
-        total_simple_ast = calculate_unweighted_accuracy(
-            [simple_ast_non_live, python_simple_ast_live]
-        )
-        total_multiple_ast = calculate_unweighted_accuracy(
-            [multiple_ast_non_live, python_multiple_ast_live]
-        )
-        total_parallel_ast = calculate_unweighted_accuracy(
-            [parallel_ast_non_live, python_parallel_ast_live]
-        )
-        total_parallel_multiple_ast = calculate_unweighted_accuracy(
-            [parallel_multiple_ast_non_live, python_parallel_multiple_ast_live]
-        )
-        total_simple_exec = simple_exec_non_live
-        total_multiple_exec = multiple_exec_non_live
-        total_parallel_exec = parallel_exec_non_live
-        total_parallel_multiple_exec = parallel_multiple_exec_non_live
-        total_irrelevance = calculate_unweighted_accuracy([irrelevance_non_live, irrelevance_live])
-        total_relevance = relevance_live
-        
-        total_summary_ast = calculate_unweighted_accuracy(
-            [total_simple_ast, total_multiple_ast, total_parallel_ast, total_parallel_multiple_ast]
-        )
-        total_summary_exec = calculate_unweighted_accuracy(
-            [total_simple_exec, total_multiple_exec, total_parallel_exec, total_parallel_multiple_exec]
-        )
-        total_overall_accuracy = calculate_unweighted_accuracy(
-            [
-                total_simple_ast,
-                total_multiple_ast,
-                total_parallel_ast,
-                total_parallel_multiple_ast,
-                total_simple_exec,
-                total_multiple_exec,
-                total_parallel_exec,
-                total_parallel_multiple_exec,
-                total_irrelevance,
-                total_relevance,
-            ]
-        )
+        data.insert(0, columns)
+
+        filepath = os.path.join(output_path, f"{file_name}.csv")
+        with open(filepath, "w") as f:
+            f.write("\n".join(",".join(row) for row in data))
+
+    if not parquet_written:
+        print("pyarrow is not installed, so the leaderboard tables were only written as CSV.")
 
-        data_combined.append(
-            [
-                "N/A",
-                total_overall_accuracy["accuracy"],
-                MODEL_METADATA_MAPPING[model_name_escaped][0],
-                MODEL_METADATA_MAPPING[model_name_escaped][1],
-                MODEL_METADATA_MAPPING[model_name_escaped][2],
-                MODEL_METADATA_MAPPING[model_name_escaped][3],
-                total_summary_ast["accuracy"],
-                total_summary_exec["accuracy"],
-                total_simple_ast["accuracy"],
-                total_multiple_ast["accuracy"],
-                total_parallel_ast["accuracy"],
-                total_parallel_multiple_ast["accuracy"],
-                total_simple_exec["accuracy"],
-                total_multiple_exec["accuracy"],
-                total_parallel_exec["accuracy"],
-                total_parallel_multiple_exec["accuracy"],
-                total_irrelevance["accuracy"],
-                total_relevance["accuracy"],
-                cost,
-                latency_mean,
-                latency_std,
-                percentile_95_latency,
-            ]
-        )
-        
-    # Write V1 Score File
-    data_non_live.sort(key=lambda x: x[1], reverse=True)
-    for i in range(len(data_non_live)):
-        data_non_live[i][0] = str(i + 1)
-        data_non_live[i][1] = "{:.2f}%".format(data_non_live[i][1] * 100)
-        for j in range(6, len(data_non_live[i]) - 4):
-            data_non_live[i][j] = "{:.2f}%".format(data_non_live[i][j] * 100)
-        for j in range(len(data_non_live[i]) - 4, len(data_non_live[i])):
-            data_non_live[i][j] = str(data_non_live[i][j])
-
-    data_non_live.insert(0, COLUMNS_NON_LIVE)
-
-    filepath = os.path.join(output_path, "data_non_live.csv")
-    with open(filepath, "w") as f:
-        for i, row in enumerate(data_non_live):
-            if i < len(data_non_live) - 1:
-                f.write(",".join(row) + "\n")
-            else:
-                f.write(",".join(row))
-    
-    # Write V2 Score File
-    data_live.sort(key=lambda x: x[1], reverse=True)
-    for i in range(len(data_live)):
-        data_live[i][0] = str(i + 1)
-        data_live[i][1] = "{:.2f}%".format(data_live[i][1] * 100)
-        for j in range(6, len(data_live[i]) - 4):
-            data_live[i][j] = "{:.2f}%".format(data_live[i][j] * 100)
-        for j in range(len(data_live[i]) - 4, len(data_live[i])):
-            data_live[i][j] = str(data_live[i][j])
-
-    data_live.insert(0, COLUMNS_LIVE)
-
-    filepath = os.path.join(output_path, "data_live.csv")
-    with open(filepath, "w") as f:
-        for i, row in enumerate(data_live):
-            if i < len(data_live) - 1:
-                f.write(",".join(row) + "\n")
-            else:
-                f.write(",".join(row))
-
-    # Write Total Score File
-    data_combined.sort(key=lambda x: x[1], reverse=True)
-    for i in range(len(data_combined)):
-        data_combined[i][0] = str(i + 1)
-        data_combined[i][1] = "{:.2f}%".format(data_combined[i][1] * 100)
-        for j in range(6, len(data_combined[i]) - 4):
-            data_combined[i][j] = "{:.2f}%".format(data_combined[i][j] * 100)
-        for j in range(len(data_combined[i]) - 4, len(data_combined[i])):
-            data_combined[i][j] = str(data_combined[i][j])
-
-    data_combined.insert(0, COLUMNS_COMBINED)
-
-    filepath = os.path.join(output_path, "data_combined.csv")
-    with open(filepath, "w") as f:
-        for i, row in enumerate(data_combined):
-            if i < len(data_combined) - 1:
-                f.write(",".join(row) + "\n")
-            else:
-                f.write(",".join(row))
-                
     # Check if all categories are present and evaluated for all models
     if eval_models:
         category_status = check_model_category_status(score_path=output_path)
@@ -1462,7 +1452,7 @@ def update_leaderboard_table_with_score_file(leaderboard_table, score_path):
         model_name = subdir.split(score_path)[1]
         # Find and process all JSON files in the subdirectory
         for model_score_json in glob.glob(json_files_pattern):
-            metadata = load_file(model_score_json)[0]
+            metadata = load_score_header(model_score_json)
             accuracy, total_count = metadata["accuracy"], metadata["total_count"]
             test_category = extract_test_category(model_score_json)
             if model_name not in leaderboard_table:
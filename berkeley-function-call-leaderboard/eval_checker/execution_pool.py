@@ -0,0 +1,251 @@
+import ast
+import copy
+import multiprocessing
+import queue
+import threading
+import time
+
+from custom_exception import NoAPIKeyError
+from http_cassette import get_http_mode, set_http_mode
+
+# A call that has not returned after this many seconds is reported as an execution error, and its worker is replaced.
+EXECUTION_TIMEOUT = 60
+
+# Functions in `executable_python_function.py` whose result only depends on their arguments.
+# Their results are computed once per process and shared by the ground truth and every model's outputs.
+# The others call external APIs, and are executed every time.
+DETERMINISTIC_FUNCTIONS = [
+    "calculate_triangle_area",
+    "get_distance",
+    "math_factorial",
+    "quadratic_roots",
+    "geometry_area_circle",
+    "get_prime_factors",
+    "math_gcd",
+    "math_lcm",
+    "calculate_final_velocity",
+    "calculate_displacement",
+    "calculate_electrostatic_potential_energy",
+    "calculate_density",
+    "mat_mul",
+    "calculate_mean",
+    "calculate_standard_deviation",
+    "calc_binomial_probability",
+    "calculate_permutations",
+    "get_fibonacci_sequence",
+    "get_fibonacci_number",
+    "estimate_derivative",
+    "calculate_cosine_similarity",
+    "mortgage_calculator",
+    "calculate_future_value",
+    "sort_array",
+    "linear_regression",
+    "add_binary_numbers",
+    "maxPoints",
+    "calculate_investment_value",
+    "calculate_nutritional_needs",
+    "book_room",
+    "order_food",
+    "polygon_area",
+]
+
+
+def parse_function_call(function_call):
+    """
+    Parses a call like `math_factorial(n=5)` into (name, args, kwargs).
+
+    Returns None if the call is not a plain function name applied to literal arguments; such calls are executed as code instead.
+    """
+    try:
+        call = ast.parse(function_call.strip(), mode="eval").body
+    except (SyntaxError, ValueError):
+        return None
+    if not isinstance(call, ast.Call) or not isinstance(call.func, ast.Name):
+        return None
+    if any(keyword.arg is None for keyword in call.keywords):
+        return None
+    try:
+        args = [ast.literal_eval(arg) for arg in call.args]
+        kwargs = {
+            keyword.arg: ast.literal_eval(keyword.value) for keyword in call.keywords
+        }
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return None
+    return call.func.id, args, kwargs
+
+
+def _worker_main(conn, http_mode, cassette_path):
+    set_http_mode(http_mode, cassette_path)
+    if http_mode == "replay":
+        # The sleeps in `executable_python_function` only pace live requests. This process does nothing but run those functions.
+        time.sleep = lambda seconds: None
+
+    # Imported once per worker, rather than once per call
+    try:
+        import executable_python_function
+
+        namespace = {
+            name: value
+            for name, value in vars(executable_python_function).items()
+            if not name.startswith("_")
+        }
+        import_error = None
+    except NoAPIKeyError:
+        namespace = None
+        import_error = "no_api_key"
+    except Exception as e:
+        namespace = None
+        import_error = str(e)
+
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+
+        # Any call made with missing API keys fails the same way as the import did
+        if import_error == "no_api_key":
+            conn.send(("no_api_key", None))
+            continue
+        if import_error is not None:
+            conn.send(("error", import_error))
+            continue
+
+        function_call, parsed = task
+        try:
+            if parsed is not None and callable(namespace.get(parsed[0])):
+                name, args, kwargs = parsed
+                result = namespace[name](*args, **kwargs)
+            else:
+                # Same as `from executable_python_function import *` followed by `result=<call>`
+                exec_dict = dict(namespace)
+                exec("result=" + function_call, exec_dict)
+                result = exec_dict["result"]
+            response = ("ok", result)
+        except Exception as e:
+            response = ("error", str(e))
+
+        try:
+            conn.send(response)
+        except Exception as e:
+            # The result could not be pickled
+            conn.send(("error", str(e)))
+
+
+class ExecutionPool:
+    """
+    Pool of worker processes that execute the function calls of the executable test categories.
+
+    Each worker imports `executable_python_function` once when it starts, and then runs calls sent to it, so that a call
+    that hangs or crashes only costs its worker. Results of the functions in `DETERMINISTIC_FUNCTIONS` are cached by call.
+    """
+
+    def __init__(self, num_workers):
+        self.num_workers = num_workers
+        self.num_started = 0
+        self.idle_workers = queue.Queue()
+        self.lock = threading.Lock()
+        self.results = {}
+
+    def _start_worker(self):
+        parent_conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=_worker_main, args=(child_conn, *get_http_mode()), daemon=True
+        )
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _checkout_worker(self):
+        with self.lock:
+            start_worker = (
+                self.idle_workers.empty() and self.num_started < self.num_workers
+            )
+            if start_worker:
+                self.num_started += 1
+        if start_worker:
+            return self._start_worker()
+        return self.idle_workers.get()
+
+    def _run(self, function_call, parsed):
+        process, conn = self._checkout_worker()
+        try:
+            conn.send((function_call, parsed))
+            if conn.poll(EXECUTION_TIMEOUT):
+                response = conn.recv()
+                self.idle_workers.put((process, conn))
+                return response
+            message = f"Execution timed out after {EXECUTION_TIMEOUT} seconds."
+        except (EOFError, OSError):
+            message = "The execution worker exited unexpectedly."
+
+        process.kill()
+        process.join()
+        conn.close()
+        with self.lock:
+            self.num_started -= 1
+        return "error", message
+
+    def execute(self, function_call):
+        """
+        Executes one function call, as written by the model or in the ground truth.
+
+        Returns (True, result) if the call returned, or (False, error message) if it raised or timed out.
+        """
+        parsed = parse_function_call(function_call)
+        cache_key = None
+        if parsed is not None and parsed[0] in DETERMINISTIC_FUNCTIONS:
+            name, args, kwargs = parsed
+            cache_key = (name, repr(args), repr(sorted(kwargs.items())))
+            with self.lock:
+                if cache_key in self.results:
+                    return copy.deepcopy(self.results[cache_key])
+
+        status, value = self._run(function_call, parsed)
+        if status == "no_api_key":
+            raise NoAPIKeyError()
+        result = (status == "ok", value)
+
+        if cache_key is not None:
+            with self.lock:
+                self.results[cache_key] = copy.deepcopy(result)
+        return result
+
+    def close(self):
+        with self.lock:
+            self.num_started = 0
+        while not self.idle_workers.empty():
+            process, conn = self.idle_workers.get()
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            process.join(timeout=5)
+            if process.is_alive():
+                process.kill()
+            conn.close()
+
+
+_EXECUTION_POOL = {"pool": None, "num_workers": 1}
+_EXECUTION_POOL_LOCK = threading.Lock()
+
+
+def set_execution_pool_size(num_workers):
+    # Must be called before the pool is first used
+    _EXECUTION_POOL["num_workers"] = num_workers
+
+
+def get_execution_pool():
+    with _EXECUTION_POOL_LOCK:
+        if _EXECUTION_POOL["pool"] is None:
+            _EXECUTION_POOL["pool"] = ExecutionPool(_EXECUTION_POOL["num_workers"])
+        return _EXECUTION_POOL["pool"]
+
+
+def close_execution_pool():
+    with _EXECUTION_POOL_LOCK:
+        if _EXECUTION_POOL["pool"] is not None:
+            _EXECUTION_POOL["pool"].close()
+            _EXECUTION_POOL["pool"] = None
@@ -0,0 +1,97 @@
+import copy
+import json
+import os
+import sqlite3
+import time
+
+from execution_pool import get_execution_pool
+from http_cassette import get_http_mode
+
+# Bump this when `executable_python_function.py` changes in a way that affects its results, so that cached outputs are recomputed.
+EXPECTED_OUTPUT_CACHE_VERSION = 1
+# Expected outputs of calls checked by these result types never go stale. The others (`real_time_match`, `structural_match`)
+# come from live APIs, and are recomputed once they are older than the TTL.
+NO_TTL_RESULT_TYPES = ["exact_match"]
+DEFAULT_EXPECTED_OUTPUT_TTL = 3600
+
+
+def _get_source(result_type):
+    # Live and replayed API responses differ, so outputs that depend on them are cached separately
+    if result_type in NO_TTL_RESULT_TYPES:
+        return "static"
+    http_mode, cassette_path = get_http_mode()
+    if http_mode == "replay":
+        return f"replay:{os.path.abspath(cassette_path)}"
+    return "live"
+
+
+class ExpectedOutputCache:
+    """
+    Execution results of the ground-truth calls of the executable test categories, cached in a SQLite file keyed by call.
+
+    Each output is computed (or read from the file) at most once per run, and then served from memory.
+    """
+
+    def __init__(self, path, ttl):
+        self.path = path
+        self.ttl = ttl
+        self.results = {}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Several evaluators may share the file
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS expected_outputs (
+                version INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                call TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (version, source, call)
+            )
+            """
+        )
+        self.conn.execute(
+            "DELETE FROM expected_outputs WHERE version != ?",
+            (EXPECTED_OUTPUT_CACHE_VERSION,),
+        )
+        self.conn.commit()
+
+    def _load(self, source, call):
+        row = self.conn.execute(
+            "SELECT result, created_at FROM expected_outputs WHERE version = ? AND source = ? AND call = ?",
+            (EXPECTED_OUTPUT_CACHE_VERSION, source, call),
+        ).fetchone()
+        if row is None:
+            return None
+        result, created_at = row
+        if source != "static" and time.time() - created_at > self.ttl:
+            return None
+        return result
+
+    def get_expected_output(self, call, result_type):
+        source = _get_source(result_type)
+        if (source, call) not in self.results:
+            result = self._load(source, call)
+            if result is None:
+                success, output = get_execution_pool().execute(call)
+                if not success:
+                    raise RuntimeError(
+                        f"Error in executing ground truth: {repr(call)}. Error: {output}"
+                    )
+                # Stored as JSON, the way the expected outputs used to be written into the prompt files, so tuples become lists
+                result = json.dumps(output)
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO expected_outputs VALUES (?, ?, ?, ?, ?)",
+                    (EXPECTED_OUTPUT_CACHE_VERSION, source, call, result, time.time()),
+                )
+                self.conn.commit()
+            self.results[(source, call)] = json.loads(result)
+        return copy.deepcopy(self.results[(source, call)])
+
+    def close(self):
+        self.conn.close()
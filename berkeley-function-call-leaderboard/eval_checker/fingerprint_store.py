@@ -0,0 +1,113 @@
+import hashlib
+import json
+import os
+import sys
+
+# Bump this when the store format changes, so that old stores are ignored instead of misread.
+FINGERPRINT_STORE_VERSION = 1
+
+_CHECKER_DIR = os.path.dirname(os.path.abspath(__file__))
+# Source files whose code decides the verdict of an AST or relevance entry. The handler's own files are added per model.
+CHECKER_SOURCE_FILES = [
+    os.path.join(_CHECKER_DIR, "checker.py"),
+    os.path.join(_CHECKER_DIR, "eval_runner.py"),
+    os.path.join(_CHECKER_DIR, "eval_checker_constant.py"),
+    os.path.join(_CHECKER_DIR, "possible_answer_index.py"),
+    os.path.join(_CHECKER_DIR, "java_type_converter.py"),
+    os.path.join(_CHECKER_DIR, "js_type_converter.py"),
+    os.path.join(_CHECKER_DIR, "..", "model_handler", "constant.py"),
+    os.path.join(_CHECKER_DIR, "..", "model_handler", "utils.py"),
+    os.path.join(_CHECKER_DIR, "..", "model_handler", "java_parser.py"),
+    os.path.join(_CHECKER_DIR, "..", "model_handler", "js_parser.py"),
+    os.path.join(_CHECKER_DIR, "..", "model_handler", "tree_sitter_pool.py"),
+    os.path.join(_CHECKER_DIR, "..", "model_handler", "call_decoder.py"),
+]
+
+# Checker versions computed in this process, by handler class
+_CHECKER_VERSIONS = {}
+
+
+def get_checker_version(handler):
+    """
+    Hash of the source of the checker and of the model's handler (whose `decode_ast` the checker relies on).
+
+    Any change to that code gives a new version, which invalidates every stored verdict.
+    """
+    handler_class = type(handler)
+    if handler_class not in _CHECKER_VERSIONS:
+        source_files = list(CHECKER_SOURCE_FILES)
+        for cls in handler_class.__mro__:
+            module_file = getattr(sys.modules.get(cls.__module__), "__file__", None)
+            if module_file is not None and module_file not in source_files:
+                source_files.append(module_file)
+
+        hasher = hashlib.sha256(str(FINGERPRINT_STORE_VERSION).encode("utf-8"))
+        for source_file in source_files:
+            hasher.update(os.path.basename(source_file).encode("utf-8"))
+            if os.path.exists(source_file):
+                with open(source_file, "rb") as f:
+                    hasher.update(f.read())
+        _CHECKER_VERSIONS[handler_class] = hasher.hexdigest()
+    return _CHECKER_VERSIONS[handler_class]
+
+
+def get_entry_fingerprints(
+    checker_version, model_result, prompt, possible_answer, test_category, model_name
+):
+    # `possible_answer` is None for relevance and irrelevance tests
+    fingerprints = []
+    for i in range(len(model_result)):
+        entry = [
+            checker_version,
+            model_name,
+            test_category,
+            model_result[i]["result"],
+            prompt[i],
+            possible_answer[i] if possible_answer is not None else None,
+        ]
+        fingerprints.append(
+            hashlib.sha256(
+                json.dumps(entry, sort_keys=True).encode("utf-8")
+            ).hexdigest()
+        )
+    return fingerprints
+
+
+def _get_store_path(store_dir, model_name, test_category):
+    return os.path.join(store_dir, model_name, f"{test_category}.json")
+
+
+def load_fingerprint_store(store_dir, model_name, test_category):
+    """
+    Returns the fingerprints and verdicts stored for a result file by the last run, as two lists aligned by entry index
+    (a verdict is None for a passing entry, or its error record). Both are empty if nothing usable was stored.
+    """
+    store_path = _get_store_path(store_dir, model_name, test_category)
+    try:
+        with open(store_path) as f:
+            store = json.load(f)
+        if store["version"] == FINGERPRINT_STORE_VERSION:
+            return store["fingerprints"], store["verdicts"]
+    except (OSError, json.JSONDecodeError, KeyError, TypeError):
+        # A missing or corrupt store means every entry is scored again
+        pass
+    return [], []
+
+
+def save_fingerprint_store(store_dir, model_name, test_category, fingerprints, verdicts):
+    store_path = _get_store_path(store_dir, model_name, test_category)
+    store = {
+        "version": FINGERPRINT_STORE_VERSION,
+        "fingerprints": fingerprints,
+        "verdicts": verdicts,
+    }
+    try:
+        os.makedirs(os.path.dirname(store_path), exist_ok=True)
+        temp_store_path = store_path + ".tmp"
+        with open(temp_store_path, "w") as f:
+            # `json.dumps` encodes in C, unlike `json.dump`, which streams through the pure Python encoder
+            f.write(json.dumps(store))
+        os.replace(temp_store_path, store_path)
+    except OSError:
+        # The store is only an optimization; a read-only checkout should not stop the evaluation
+        pass
@@ -0,0 +1,161 @@
+import base64
+import hashlib
+import json
+import os
+from urllib.parse import parse_qsl, urlsplit, urlunsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+HTTP_MODES = ["live", "record", "replay"]
+DEFAULT_CASSETTE_PATH = "../.cache/http_cassettes/"
+# API keys are filled in from this file; their values are masked in cassettes, so recordings can be replayed with any keys.
+CREDENTIAL_CONFIG_PATH = "../function_credential_config.json"
+REDACTED = "<REDACTED>"
+
+_HTTP_TRANSPORT = {"mode": "live", "cassette_path": DEFAULT_CASSETTE_PATH}
+_ORIGINAL_REQUEST = requests.sessions.Session.request
+_CREDENTIALS = []
+
+
+def _load_credentials():
+    if not _CREDENTIALS:
+        try:
+            with open(CREDENTIAL_CONFIG_PATH) as f:
+                for item in json.load(f):
+                    _CREDENTIALS.extend(value for value in item.values() if value)
+        except (OSError, json.JSONDecodeError, AttributeError):
+            pass
+        # Longest first, so that a key containing another one is masked as a whole
+        _CREDENTIALS.sort(key=len, reverse=True)
+    return _CREDENTIALS
+
+
+def redact(text):
+    for credential in _load_credentials():
+        text = text.replace(credential, REDACTED)
+    return text
+
+
+def _normalize_pairs(pairs):
+    # requests drops parameters whose value is None, and sends each item of a list value as its own parameter
+    normalized = []
+    for key, value in pairs:
+        values = value if isinstance(value, (list, tuple)) else [value]
+        normalized.extend((str(key), str(item)) for item in values if item is not None)
+    return sorted(normalized)
+
+
+def _to_pairs(data):
+    if data is None:
+        return []
+    if isinstance(data, dict):
+        return list(data.items())
+    return list(data)
+
+
+def get_request_key(method, url, params=None, data=None, json_body=None):
+    """
+    Returns (key, request) for one HTTP request: the cassette key, and the redacted request it stands for.
+
+    Query parameters in the URL and in `params` are merged and sorted, so the key does not depend on how the call was written.
+    Headers are not part of the key: the ones used by the executable functions only carry API keys.
+    """
+    scheme, netloc, path, query, _ = urlsplit(url)
+    query_params = _normalize_pairs(
+        parse_qsl(query, keep_blank_values=True) + _to_pairs(params)
+    )
+    if isinstance(data, (dict, list, tuple)):
+        body = _normalize_pairs(_to_pairs(data))
+    elif isinstance(data, bytes):
+        body = data.decode("utf-8", errors="replace")
+    else:
+        body = data
+    request = {
+        "method": method.upper(),
+        "url": redact(urlunsplit((scheme.lower(), netloc.lower(), path, "", ""))),
+        "params": [[key, redact(value)] for key, value in query_params],
+        "data": json.loads(redact(json.dumps(body))),
+        "json": json.loads(redact(json.dumps(json_body, sort_keys=True))),
+    }
+    key = hashlib.sha256(
+        json.dumps(request, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+    return key, request
+
+
+def _save_response(cassette_file, request, response):
+    try:
+        content = {"text": redact(response.content.decode("utf-8"))}
+    except UnicodeDecodeError:
+        content = {"content_base64": base64.b64encode(response.content).decode("ascii")}
+    recording = {
+        "request": request,
+        "status_code": response.status_code,
+        "reason": response.reason,
+        "headers": {key: redact(value) for key, value in response.headers.items()},
+        "encoding": response.encoding,
+        **content,
+    }
+    os.makedirs(os.path.dirname(cassette_file), exist_ok=True)
+    # Workers record concurrently, so each recording is written to a temporary file and then moved into place
+    temp_cassette_file = f"{cassette_file}.{os.getpid()}.tmp"
+    with open(temp_cassette_file, "w") as f:
+        json.dump(recording, f, indent=4)
+    os.replace(temp_cassette_file, cassette_file)
+
+
+def _load_response(cassette_file, url):
+    with open(cassette_file) as f:
+        recording = json.load(f)
+    response = requests.models.Response()
+    response.status_code = recording["status_code"]
+    response.reason = recording["reason"]
+    response.headers = CaseInsensitiveDict(recording["headers"])
+    response.encoding = recording["encoding"]
+    response.url = url
+    if "text" in recording:
+        response._content = recording["text"].encode("utf-8")
+    else:
+        response._content = base64.b64decode(recording["content_base64"])
+    return response
+
+
+def _request(session, method, url, params=None, data=None, json=None, **kwargs):
+    mode = _HTTP_TRANSPORT["mode"]
+    if mode == "live":
+        return _ORIGINAL_REQUEST(
+            session, method, url, params=params, data=data, json=json, **kwargs
+        )
+
+    key, request = get_request_key(method, url, params, data, json)
+    cassette_file = os.path.join(_HTTP_TRANSPORT["cassette_path"], f"{key}.json")
+
+    if mode == "replay":
+        if not os.path.exists(cassette_file):
+            raise requests.exceptions.ConnectionError(
+                f"No recorded response for {request['method']} {request['url']} with params {request['params']}. Run with `--http-mode record` to record it."
+            )
+        return _load_response(cassette_file, url)
+
+    response = _ORIGINAL_REQUEST(
+        session, method, url, params=params, data=data, json=json, **kwargs
+    )
+    _save_response(cassette_file, request, response)
+    return response
+
+
+def set_http_mode(mode, cassette_path=DEFAULT_CASSETTE_PATH):
+    """
+    Routes every request made through `requests` in this process according to `mode`:
+        - `live`: send it, as usual.
+        - `record`: send it, and save the response in `cassette_path`.
+        - `replay`: answer it from `cassette_path` without touching the network; a request that was never recorded raises `ConnectionError`.
+    """
+    _HTTP_TRANSPORT["mode"] = mode
+    _HTTP_TRANSPORT["cassette_path"] = cassette_path
+    requests.sessions.Session.request = _request if mode != "live" else _ORIGINAL_REQUEST
+
+
+def get_http_mode():
+    return _HTTP_TRANSPORT["mode"], _HTTP_TRANSPORT["cassette_path"]
@@ -0,0 +1,188 @@
+import hashlib
+import os
+import pickle
+import re
+
+from checker import (
+    JAVA_TYPE_CONVERSION,
+    JS_TYPE_CONVERSION,
+    PYTHON_NESTED_TYPE_CHECK_LIST,
+    PYTHON_TYPE_MAPPING,
+    find_description,
+    get_possible_answer_type,
+    make_hashable,
+    standardize_dict_answer_values,
+    standardize_list_answers,
+    standardize_string,
+)
+
+# Bump this when the compiled format or the way answers are standardized changes, so that cached indexes are rebuilt.
+INDEX_VERSION = 1
+
+# Indexes built in this process, by (possible answer file, prompt file, language)
+_INDEXES = {}
+
+
+#### Compilation ####
+# The index has one entry per line of the possible answer file, shaped like its "ground_truth":
+#   [{func_name: {param: compiled_param}}, ...]
+# `compiled_param` holds the same answers as the ground truth, pre-standardized and in hashable form, so that the checkers
+# in `checker.py` can skip the per-entry regex work and do set lookups. An entry is None if it could not be compiled;
+# the checkers then fall back to working from the raw ground truth.
+
+
+def _build_answer_set(answers):
+    # None if any of the answers cannot be made hashable; the checker then scans the list instead
+    try:
+        return frozenset(make_hashable(answer) for answer in answers)
+    except TypeError:
+        return None
+
+
+def _compile_dict_answer(possible_answer):
+    if type(possible_answer) != dict:
+        return None
+    compiled = {}
+    try:
+        for key, values in possible_answer.items():
+            standardized = standardize_dict_answer_values(values)
+            compiled[key] = (standardized, _build_answer_set(standardized))
+    except (TypeError, KeyError):
+        return None
+    return compiled
+
+
+def _resolve_types(param_details, language):
+    # (type description, expected type, nested type) as looked up by `simple_function_checker`, or None if that lookup would fail
+    if param_details is None:
+        return None
+    try:
+        expected_type_description = param_details["type"]
+        nested_type_converted = None
+        if language == "Java":
+            expected_type_converted = JAVA_TYPE_CONVERSION[expected_type_description]
+        elif language == "JavaScript":
+            expected_type_converted = JS_TYPE_CONVERSION[expected_type_description]
+        else:
+            expected_type_converted = PYTHON_TYPE_MAPPING[expected_type_description]
+            if expected_type_description in PYTHON_NESTED_TYPE_CHECK_LIST:
+                nested_type_converted = PYTHON_TYPE_MAPPING[
+                    param_details["items"]["type"]
+                ]
+    except (KeyError, TypeError):
+        return None
+    return expected_type_description, expected_type_converted, nested_type_converted
+
+
+def compile_param(possible_answer, param_details, language):
+    compiled = {
+        "answer_type": get_possible_answer_type(possible_answer),
+        "values": _build_answer_set(possible_answer),
+        "strings": frozenset(
+            standardize_string(answer)
+            for answer in possible_answer
+            if type(answer) == str
+        ),
+        "lists": None,
+        "dicts": [_compile_dict_answer(answer) for answer in possible_answer],
+        "list_dicts": [
+            (
+                [_compile_dict_answer(item) for item in answer]
+                if type(answer) == list
+                else None
+            )
+            for answer in possible_answer
+        ],
+        "types": _resolve_types(param_details, language),
+    }
+    try:
+        standardized = standardize_list_answers(possible_answer)
+        compiled["lists"] = (standardized, _build_answer_set(standardized))
+    except (TypeError, KeyError):
+        pass
+    return compiled
+
+
+def compile_entry(prompt_entry, possible_answer_entry, language):
+    try:
+        compiled = []
+        for function_answer in possible_answer_entry["ground_truth"]:
+            compiled_function = {}
+            for func_name, params in function_answer.items():
+                func_description = find_description(prompt_entry["function"], func_name)
+                properties = {}
+                if func_description is not None:
+                    properties = func_description["parameters"]["properties"]
+                compiled_function[func_name] = {
+                    param: compile_param(values, properties.get(param), language)
+                    for param, values in params.items()
+                }
+            compiled.append(compiled_function)
+        return compiled
+    except (TypeError, KeyError, AttributeError):
+        return None
+
+
+def build_possible_answer_index(prompt, possible_answer, language):
+    return [
+        compile_entry(prompt_entry, possible_answer_entry, language)
+        for prompt_entry, possible_answer_entry in zip(prompt, possible_answer)
+    ]
+
+
+#### Disk cache ####
+def _get_cache_key(possible_answer_file, prompt_file, language):
+    hasher = hashlib.sha256()
+    for file_path in [possible_answer_file, prompt_file]:
+        with open(file_path, "rb") as f:
+            hasher.update(f.read())
+    hasher.update(f"{language}:{INDEX_VERSION}".encode("utf-8"))
+    return hasher.hexdigest()[:16]
+
+
+def load_possible_answer_index(
+    possible_answer_file, prompt_file, possible_answer, prompt, language, cache_dir
+):
+    """
+    Returns the compiled possible answer index for one test category, aligned with `possible_answer`.
+
+    The index is built once per process, and cached in `cache_dir` keyed by the hash of the possible answer and prompt files,
+    so that scoring many models (or re-running the checker) does not compile it again.
+    """
+    memory_key = (possible_answer_file, prompt_file, language)
+    if memory_key in _INDEXES:
+        return _INDEXES[memory_key]
+
+    file_prefix = os.path.basename(possible_answer_file).replace(".json", "")
+    cache_path = os.path.join(
+        cache_dir,
+        f"{file_prefix}_{_get_cache_key(possible_answer_file, prompt_file, language)}.pkl",
+    )
+
+    index = None
+    if os.path.exists(cache_path):
+        try:
+            with open(cache_path, "rb") as f:
+                index = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            # A corrupt cache file is simply rebuilt
+            index = None
+    if index is None or len(index) != len(possible_answer):
+        index = build_possible_answer_index(prompt, possible_answer, language)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            # Indexes of older versions of the same file are no longer needed
+            stale_pattern = re.escape(file_prefix) + r"_[0-9a-f]{16}\.pkl"
+            for file_name in os.listdir(cache_dir):
+                if re.fullmatch(stale_pattern, file_name):
+                    os.remove(os.path.join(cache_dir, file_name))
+            temp_cache_path = cache_path + ".tmp"
+            with open(temp_cache_path, "wb") as f:
+                pickle.dump(index, f)
+            os.replace(temp_cache_path, cache_path)
+        except OSError:
+            # The cache is only an optimization; a read-only checkout should not stop the evaluation
+            pass
+
+    _INDEXES[memory_key] = index
+    return index
@@ -0,0 +1,137 @@
+import asyncio
+import json
+import time
+
+from model_handler.model_style import ModelStyle
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Default number of requests that can be in flight at the same time for each provider.
+# These are conservative values that fit the lowest paid tier of each provider; raise them with `--max-in-flight` if your account allows it.
+PROVIDER_MAX_IN_FLIGHT = {
+    ModelStyle.OpenAI: 64,
+    ModelStyle.Anthropic: 32,
+    ModelStyle.Mistral: 16,
+    ModelStyle.COHERE: 16,
+    ModelStyle.Google: 16,
+    ModelStyle.FIREWORK_AI: 16,
+    ModelStyle.NEXUS: 8,
+    ModelStyle.Gorilla: 8,
+}
+DEFAULT_MAX_IN_FLIGHT = 8
+
+# Default tokens-per-minute budget for each provider. `None` means no budget is enforced.
+PROVIDER_TOKENS_PER_MINUTE = {
+    ModelStyle.OpenAI: 800_000,
+    ModelStyle.Anthropic: 400_000,
+    ModelStyle.Mistral: 500_000,
+    ModelStyle.COHERE: None,
+    ModelStyle.Google: None,
+    ModelStyle.FIREWORK_AI: None,
+    ModelStyle.NEXUS: None,
+    ModelStyle.Gorilla: None,
+}
+
+# Rough number of characters per token, used to estimate the request size before sending it when `tiktoken` is not installed.
+CHARS_PER_TOKEN = 4
+# Encoding used to count prompt tokens. Providers tokenize differently, but this is close enough to budget and schedule requests.
+TIKTOKEN_ENCODING = "cl100k_base"
+
+# Prompt token count of each test case, by ID. Counted once per process, however many models and retries need it.
+_PROMPT_TOKENS = {}
+_TOKENIZER = {}
+
+
+class AsyncTokenBucket:
+    """
+    Token bucket that refills continuously at `tokens_per_minute / 60` tokens per second.
+    Waiters are served in FIFO order, so a large request cannot be starved by a stream of small ones.
+    """
+
+    def __init__(self, tokens_per_minute):
+        self.capacity = tokens_per_minute
+        self.rate = tokens_per_minute / 60
+        self.tokens = tokens_per_minute
+        self.last_refill = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    async def acquire(self, num_tokens):
+        # A single request larger than the whole bucket would otherwise wait forever
+        num_tokens = min(num_tokens, self.capacity)
+        async with self.lock:
+            self._refill()
+            while self.tokens < num_tokens:
+                await asyncio.sleep((num_tokens - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= num_tokens
+
+
+class ProviderLimiter:
+    """
+    Caps the number of in-flight requests and the tokens-per-minute spent against one provider.
+    """
+
+    def __init__(self, max_in_flight, tokens_per_minute=None):
+        self.max_in_flight = max_in_flight
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.token_bucket = (
+            AsyncTokenBucket(tokens_per_minute) if tokens_per_minute else None
+        )
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.semaphore.release()
+
+    async def reserve_tokens(self, num_tokens):
+        if self.token_bucket is not None:
+            await self.token_bucket.acquire(num_tokens)
+
+
+def build_provider_limiter(model_style, max_in_flight=None, tokens_per_minute=None):
+    # Command line values take precedence over the provider defaults
+    if max_in_flight is None:
+        max_in_flight = PROVIDER_MAX_IN_FLIGHT.get(model_style, DEFAULT_MAX_IN_FLIGHT)
+    if tokens_per_minute is None:
+        tokens_per_minute = PROVIDER_TOKENS_PER_MINUTE.get(model_style)
+    return ProviderLimiter(max_in_flight, tokens_per_minute)
+
+
+def _get_tokenizer():
+    if "encoding" not in _TOKENIZER:
+        encoding = None
+        if tiktoken is not None:
+            try:
+                encoding = tiktoken.get_encoding(TIKTOKEN_ENCODING)
+            except Exception as e:
+                # The encoding is downloaded the first time it is used
+                print(f"Could not load the {TIKTOKEN_ENCODING} encoding, prompt tokens are estimated from their length: {e}")
+        _TOKENIZER["encoding"] = encoding
+    return _TOKENIZER["encoding"]
+
+
+def count_prompt_tokens(test_case):
+    if test_case["id"] not in _PROMPT_TOKENS:
+        prompt = json.dumps(test_case["question"]) + json.dumps(test_case["function"])
+        encoding = _get_tokenizer()
+        if encoding is None:
+            num_tokens = len(prompt) // CHARS_PER_TOKEN
+        else:
+            num_tokens = len(encoding.encode(prompt, disallowed_special=()))
+        _PROMPT_TOKENS[test_case["id"]] = num_tokens
+    return _PROMPT_TOKENS[test_case["id"]]
+
+
+def estimate_request_tokens(test_case, max_tokens):
+    # Providers count the requested completion budget against the tokens-per-minute limit, so it is included here.
+    return count_prompt_tokens(test_case) + max_tokens
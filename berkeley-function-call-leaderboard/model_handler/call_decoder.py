@@ -0,0 +1,283 @@
+import ast
+import functools
+import keyword
+import operator
+import re
+
+# Number of distinct model outputs whose decoded calls are kept per decoder
+DECODE_CACHE_SIZE = 65536
+
+# Nesting deeper than this is left to `ast`, which has its own limit on nested brackets
+MAX_FAST_PATH_DEPTH = 50
+# Longer integer literals are left to `ast`, which rejects the ones above `sys.get_int_max_str_digits()`
+MAX_FAST_PATH_DIGITS = 100
+
+# Limits on what `fold_constant` computes, so that a model output such as `10**10**10` cannot stall the evaluation
+MAX_FOLDED_INT_BITS = 65536
+MAX_FOLDED_SEQUENCE_LENGTH = 1000000
+
+# Every character of the input ends up in a token, so `findall` never skips over anything. A token is its leading
+# whitespace and one of: a string without escapes or line breaks, a number, a (dotted) name, punctuation, or any other
+# character, which makes the parser give up.
+_TOKEN = re.compile(
+    r"""([ \t\n]*)(?:
+    ('[^'\\\n\r]*'|"[^"\\\n\r]*")
+    |((?:[0-9]+\.[0-9]*|\.[0-9]+|[0-9]+)(?:[eE][+-]?[0-9]+)?)
+    |([A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*)
+    |([-()\[\]{},=:])
+    |(.))""",
+    re.VERBOSE | re.DOTALL,
+)
+_INTEGER = re.compile(r"0+|[1-9][0-9]*")
+_WHITESPACE = " \t\n"
+_CONSTANTS = {"True": True, "False": False, "None": None}
+_END = ("", "", "", "", "", "")
+
+
+class _Unsupported(Exception):
+    pass
+
+
+def _copy_decoded(value):
+    # Decoded calls only hold JSON-like values, which this copies much faster than `copy.deepcopy`
+    if isinstance(value, dict):
+        return {key: _copy_decoded(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_copy_decoded(item) for item in value]
+    if isinstance(value, tuple):
+        return tuple(_copy_decoded(item) for item in value)
+    if isinstance(value, set):
+        return set(value)
+    return value
+
+
+def cache_decoded_calls(decode_function):
+    """
+    Caches the result of `decode_function` by model output, so the same output is decoded once per process however many
+    times it is scored. Callers get their own copy of the result, and a failed decode raises again.
+    """
+
+    @functools.lru_cache(maxsize=DECODE_CACHE_SIZE)
+    def cached_decode(source_code):
+        try:
+            return decode_function(source_code), None
+        except Exception as e:
+            return None, e
+
+    @functools.wraps(decode_function)
+    def wrapper(source_code):
+        result, error = cached_decode(source_code)
+        if error is not None:
+            raise error.with_traceback(None)
+        return _copy_decoded(result)
+
+    wrapper.cache_info = cached_decode.cache_info
+    wrapper.cache_clear = cached_decode.cache_clear
+    return wrapper
+
+
+class _FlatCallParser:
+    """
+    Recursive descent over the tokens of `f(a=1, b='x'), g(c=[1, 2])`: calls to (dotted) names with keyword arguments
+    whose values are numbers, plain strings, True/False/None, bare names, lists and dicts.
+
+    It produces exactly what `ast.parse` followed by `resolve_ast_call` would, and gives up on anything else by raising
+    `_Unsupported` (escapes, string prefixes, tuples, nested calls, operators, positional arguments, comments...).
+    """
+
+    def __init__(self, tokens):
+        # Running past `_END` raises StopIteration, which the caller treats like `_Unsupported`
+        tokens.append(_END)
+        self.next = iter(tokens).__next__
+
+    def calls(self):
+        calls = []
+        token = self.next()
+        while True:
+            whitespace, _, _, name, _, _ = token
+            # Outside brackets, a line break or a tab would end the expression
+            if not name or whitespace.strip(" "):
+                raise _Unsupported()
+            calls.append(self.call(name))
+            token = self.next()
+            if token is _END:
+                return calls
+            whitespace, _, _, _, punctuation, _ = token
+            if punctuation != "," or whitespace.strip(" "):
+                raise _Unsupported()
+            token = self.next()
+            if token is _END:
+                # A trailing comma still makes a tuple of calls
+                return calls
+
+    def call(self, name):
+        if any(keyword.iskeyword(part) for part in name.split(".")):
+            raise _Unsupported()
+        whitespace, _, _, _, punctuation, _ = self.next()
+        if punctuation != "(" or whitespace:
+            raise _Unsupported()
+
+        arguments = {}
+        token = self.next()
+        while token[4] != ")":
+            argument = token[3]
+            if (
+                not argument
+                or "." in argument
+                or keyword.iskeyword(argument)
+                or argument == "__debug__"
+                or argument in arguments
+            ):
+                raise _Unsupported()
+            if self.next()[4] != "=":
+                raise _Unsupported()
+            arguments[argument] = self.value(self.next(), 1)
+            token = self.next()
+            if token[4] == ",":
+                token = self.next()
+            elif token[4] != ")":
+                raise _Unsupported()
+        return {name: arguments}
+
+    def value(self, token, depth):
+        _, string, number, name, punctuation, _ = token
+        if string:
+            return string[1:-1]
+        if number:
+            return _to_number(number)
+        if name:
+            if name in _CONSTANTS:
+                return _CONSTANTS[name]
+            if "." in name or keyword.iskeyword(name):
+                raise _Unsupported()
+            return name
+        if punctuation == "-":
+            number = self.next()[2]
+            if not number:
+                raise _Unsupported()
+            return -_to_number(number)
+        if depth > MAX_FAST_PATH_DEPTH:
+            raise _Unsupported()
+        if punctuation == "[":
+            items = []
+            token = self.next()
+            while token[4] != "]":
+                items.append(self.value(token, depth + 1))
+                token = self.next()
+                if token[4] == ",":
+                    token = self.next()
+                elif token[4] != "]":
+                    raise _Unsupported()
+            return items
+        if punctuation == "{":
+            items = {}
+            token = self.next()
+            while token[4] != "}":
+                key = self.value(token, depth + 1)
+                if isinstance(key, (list, dict)) or self.next()[4] != ":":
+                    raise _Unsupported()
+                items[key] = self.value(self.next(), depth + 1)
+                token = self.next()
+                if token[4] == ",":
+                    token = self.next()
+                elif token[4] != "}":
+                    raise _Unsupported()
+            return items
+        raise _Unsupported()
+
+
+def _to_number(text):
+    if len(text) > MAX_FAST_PATH_DIGITS:
+        raise _Unsupported()
+    if _INTEGER.fullmatch(text):
+        return int(text)
+    if text.isdigit():
+        # Decimal integers with leading zeros are a syntax error
+        raise _Unsupported()
+    return float(text)
+
+
+def parse_flat_calls(source):
+    """
+    Decodes `source` with the fast path. Returns None if the output is not in the flat call format, in which case the
+    caller should fall back to `ast`.
+    """
+    # Whitespace at either end is left to `ast`; `_TOKEN` also needs a token after any whitespace it consumes
+    if not source or source[0] in _WHITESPACE or source[-1] in _WHITESPACE or "\x00" in source:
+        return None
+    if not source.isascii():
+        try:
+            source.encode("utf-8")
+        except UnicodeEncodeError:
+            return None
+    try:
+        return _FlatCallParser(_TOKEN.findall(source)).calls()
+    except (_Unsupported, StopIteration):
+        return None
+
+
+_BINARY_OPERATORS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.MatMult: operator.matmul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+    ast.LShift: operator.lshift,
+    ast.RShift: operator.rshift,
+    ast.BitOr: operator.or_,
+    ast.BitXor: operator.xor,
+    ast.BitAnd: operator.and_,
+}
+_UNARY_OPERATORS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+    ast.Not: operator.not_,
+    ast.Invert: operator.invert,
+}
+
+
+def _check_operands(op, left, right):
+    if isinstance(op, ast.Pow) and isinstance(left, int) and isinstance(right, int):
+        if right > 0 and abs(left) > 1 and right * left.bit_length() > MAX_FOLDED_INT_BITS:
+            raise ValueError("Result of the expression is too large.")
+    elif isinstance(op, ast.LShift) and isinstance(left, int) and isinstance(right, int):
+        if left and right > MAX_FOLDED_INT_BITS:
+            raise ValueError("Result of the expression is too large.")
+    elif isinstance(op, ast.Mult):
+        for sequence, count in ((left, right), (right, left)):
+            if isinstance(sequence, (str, bytes, list, tuple)) and isinstance(count, int):
+                if len(sequence) * count > MAX_FOLDED_SEQUENCE_LENGTH:
+                    raise ValueError("Result of the expression is too large.")
+
+
+def fold_constant(node):
+    """
+    Evaluates an expression made of literals and arithmetic, such as `2 * 3.14` or `"a" + "b"`, without `eval`.
+    Names raise `NameError`, as they would under `eval`; any other construct raises `ValueError`.
+    """
+    if isinstance(node, ast.Constant):
+        return node.value
+    if isinstance(node, ast.List):
+        return [fold_constant(elt) for elt in node.elts]
+    if isinstance(node, ast.Tuple):
+        return tuple(fold_constant(elt) for elt in node.elts)
+    if isinstance(node, ast.Set):
+        return {fold_constant(elt) for elt in node.elts}
+    if isinstance(node, ast.Dict) and None not in node.keys:
+        return {
+            fold_constant(key): fold_constant(value)
+            for key, value in zip(node.keys, node.values)
+        }
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+        return _UNARY_OPERATORS[type(node.op)](fold_constant(node.operand))
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+        left = fold_constant(node.left)
+        right = fold_constant(node.right)
+        _check_operands(node.op, left, right)
+        return _BINARY_OPERATORS[type(node.op)](left, right)
+    if isinstance(node, ast.Name):
+        raise NameError(f"name '{node.id}' is not defined")
+    raise ValueError(f"Unsupported expression: {ast.unparse(node)}")
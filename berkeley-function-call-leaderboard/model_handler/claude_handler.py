@@ -1,8 +1,9 @@
+import asyncio
 import json
 import os
 import time
 
-from anthropic import Anthropic
+from anthropic import Anthropic, AsyncAnthropic
 from anthropic.types import TextBlock, ToolUseBlock
 from model_handler.constant import (
     GORILLA_TO_OPENAPI,
@@ -29,10 +30,18 @@ class ClaudeHandler(BaseHandler):
 
         self.client = Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
 
-    def inference(self, prompt, functions, test_category):
+    @property
+    def async_client(self):
+        # The underlying HTTP client is bound to the event loop it was created in, so a new one is created for each loop.
+        loop = asyncio.get_running_loop()
+        if getattr(self, "_async_client_loop", None) is not loop:
+            self._async_client = AsyncAnthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+            self._async_client_loop = loop
+        return self._async_client
+
+    def _build_request(self, prompt, functions, test_category):
         # Chatting model
         if "FC" not in self.model_name:
-            start = time.time()
             functions = func_doc_language_specific_pre_processing(
                 functions, test_category
             )
@@ -48,21 +57,14 @@ class ClaudeHandler(BaseHandler):
             
             message = prompt
 
-            response = self.client.messages.create(
-                model=self.model_name,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                top_p=self.top_p,
-                system=DEFAULT_SYSTEM_PROMPT,
-                messages=message,
-            )
-            latency = time.time() - start
-            metadata = {}
-            metadata["input_tokens"] = response.usage.input_tokens
-            metadata["output_tokens"] = response.usage.output_tokens
-            metadata["latency"] = latency
-            result = response.content[0].text
-            return result, metadata
+            return {
+                "model": self.model_name,
+                "max_tokens": self.max_tokens,
+                "temperature": self.temperature,
+                "top_p": self.top_p,
+                "system": DEFAULT_SYSTEM_PROMPT,
+                "messages": message,
+            }
         # Function call model
         else:
             functions = func_doc_language_specific_pre_processing(
@@ -75,14 +77,24 @@ class ClaudeHandler(BaseHandler):
             prompt = convert_system_prompt_into_user_prompt(prompt)
             message = combine_consecutive_user_prompr(prompt)
             
-            start_time = time.time()
-            response = self.client.messages.create(
-                model=self.model_name.strip("-FC"),
-                max_tokens=self.max_tokens,
-                tools=claude_tool,
-                messages=message,
-            )
-            latency = time.time() - start_time
+            return {
+                "model": self.model_name.strip("-FC"),
+                "max_tokens": self.max_tokens,
+                "tools": claude_tool,
+                "messages": message,
+            }
+
+    def _parse_response(self, response, latency):
+        # Chatting model
+        if "FC" not in self.model_name:
+            metadata = {}
+            metadata["input_tokens"] = response.usage.input_tokens
+            metadata["output_tokens"] = response.usage.output_tokens
+            metadata["latency"] = latency
+            result = response.content[0].text
+            return result, metadata
+        # Function call model
+        else:
             text_outputs = []
             tool_call_outputs = []
             for content in response.content:
@@ -97,6 +109,20 @@ class ClaudeHandler(BaseHandler):
                 "latency": latency,
             }
 
+    def inference(self, prompt, functions, test_category):
+        request = self._build_request(prompt, functions, test_category)
+        start_time = time.time()
+        response = self.client.messages.create(**request)
+        latency = time.time() - start_time
+        return self._parse_response(response, latency)
+
+    async def async_inference(self, prompt, functions, test_category):
+        request = self._build_request(prompt, functions, test_category)
+        start_time = time.time()
+        response = await self.async_client.messages.create(**request)
+        latency = time.time() - start_time
+        return self._parse_response(response, latency)
+
     def decode_ast(self, result, language="Python"):
         if "FC" not in self.model_name:
             func = result
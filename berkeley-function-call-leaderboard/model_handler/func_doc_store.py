@@ -0,0 +1,60 @@
+import copy
+import hashlib
+import json
+
+# The live categories repeat the same function docs across many test cases (about 1k distinct docs among 4k in
+# `live_multiple`), so each distinct doc is kept once, and pre-processed / converted to a tool once.
+
+# Shared docs by content hash
+_DOCS = {}
+# Content hash of each shared doc by object ID. Shared docs are never freed, so their IDs cannot be reused.
+_DOC_KEYS = {}
+# Result of each transformation of a doc, by (transformation, content hash of the doc)
+_DERIVED = {}
+
+
+def get_func_doc_key(doc):
+    key = _DOC_KEYS.get(id(doc))
+    if key is None:
+        # Key order is not normalized: it shows up in the prompts, so docs that only differ in it are kept apart
+        key = hashlib.sha256(json.dumps(doc).encode("utf-8")).hexdigest()
+    return key
+
+
+def intern_func_doc(doc):
+    """
+    Returns the shared doc with the same content as `doc`, which is `doc` itself the first time. Shared docs are used
+    by every test case and model of the run, so they must not be modified.
+    """
+    if id(doc) in _DOC_KEYS:
+        return doc
+    key = get_func_doc_key(doc)
+    shared = _DOCS.setdefault(key, doc)
+    _DOC_KEYS[id(shared)] = key
+    return shared
+
+
+def intern_test_case(test_case):
+    # Only the function docs are replaced, with equal shared ones, so this is safe on test cases shared by several models
+    if isinstance(test_case.get("function"), list):
+        test_case["function"] = [
+            intern_func_doc(doc) if isinstance(doc, dict) else doc
+            for doc in test_case["function"]
+        ]
+    elif isinstance(test_case.get("function"), dict):
+        test_case["function"] = intern_func_doc(test_case["function"])
+    return test_case
+
+
+def derive_func_doc(doc, transformation, transform):
+    """
+    Returns `transform(doc)`, computed once per distinct doc and `transformation`, a hashable description of what
+    `transform` does. `transform` gets its own copy of the doc to modify. The result is shared and interned, so it can be
+    transformed in turn, and must not be modified.
+    """
+    doc = intern_func_doc(doc)
+    cache_key = (transformation, _DOC_KEYS[id(doc)])
+    if cache_key not in _DERIVED:
+        result = intern_func_doc(transform(copy.deepcopy(doc)))
+        _DERIVED.setdefault(cache_key, result)
+    return _DERIVED[cache_key]
@@ -13,8 +13,8 @@ from model_handler.constant import (
     USER_PROMPT_FOR_CHAT_MODEL,
     DEFAULT_SYSTEM_PROMPT,
 )
-from openai import OpenAI
-import os, time, json
+from openai import AsyncOpenAI, OpenAI
+import asyncio, os, time, json
 
 
 class OpenAIHandler(BaseHandler):
@@ -23,7 +23,16 @@ class OpenAIHandler(BaseHandler):
         self.model_style = ModelStyle.OpenAI
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
-    def inference(self, prompt, functions, test_category):
+    @property
+    def async_client(self):
+        # The underlying HTTP client is bound to the event loop it was created in, so a new one is created for each loop.
+        loop = asyncio.get_running_loop()
+        if getattr(self, "_async_client_loop", None) is not loop:
+            self._async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            self._async_client_loop = loop
+        return self._async_client
+
+    def _build_request(self, prompt, functions, test_category):
         # Chatting model
         if "FC" not in self.model_name:
             functions = func_doc_language_specific_pre_processing(functions, test_category)
@@ -31,17 +40,14 @@ class OpenAIHandler(BaseHandler):
             prompt = system_prompt_pre_processing(prompt, DEFAULT_SYSTEM_PROMPT)
             prompt = user_prompt_pre_processing_chat_model(prompt, USER_PROMPT_FOR_CHAT_MODEL, test_category, functions)
             message = prompt
-            
-            start_time = time.time()
-            response = self.client.chat.completions.create(
-                messages=message,
-                model=self.model_name,
-                temperature=self.temperature,
-                max_tokens=self.max_tokens,
-                top_p=self.top_p,
-            )
-            latency = time.time() - start_time
-            result = response.choices[0].message.content
+
+            return {
+                "messages": message,
+                "model": self.model_name,
+                "temperature": self.temperature,
+                "max_tokens": self.max_tokens,
+                "top_p": self.top_p,
+            }
         # Function call model
         else:
             functions = func_doc_language_specific_pre_processing(functions, test_category)
@@ -50,25 +56,23 @@ class OpenAIHandler(BaseHandler):
             oai_tool = convert_to_tool(
                 functions, GORILLA_TO_OPENAPI, self.model_style, test_category
             )
-            start_time = time.time()
+            request = {
+                "messages": message,
+                "model": self.model_name.replace("-FC", ""),
+                "temperature": self.temperature,
+                "max_tokens": self.max_tokens,
+                "top_p": self.top_p,
+            }
             if len(oai_tool) > 0:
-                response = self.client.chat.completions.create(
-                    messages=message,
-                    model=self.model_name.replace("-FC", ""),
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens,
-                    top_p=self.top_p,
-                    tools=oai_tool,
-                )
-            else:
-                response = self.client.chat.completions.create(
-                    messages=message,
-                    model=self.model_name.replace("-FC", ""),
-                    temperature=self.temperature,
-                    max_tokens=self.max_tokens,
-                    top_p=self.top_p,
-                )
-            latency = time.time() - start_time
+                request["tools"] = oai_tool
+            return request
+
+    def _parse_response(self, response, latency):
+        # Chatting model
+        if "FC" not in self.model_name:
+            result = response.choices[0].message.content
+        # Function call model
+        else:
             try:
                 result = [
                     {func_call.function.name: func_call.function.arguments}
@@ -81,6 +85,20 @@ class OpenAIHandler(BaseHandler):
         metadata["output_tokens"] = response.usage.completion_tokens
         metadata["latency"] = latency
         return result,metadata
+
+    def inference(self, prompt, functions, test_category):
+        request = self._build_request(prompt, functions, test_category)
+        start_time = time.time()
+        response = self.client.chat.completions.create(**request)
+        latency = time.time() - start_time
+        return self._parse_response(response, latency)
+
+    async def async_inference(self, prompt, functions, test_category):
+        request = self._build_request(prompt, functions, test_category)
+        start_time = time.time()
+        response = await self.async_client.chat.completions.create(**request)
+        latency = time.time() - start_time
+        return self._parse_response(response, latency)
     
     def decode_ast(self,result,language="Python"):
         if "FC" not in self.model_name:
@@ -1,5 +1,6 @@
 from model_handler.model_style import ModelStyle
-import json, os
+from model_handler.result_writer import ResultWriter
+import asyncio
 
 class BaseHandler:
     model_name: str
@@ -10,11 +11,18 @@ class BaseHandler:
         self.temperature = temperature
         self.top_p = top_p
         self.max_tokens = max_tokens
+        # Nothing is opened until the first `write` call, so building a handler for evaluation has no side effects.
+        self.writer = ResultWriter(f"./result/{model_name.replace('/', '_')}")
 
     def inference(self, prompt, functions, test_category):
         # This method is used to retrive model response for each model.
         pass
 
+    async def async_inference(self, prompt, functions, test_category):
+        # This method is used by the async generation mode.
+        # Handlers that have an async client override it; the rest run the blocking `inference` call in the default thread pool.
+        return await asyncio.to_thread(self.inference, prompt, functions, test_category)
+
     def decode_ast(self, result, language="Python"):
         # This method takes raw model output and convert it to standard AST checker input.
         pass
@@ -24,16 +32,8 @@ class BaseHandler:
         pass
 
     def write(self, result):
-        model_name_dir = self.model_name.replace("/", "_")
-        os.makedirs(f"./result/{model_name_dir}", exist_ok=True)
-        
-        if type(result) is dict:
-            result = [result]
-            
-        for entry in result:
-            test_category = entry["id"].rsplit("_", 1)[0]
-            file_to_write = f"BFCL_v2_{test_category}_result.json"
-            file_to_write = f"./result/{model_name_dir}/{file_to_write}"
-            
-            with open(file_to_write, "a+") as f:
-                f.write(json.dumps(entry) + "\n")
+        self.writer.write(result)
+
+    def close(self):
+        # Flushes and closes the result files. Must be called once generation is done.
+        self.writer.close()
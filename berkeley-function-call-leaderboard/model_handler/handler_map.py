@@ -1,99 +1,111 @@
-from model_handler.arctic_handler import ArcticHandler
-from model_handler.claude_handler import ClaudeHandler
-from model_handler.cohere_handler import CohereHandler
-from model_handler.databricks_handler import DatabricksHandler
-from model_handler.deepseek_handler import DeepseekHandler
-from model_handler.firework_ai_handler import FireworkAIHandler
-from model_handler.functionary_handler import FunctionaryHandler
-from model_handler.gemini_handler import GeminiHandler
-from model_handler.gemma_handler import GemmaHandler
-from model_handler.glaive_handler import GlaiveHandler
-from model_handler.gorilla_handler import GorillaHandler
-from model_handler.gpt_handler import OpenAIHandler
-from model_handler.hermes_handler import HermesHandler
-from model_handler.llama_handler import LlamaHandler
-from model_handler.mistral_handler import MistralHandler
-from model_handler.nexus_handler import NexusHandler
-from model_handler.granite_handler import GraniteHandler
-from model_handler.nvidia_handler import NvidiaHandler
-from model_handler.glm_handler import GLMHandler
-from model_handler.yi_handler import YiHandler
-from model_handler.xlam_handler import xLAMHandler
+import importlib
+from collections.abc import Mapping
 
-handler_map = {
-    "gorilla-openfunctions-v0": GorillaHandler,
-    "gorilla-openfunctions-v2": GorillaHandler,
-    "gpt-4o-2024-08-06": OpenAIHandler,
-    "gpt-4o-2024-08-06-FC": OpenAIHandler,
-    "gpt-4o-2024-05-13": OpenAIHandler,
-    "gpt-4o-2024-05-13-FC": OpenAIHandler,
-    "gpt-4o-mini-2024-07-18": OpenAIHandler,
-    "gpt-4o-mini-2024-07-18-FC": OpenAIHandler,
-    "gpt-4-turbo-2024-04-09-FC": OpenAIHandler,
-    "gpt-4-turbo-2024-04-09": OpenAIHandler,
-    "gpt-4-1106-preview-FC": OpenAIHandler,
-    "gpt-4-1106-preview": OpenAIHandler,
-    "gpt-4-0125-preview-FC": OpenAIHandler,
-    "gpt-4-0125-preview": OpenAIHandler,
-    "gpt-4-0613-FC": OpenAIHandler,
-    "gpt-4-0613": OpenAIHandler,
-    "gpt-3.5-turbo-0125-FC": OpenAIHandler,
-    "gpt-3.5-turbo-0125": OpenAIHandler,
-    "claude-2.1": ClaudeHandler,
-    "claude-instant-1.2": ClaudeHandler,
-    "claude-3-opus-20240229": ClaudeHandler,
-    "claude-3-opus-20240229-FC": ClaudeHandler,
-    "claude-3-sonnet-20240229": ClaudeHandler,
-    "claude-3-sonnet-20240229-FC": ClaudeHandler,
-    "claude-3-haiku-20240307": ClaudeHandler,
-    "claude-3-haiku-20240307-FC": ClaudeHandler,
-    "claude-3-5-sonnet-20240620": ClaudeHandler,
-    "claude-3-5-sonnet-20240620-FC": ClaudeHandler,
-    "open-mistral-nemo-2407": MistralHandler,
-    "open-mistral-nemo-2407-FC-Any": MistralHandler,
-    "open-mistral-nemo-2407-FC-Auto": MistralHandler,
-    "open-mixtral-8x22b": MistralHandler,
-    "open-mixtral-8x22b-FC-Any": MistralHandler,
-    "open-mixtral-8x22b-FC-Auto": MistralHandler,
-    "open-mixtral-8x7b": MistralHandler,
-    "mistral-large-2407": MistralHandler,
-    "mistral-large-2407-FC-Any": MistralHandler,
-    "mistral-large-2407-FC-Auto": MistralHandler,
-    "mistral-medium-2312": MistralHandler,
-    "mistral-small-2402": MistralHandler,
-    "mistral-small-2402-FC-Any": MistralHandler,
-    "mistral-small-2402-FC-Auto": MistralHandler,
-    "mistral-tiny-2312": MistralHandler,
-    "firefunction-v1-FC": FireworkAIHandler,
-    "firefunction-v2-FC": FireworkAIHandler,
-    "Nexusflow-Raven-v2": NexusHandler,
-    "gemini-1.0-pro": GeminiHandler,
-    "gemini-1.5-pro-preview-0409": GeminiHandler,
-    "gemini-1.5-pro-preview-0514": GeminiHandler,
-    "gemini-1.5-flash-preview-0514": GeminiHandler,
-    "google/gemma-7b-it": GemmaHandler,
-    "glaiveai/glaive-function-calling-v1": GlaiveHandler,
-    "deepseek-ai/deepseek-coder-6.7b-instruct": DeepseekHandler,
-    "meetkai/functionary-small-v3.1-FC": FunctionaryHandler,
-    "meetkai/functionary-small-v3.2-FC": FunctionaryHandler,
-    "meetkai/functionary-medium-v3.1-FC": FunctionaryHandler,
-    "databricks-dbrx-instruct": DatabricksHandler,
-    "NousResearch/Hermes-2-Pro-Llama-3-8B": HermesHandler,
-    "NousResearch/Hermes-2-Pro-Llama-3-70B": HermesHandler,
-    "NousResearch/Hermes-2-Pro-Mistral-7B": HermesHandler,
-    "NousResearch/Hermes-2-Theta-Llama-3-8B": HermesHandler,
-    "NousResearch/Hermes-2-Theta-Llama-3-70B": HermesHandler,
-    "meta-llama/Meta-Llama-3-8B-Instruct": LlamaHandler,
-    "meta-llama/Meta-Llama-3-70B-Instruct": LlamaHandler,
-    "command-r-plus-FC": CohereHandler,
-    "command-r-plus": CohereHandler,
-    "command-r-plus-FC-optimized": CohereHandler,
-    "command-r-plus-optimized": CohereHandler,
-    "snowflake/arctic": ArcticHandler,
-    "ibm-granite/granite-20b-functioncalling": GraniteHandler,
-    "nvidia/nemotron-4-340b-instruct": NvidiaHandler,
-    "THUDM/glm-4-9b-chat": GLMHandler,
-    "yi-large-fc": YiHandler,
-    "Salesforce/xLAM-1b-fc-r": xLAMHandler,
-    "Salesforce/xLAM-7b-fc-r": xLAMHandler
+# Dotted path of the handler class of each model. Handler modules import their vendor SDKs, so they are only
+# imported when a model that needs them is looked up.
+HANDLER_PATHS = {
+    "gorilla-openfunctions-v0": "model_handler.gorilla_handler.GorillaHandler",
+    "gorilla-openfunctions-v2": "model_handler.gorilla_handler.GorillaHandler",
+    "gpt-4o-2024-08-06": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4o-2024-08-06-FC": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4o-2024-05-13": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4o-2024-05-13-FC": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4o-mini-2024-07-18": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4o-mini-2024-07-18-FC": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4-turbo-2024-04-09-FC": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4-turbo-2024-04-09": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4-1106-preview-FC": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4-1106-preview": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4-0125-preview-FC": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4-0125-preview": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4-0613-FC": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-4-0613": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-3.5-turbo-0125-FC": "model_handler.gpt_handler.OpenAIHandler",
+    "gpt-3.5-turbo-0125": "model_handler.gpt_handler.OpenAIHandler",
+    "claude-2.1": "model_handler.claude_handler.ClaudeHandler",
+    "claude-instant-1.2": "model_handler.claude_handler.ClaudeHandler",
+    "claude-3-opus-20240229": "model_handler.claude_handler.ClaudeHandler",
+    "claude-3-opus-20240229-FC": "model_handler.claude_handler.ClaudeHandler",
+    "claude-3-sonnet-20240229": "model_handler.claude_handler.ClaudeHandler",
+    "claude-3-sonnet-20240229-FC": "model_handler.claude_handler.ClaudeHandler",
+    "claude-3-haiku-20240307": "model_handler.claude_handler.ClaudeHandler",
+    "claude-3-haiku-20240307-FC": "model_handler.claude_handler.ClaudeHandler",
+    "claude-3-5-sonnet-20240620": "model_handler.claude_handler.ClaudeHandler",
+    "claude-3-5-sonnet-20240620-FC": "model_handler.claude_handler.ClaudeHandler",
+    "open-mistral-nemo-2407": "model_handler.mistral_handler.MistralHandler",
+    "open-mistral-nemo-2407-FC-Any": "model_handler.mistral_handler.MistralHandler",
+    "open-mistral-nemo-2407-FC-Auto": "model_handler.mistral_handler.MistralHandler",
+    "open-mixtral-8x22b": "model_handler.mistral_handler.MistralHandler",
+    "open-mixtral-8x22b-FC-Any": "model_handler.mistral_handler.MistralHandler",
+    "open-mixtral-8x22b-FC-Auto": "model_handler.mistral_handler.MistralHandler",
+    "open-mixtral-8x7b": "model_handler.mistral_handler.MistralHandler",
+    "mistral-large-2407": "model_handler.mistral_handler.MistralHandler",
+    "mistral-large-2407-FC-Any": "model_handler.mistral_handler.MistralHandler",
+    "mistral-large-2407-FC-Auto": "model_handler.mistral_handler.MistralHandler",
+    "mistral-medium-2312": "model_handler.mistral_handler.MistralHandler",
+    "mistral-small-2402": "model_handler.mistral_handler.MistralHandler",
+    "mistral-small-2402-FC-Any": "model_handler.mistral_handler.MistralHandler",
+    "mistral-small-2402-FC-Auto": "model_handler.mistral_handler.MistralHandler",
+    "mistral-tiny-2312": "model_handler.mistral_handler.MistralHandler",
+    "firefunction-v1-FC": "model_handler.firework_ai_handler.FireworkAIHandler",
+    "firefunction-v2-FC": "model_handler.firework_ai_handler.FireworkAIHandler",
+    "Nexusflow-Raven-v2": "model_handler.nexus_handler.NexusHandler",
+    "gemini-1.0-pro": "model_handler.gemini_handler.GeminiHandler",
+    "gemini-1.5-pro-preview-0409": "model_handler.gemini_handler.GeminiHandler",
+    "gemini-1.5-pro-preview-0514": "model_handler.gemini_handler.GeminiHandler",
+    "gemini-1.5-flash-preview-0514": "model_handler.gemini_handler.GeminiHandler",
+    "google/gemma-7b-it": "model_handler.gemma_handler.GemmaHandler",
+    "glaiveai/glaive-function-calling-v1": "model_handler.glaive_handler.GlaiveHandler",
+    "deepseek-ai/deepseek-coder-6.7b-instruct": "model_handler.deepseek_handler.DeepseekHandler",
+    "meetkai/functionary-small-v3.1-FC": "model_handler.functionary_handler.FunctionaryHandler",
+    "meetkai/functionary-small-v3.2-FC": "model_handler.functionary_handler.FunctionaryHandler",
+    "meetkai/functionary-medium-v3.1-FC": "model_handler.functionary_handler.FunctionaryHandler",
+    "databricks-dbrx-instruct": "model_handler.databricks_handler.DatabricksHandler",
+    "NousResearch/Hermes-2-Pro-Llama-3-8B": "model_handler.hermes_handler.HermesHandler",
+    "NousResearch/Hermes-2-Pro-Llama-3-70B": "model_handler.hermes_handler.HermesHandler",
+    "NousResearch/Hermes-2-Pro-Mistral-7B": "model_handler.hermes_handler.HermesHandler",
+    "NousResearch/Hermes-2-Theta-Llama-3-8B": "model_handler.hermes_handler.HermesHandler",
+    "NousResearch/Hermes-2-Theta-Llama-3-70B": "model_handler.hermes_handler.HermesHandler",
+    "meta-llama/Meta-Llama-3-8B-Instruct": "model_handler.llama_handler.LlamaHandler",
+    "meta-llama/Meta-Llama-3-70B-Instruct": "model_handler.llama_handler.LlamaHandler",
+    "command-r-plus-FC": "model_handler.cohere_handler.CohereHandler",
+    "command-r-plus": "model_handler.cohere_handler.CohereHandler",
+    "command-r-plus-FC-optimized": "model_handler.cohere_handler.CohereHandler",
+    "command-r-plus-optimized": "model_handler.cohere_handler.CohereHandler",
+    "snowflake/arctic": "model_handler.arctic_handler.ArcticHandler",
+    "ibm-granite/granite-20b-functioncalling": "model_handler.granite_handler.GraniteHandler",
+    "nvidia/nemotron-4-340b-instruct": "model_handler.nvidia_handler.NvidiaHandler",
+    "THUDM/glm-4-9b-chat": "model_handler.glm_handler.GLMHandler",
+    "yi-large-fc": "model_handler.yi_handler.YiHandler",
+    "Salesforce/xLAM-1b-fc-r": "model_handler.xlam_handler.xLAMHandler",
+    "Salesforce/xLAM-7b-fc-r": "model_handler.xlam_handler.xLAMHandler",
 }
+
+
+class LazyHandlerMap(Mapping):
+    """
+    Read-only mapping from model name to handler class, like a dict of classes, that imports each class on first use.
+    """
+
+    def __init__(self, handler_paths):
+        self.handler_paths = handler_paths
+        self.handlers = {}
+
+    def __getitem__(self, model_name):
+        if model_name not in self.handlers:
+            module_path, class_name = self.handler_paths[model_name].rsplit(".", 1)
+            module = importlib.import_module(module_path)
+            self.handlers[model_name] = getattr(module, class_name)
+        return self.handlers[model_name]
+
+    def __contains__(self, model_name):
+        return model_name in self.handler_paths
+
+    def __iter__(self):
+        return iter(self.handler_paths)
+
+    def __len__(self):
+        return len(self.handler_paths)
+
+
+handler_map = LazyHandlerMap(HANDLER_PATHS)
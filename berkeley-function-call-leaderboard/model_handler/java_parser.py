@@ -1,19 +1,20 @@
 import json
-from tree_sitter import Language, Parser
+from tree_sitter import Language
 import tree_sitter_java
+from model_handler.call_decoder import cache_decoded_calls
+from model_handler.tree_sitter_pool import ParserPool, has_error_node
 
 JAVA_LANGUAGE = Language(tree_sitter_java.language(), "java")
 
-parser = Parser()
-parser.set_language(JAVA_LANGUAGE)
+parser_pool = ParserPool(JAVA_LANGUAGE)
 
 
+@cache_decoded_calls
 def parse_java_function_call(source_code):
-    tree = parser.parse(bytes(source_code, "utf8"))
+    tree = parser_pool.parse(source_code)
     root_node = tree.root_node
-    sexp_result = root_node.sexp()
 
-    if "ERROR" in sexp_result:
+    if has_error_node(root_node):
         raise Exception("Error parsing java the source code.")
 
     def get_text(node):
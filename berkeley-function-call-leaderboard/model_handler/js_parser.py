@@ -1,19 +1,20 @@
 import json
-from tree_sitter import Language, Parser
+from tree_sitter import Language
 import tree_sitter_javascript
+from model_handler.call_decoder import cache_decoded_calls
+from model_handler.tree_sitter_pool import ParserPool, has_error_node
 
 JS_LANGUAGE = Language(tree_sitter_javascript.language(), "javascript")
 
-parser = Parser()
-parser.set_language(JS_LANGUAGE)
+parser_pool = ParserPool(JS_LANGUAGE)
 
 
+@cache_decoded_calls
 def parse_javascript_function_call(source_code):
     # Parse the source code
-    tree = parser.parse(bytes(source_code, "utf8"))
+    tree = parser_pool.parse(source_code)
     root_node = tree.root_node
-    sexp_result = root_node.sexp()
-    if "ERROR" in sexp_result:
+    if has_error_node(root_node):
         raise Exception("Error js parsing the source code.")
 
     # Function to recursively extract argument details
@@ -0,0 +1,111 @@
+import json
+import mmap
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Data, result and score files are written with `json.dumps(entry)` and "id" as the first key, so the ID can be sliced out of a line without parsing it.
+ID_PREFIX = b'{"id": "'
+
+
+def loads(line):
+    if orjson is not None:
+        try:
+            return orjson.loads(line)
+        except orjson.JSONDecodeError:
+            # orjson is stricter than `json` (no NaN, no integers wider than 64 bits), so such lines are parsed as before
+            pass
+    return json.loads(line)
+
+
+def _project(entry, fields):
+    if fields is None or not isinstance(entry, dict):
+        return entry
+    return {field: entry[field] for field in fields if field in entry}
+
+
+def iter_jsonl(file_path, fields=None):
+    """
+    Yields the entries of a JSON Lines file one at a time, without reading the whole file first.
+
+    If `fields` is given, each entry is reduced to those keys, so the rest of it can be freed right away.
+    """
+    with open(file_path, "rb") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            yield _project(loads(line), fields)
+
+
+def load_jsonl(file_path, fields=None):
+    return list(iter_jsonl(file_path, fields))
+
+
+class JsonlIndex:
+    """
+    Random access by ID to the entries of a JSON Lines file.
+
+    The file is memory-mapped and only the line offsets and IDs are read up front; an entry is parsed the first time it is
+    asked for, and then kept. Entries are shared by every caller, so they must not be mutated.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.ids = []
+        self.offsets = []
+        self.positions = {}
+        self.entries = {}
+
+        with open(file_path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                self.data = b""
+            else:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        start = 0
+        while start < len(self.data):
+            end = self.data.find(b"\n", start)
+            if end == -1:
+                end = len(self.data)
+            if self.data[start:end].strip():
+                self._add_line(start, end)
+            start = end + 1
+
+    def _add_line(self, start, end):
+        entry_id = None
+        if self.data[start : start + len(ID_PREFIX)] == ID_PREFIX:
+            id_end = self.data.find(b'"', start + len(ID_PREFIX), end)
+            # An escaped character would need decoding, so such IDs are read by parsing the line
+            if id_end != -1 and b"\\" not in self.data[start + len(ID_PREFIX) : id_end]:
+                entry_id = self.data[start + len(ID_PREFIX) : id_end].decode("utf-8")
+        if entry_id is None:
+            entry = loads(self.data[start:end])
+            # Entries of a few data files (such as `BFCL_v2_chatable.json`) have no ID; they can still be read by position
+            entry_id = entry.get("id") if isinstance(entry, dict) else None
+            self.entries[len(self.offsets)] = entry
+
+        self.positions.setdefault(entry_id, len(self.offsets))
+        self.ids.append(entry_id)
+        self.offsets.append((start, end))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, entry_id):
+        return entry_id in self.positions
+
+    def entry_at(self, position):
+        if position not in self.entries:
+            start, end = self.offsets[position]
+            self.entries[position] = loads(self.data[start:end])
+        return self.entries[position]
+
+    def get(self, entry_id, fields=None):
+        return _project(self.entry_at(self.positions[entry_id]), fields)
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
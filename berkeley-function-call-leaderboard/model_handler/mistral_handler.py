@@ -13,8 +13,9 @@ from model_handler.utils import (
     system_prompt_pre_processing,
     user_prompt_pre_processing_chat_model,
 )
+from mistralai.async_client import MistralAsyncClient
 from mistralai.client import MistralClient
-import os, time, json
+import asyncio, os, time, json
 
 
 class MistralHandler(BaseHandler):
@@ -24,7 +25,16 @@ class MistralHandler(BaseHandler):
 
         self.client = MistralClient(api_key=os.getenv("MISTRAL_API_KEY"))
 
-    def inference(self, prompt, functions, test_category):
+    @property
+    def async_client(self):
+        # The underlying HTTP client is bound to the event loop it was created in, so a new one is created for each loop.
+        loop = asyncio.get_running_loop()
+        if getattr(self, "_async_client_loop", None) is not loop:
+            self._async_client = MistralAsyncClient(api_key=os.getenv("MISTRAL_API_KEY"))
+            self._async_client_loop = loop
+        return self._async_client
+
+    def _build_request(self, prompt, functions, test_category):
         if "FC" in self.model_name:
             functions = func_doc_language_specific_pre_processing(
                 functions, test_category
@@ -34,27 +44,18 @@ class MistralHandler(BaseHandler):
             )
             message = prompt
 
-            start = time.time()
             if "Any" in self.model_name:
                 tool_choice = "any"
             else:
                 tool_choice = "auto"
-            chat_response = self.client.chat(
-                model=self.model_name.replace("-FC-Any", "").replace("-FC-Auto", ""),
-                messages=message,
-                tools=tool,
-                tool_choice=tool_choice,
-                temperature=self.temperature,
-                top_p=self.top_p,
-            )
-            latency = time.time() - start
-            try:
-                result = [
-                    {func_call.function.name: func_call.function.arguments}
-                    for func_call in chat_response.choices[0].message.tool_calls
-                ]
-            except:
-                result = chat_response.choices[0].message.content
+            return {
+                "model": self.model_name.replace("-FC-Any", "").replace("-FC-Auto", ""),
+                "messages": message,
+                "tools": tool,
+                "tool_choice": tool_choice,
+                "temperature": self.temperature,
+                "top_p": self.top_p,
+            }
         else:
             functions = func_doc_language_specific_pre_processing(
                 functions, test_category
@@ -65,14 +66,23 @@ class MistralHandler(BaseHandler):
             )
             message = prompt
 
-            start = time.time()
-            chat_response = self.client.chat(
-                model=self.model_name,
-                messages=message,
-                temperature=self.temperature,
-                top_p=self.top_p,
-            )
-            latency = time.time() - start
+            return {
+                "model": self.model_name,
+                "messages": message,
+                "temperature": self.temperature,
+                "top_p": self.top_p,
+            }
+
+    def _parse_response(self, chat_response, latency):
+        if "FC" in self.model_name:
+            try:
+                result = [
+                    {func_call.function.name: func_call.function.arguments}
+                    for func_call in chat_response.choices[0].message.tool_calls
+                ]
+            except:
+                result = chat_response.choices[0].message.content
+        else:
             result = chat_response.choices[0].message.content
         metadata = {
             "input_tokens": chat_response.usage.prompt_tokens,
@@ -81,6 +91,20 @@ class MistralHandler(BaseHandler):
         }
         return result, metadata
 
+    def inference(self, prompt, functions, test_category):
+        request = self._build_request(prompt, functions, test_category)
+        start = time.time()
+        chat_response = self.client.chat(**request)
+        latency = time.time() - start
+        return self._parse_response(chat_response, latency)
+
+    async def async_inference(self, prompt, functions, test_category):
+        request = self._build_request(prompt, functions, test_category)
+        start = time.time()
+        chat_response = await self.async_client.chat(**request)
+        latency = time.time() - start
+        return self._parse_response(chat_response, latency)
+
     def decode_ast(self, result, language="Python"):
         if "FC" in self.model_name:
             decoded_output = []
@@ -7,6 +7,62 @@ from model_handler.utils import (
     func_doc_language_specific_pre_processing,
 )
 from model_handler.constant import DEFAULT_SYSTEM_PROMPT, USER_PROMPT_FOR_CHAT_MODEL
+from model_handler.prefix_order import order_prompts_by_prefix
+import gc, time
+
+# Number of prompts handed to the vLLM engine ahead of time. This is about twice the number of sequences vLLM schedules in one batch by default.
+MAX_PENDING_REQUESTS = 512
+
+# Lets vLLM reuse the KV cache of a prompt prefix it has already computed, such as the system prompt and function docs
+# shared by many test cases. Models it cannot do this for (e.g. with sliding window attention) are loaded without it.
+ENABLE_PREFIX_CACHING = True
+
+# The vLLM engine currently loaded on the GPUs.
+# It is kept alive across `inference` calls, so that categories and models that share the same weights only load them once.
+_ENGINE = {"key": None, "engine": None}
+
+
+def get_engine(model_path, dtype, num_gpus, gpu_memory_utilization, max_model_len=None):
+    from vllm import LLM
+
+    engine_key = (model_path, dtype, num_gpus, gpu_memory_utilization, max_model_len)
+    if _ENGINE["key"] == engine_key:
+        return _ENGINE["engine"]
+
+    # Only one engine fits on the GPUs, so the previous one is released before loading new weights
+    release_engine()
+    engine_args = dict(
+        model=model_path,
+        dtype=dtype,
+        trust_remote_code=True,
+        disable_custom_all_reduce=True,
+        max_model_len=max_model_len,
+        tensor_parallel_size=num_gpus,
+        gpu_memory_utilization=gpu_memory_utilization,
+    )
+    try:
+        _ENGINE["engine"] = LLM(**engine_args, enable_prefix_caching=ENABLE_PREFIX_CACHING)
+    except (ValueError, NotImplementedError) as e:
+        # vLLM checks this when validating the config, before any weights are loaded
+        if not ENABLE_PREFIX_CACHING or "prefix caching" not in str(e).lower():
+            raise
+        print(f"Loading {model_path} without prefix caching: {e}")
+        _ENGINE["engine"] = LLM(**engine_args)
+    _ENGINE["key"] = engine_key
+    return _ENGINE["engine"]
+
+
+def release_engine():
+    if _ENGINE["engine"] is None:
+        return
+    _ENGINE["key"], _ENGINE["engine"] = None, None
+    gc.collect()
+    try:
+        import torch
+
+        torch.cuda.empty_cache()
+    except ImportError:
+        pass
 
 
 class OSSHandler(BaseHandler):
@@ -24,8 +80,8 @@ class OSSHandler(BaseHandler):
         return prompt_string
 
     @staticmethod
-    def _batch_generate(
-        test_question,
+    def _stream_generate(
+        prompts,
         model_path,
         temperature,
         max_tokens,
@@ -36,9 +92,12 @@ class OSSHandler(BaseHandler):
         num_gpus=8,
         gpu_memory_utilization=0.9,
     ):
-        from vllm import LLM, SamplingParams
-
-        print("start generating, test question length: ", len(test_question))
+        """
+        `prompts` is an iterator of (index, prompt) pairs, in the order they are handed to the engine. It is only advanced
+        when the engine has room for more, and `None` in place of a pair means no prompt is available yet; it is then
+        advanced again after the next request finishes.
+        """
+        from vllm import SamplingParams
 
         sampling_params = SamplingParams(
             temperature=temperature,
@@ -46,23 +105,80 @@ class OSSHandler(BaseHandler):
             top_p=top_p,
             stop_token_ids=stop_token_ids,
         )
-        llm = LLM(
-            model=model_path,
-            dtype=dtype,
-            trust_remote_code=True,
-            disable_custom_all_reduce=True,
-            max_model_len=max_model_len,
-            tensor_parallel_size=num_gpus,
-            gpu_memory_utilization=gpu_memory_utilization,
+        llm = get_engine(
+            model_path, dtype, num_gpus, gpu_memory_utilization, max_model_len
         )
-        outputs = llm.generate(test_question, sampling_params)
+        engine = llm.llm_engine
+
+        # Prompts wait here until there is room for them in the engine, which is their queue time
+        start_time = time.time()
+        # Timing of the requests that are in the engine, by request ID
+        pending = {}
+        has_more_prompts = True
+        prompts_available = True
+        try:
+            while True:
+                # Prompts are fed in as the engine drains, so it always has a full batch to schedule without holding the whole corpus
+                while (
+                    has_more_prompts
+                    and prompts_available
+                    and len(pending) < MAX_PENDING_REQUESTS
+                ):
+                    try:
+                        item = next(prompts)
+                    except StopIteration:
+                        has_more_prompts = False
+                        break
+                    if item is None:
+                        prompts_available = False
+                        break
+                    index, prompt = item
+                    request_id = str(index)
+                    pending[request_id] = {
+                        "queue_time": time.time() - start_time,
+                        "submit_time": time.time(),
+                        "time_to_first_token": None,
+                        "engine_time": 0,
+                    }
+                    engine.add_request(request_id, prompt, sampling_params)
+
+                if not engine.has_unfinished_requests():
+                    if not has_more_prompts:
+                        break
+                    prompts_available = True
+                    continue
 
-        final_ans_jsons = []
-        for output in outputs:
-            text = output.outputs[0].text
-            final_ans_jsons.append(text)
+                step_start = time.time()
+                outputs = engine.step()
+                step_end = time.time()
 
-        return final_ans_jsons
+                for output in outputs:
+                    timing = pending[output.request_id]
+                    # Every request in the step is served by the same forward pass, so the step time is split evenly among them
+                    timing["engine_time"] += (step_end - step_start) / len(outputs)
+                    if (
+                        timing["time_to_first_token"] is None
+                        and len(output.outputs[0].token_ids) > 0
+                    ):
+                        timing["time_to_first_token"] = step_end - timing["submit_time"]
+                    if not output.finished:
+                        continue
+
+                    del pending[output.request_id]
+                    prompts_available = True
+                    metadata = {
+                        "input_tokens": len(output.prompt_token_ids),
+                        "output_tokens": len(output.outputs[0].token_ids),
+                        "latency": step_end - timing["submit_time"],
+                        "queue_time": timing["queue_time"],
+                        "time_to_first_token": timing["time_to_first_token"],
+                        "amortized_latency": timing["engine_time"],
+                    }
+                    yield int(output.request_id), output.outputs[0].text, metadata
+        finally:
+            # The engine outlives this call, so requests left over by an interrupted run must not leak into the next one
+            if pending:
+                engine.abort_request(list(pending))
 
     @staticmethod
     def process_input(
@@ -102,15 +218,35 @@ class OSSHandler(BaseHandler):
         use_default_system_prompt=True,
         include_default_formatting_prompt=True,
     ):
-        test_question = self.process_input(
-            test_question,
-            format_prompt_func,
-            use_default_system_prompt,
-            include_default_formatting_prompt,
-        )
+        """
+        Returns an iterator of (index, result, metadata) tuples, in the order the requests finish.
+        `test_question` is a list of test cases, or an iterator of such lists (e.g. the batches of a work queue), which is
+        only advanced when the engine has room for more prompts; an empty list means none are available yet.
+        The prompts of each list are handed to the engine in lexicographic order, so the ones that share a prefix are computed together.
+        `index` is the position of the test case among all of them, and `metadata` holds the token counts and timing of that request; `amortized_latency` is its share of the engine time, which is what the GPU cost is based on.
+        """
+        if isinstance(test_question, list):
+            print("start generating, test question length: ", len(test_question))
+            test_question = iter([test_question])
 
-        ans_jsons = self._batch_generate(
-            test_question=test_question,
+        def iter_prompts():
+            offset = 0
+            for batch in test_question:
+                if not batch:
+                    yield None
+                    continue
+                batch_prompts = self.process_input(
+                    batch,
+                    format_prompt_func,
+                    use_default_system_prompt,
+                    include_default_formatting_prompt,
+                )
+                for index in order_prompts_by_prefix(batch_prompts):
+                    yield offset + index, batch_prompts[index]
+                offset += len(batch)
+
+        return self._stream_generate(
+            prompts=iter_prompts(),
             model_path=self.model_name,
             temperature=self.temperature,
             max_tokens=self.max_tokens,
@@ -122,8 +258,6 @@ class OSSHandler(BaseHandler):
             gpu_memory_utilization=gpu_memory_utilization,
         )
 
-        return ans_jsons, {"input_tokens": 0, "output_tokens": 0, "latency": 0}
-
     def decode_ast(self, result, language="Python"):
         func = result
         if " " == func[0]:
@@ -0,0 +1,48 @@
+from model_handler.func_doc_store import get_func_doc_key
+from model_handler.model_style import ModelStyle
+
+# Providers that cache the longest prefix of recent prompts on their own, so requests sharing one are cheaper and faster
+# when they are sent close together. Claude only caches prefixes marked with `cache_control`, which the handler does not
+# set, so it is not listed.
+PROMPT_CACHING_MODEL_STYLES = [
+    ModelStyle.OpenAI,
+    ModelStyle.FIREWORK_AI,
+    ModelStyle.Google,
+]
+
+
+def order_prompts_by_prefix(prompts):
+    """
+    Returns the indices of `prompts` in lexicographic order of the prompts, which puts the prompts sharing the longest
+    prefix next to each other. Feeding them to vLLM in this order keeps their shared blocks in its prefix cache.
+    """
+    return sorted(range(len(prompts)), key=prompts.__getitem__)
+
+
+def get_dispatch_prefix(test_case):
+    # What the requests for the test case start with: the system prompt, then the function docs
+    functions = test_case["function"]
+    if not isinstance(functions, list):
+        functions = [functions]
+    return (
+        tuple(
+            message["content"]
+            for message in test_case["question"]
+            if message["role"] == "system"
+        ),
+        tuple(get_func_doc_key(doc) if isinstance(doc, dict) else doc for doc in functions),
+    )
+
+
+def group_test_cases_by_prefix(test_cases, model_style):
+    """
+    Moves the test cases whose requests share a prefix next to each other, for the providers in
+    `PROMPT_CACHING_MODEL_STYLES`, so they are dispatched one after another. Groups come in the order of their first
+    test case, and each group keeps the order of its test cases. Other providers get the test cases unchanged.
+    """
+    if model_style not in PROMPT_CACHING_MODEL_STYLES:
+        return test_cases
+    groups = {}
+    for test_case in test_cases:
+        groups.setdefault(get_dispatch_prefix(test_case), []).append(test_case)
+    return [test_case for group in groups.values() for test_case in group]
@@ -0,0 +1,218 @@
+import asyncio
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Exponential backoff parameters, in seconds. The actual delay is drawn uniformly from [0, min(MAX, BASE * 2^attempt)] ("full jitter").
+BACKOFF_BASE_DELAY = 1
+BACKOFF_MAX_DELAY = 60
+# Once a request has been throttled this many times, it is recorded as an error and the run moves on.
+MAX_RETRIES = 8
+# The concurrency limit is halved at most once per this many seconds, so one burst of 429s does not collapse it to 1.
+DECREASE_COOLDOWN = 5
+
+# Headers that providers use to tell the client when it can send again.
+# `retry-after` is standard (seconds or HTTP date). OpenAI sends durations like "6m0s" or "20ms"; Anthropic sends RFC 3339 timestamps.
+RATE_LIMIT_RESET_HEADERS = [
+    "x-ratelimit-reset-requests",
+    "x-ratelimit-reset-tokens",
+    "anthropic-ratelimit-requests-reset",
+    "anthropic-ratelimit-tokens-reset",
+    "ratelimit-reset",
+]
+
+
+def _parse_duration(value):
+    # Accepts plain seconds ("1.5") and Go-style durations ("1m30s", "250ms").
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    matches = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value)
+    if not matches or "".join(number + unit for number, unit in matches) != value:
+        return None
+    unit_seconds = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * unit_seconds[unit] for number, unit in matches)
+
+
+def _parse_timestamp(value):
+    # Accepts HTTP dates ("Wed, 21 Oct 2015 07:28:00 GMT") and RFC 3339 timestamps.
+    try:
+        reset_time = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        try:
+            reset_time = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if reset_time.tzinfo is None:
+        reset_time = reset_time.replace(tzinfo=timezone.utc)
+    return max(0, (reset_time - datetime.now(timezone.utc)).total_seconds())
+
+
+def _get_response_headers(e):
+    # OpenAI and Anthropic attach the httpx response to the exception; other SDKs expose the headers directly.
+    response = getattr(e, "response", None)
+    headers = getattr(response, "headers", None) or getattr(e, "headers", None)
+    if not headers:
+        return {}
+    return {key.lower(): value for key, value in dict(headers).items()}
+
+
+def get_retry_after(e):
+    """
+    Returns the number of seconds the provider asked us to wait, or None if the error does not carry that information.
+    """
+    headers = _get_response_headers(e)
+
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    if "retry-after" in headers:
+        delay = _parse_duration(headers["retry-after"])
+        if delay is None:
+            delay = _parse_timestamp(headers["retry-after"])
+        if delay is not None:
+            return delay
+
+    # If no explicit retry hint is given, wait until the earliest rate-limit window resets
+    reset_delays = []
+    for header in RATE_LIMIT_RESET_HEADERS:
+        if header in headers:
+            delay = _parse_duration(headers[header])
+            if delay is None:
+                delay = _parse_timestamp(headers[header])
+            if delay is not None:
+                reset_delays.append(delay)
+    if reset_delays:
+        return min(reset_delays)
+
+    return None
+
+
+def _wake_up(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RateController:
+    """
+    Shared, per-model controller for all workers sending requests to the same endpoint.
+
+    Concurrency follows AIMD: every successful request raises the limit by `1 / limit` (about +1 per round of requests),
+    and a throttled request halves it. A throttled request also pauses the whole pool until the provider's
+    `Retry-After` (or a jittered exponential backoff when no hint is given) has passed.
+    """
+
+    def __init__(self, max_concurrency, min_concurrency=1):
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0
+        self.last_decrease = 0
+        self.condition = threading.Condition()
+        # (event loop, future) pairs of coroutines waiting in `acquire_async`
+        self.async_waiters = []
+
+    def _try_acquire(self):
+        # Returns 0 if a slot was taken, otherwise the number of seconds worth waiting before trying again (None if unknown).
+        now = time.monotonic()
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        if self.in_flight < int(self.limit):
+            self.in_flight += 1
+            return 0
+        return None
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                wait_time = self._try_acquire()
+                if wait_time == 0:
+                    return
+                self.condition.wait(wait_time)
+
+    async def acquire_async(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            with self.condition:
+                wait_time = self._try_acquire()
+                if wait_time == 0:
+                    # Pass the baton: if there is still room (e.g. right after a pause ends), let the next coroutine in
+                    if self.in_flight < int(self.limit):
+                        self._notify(1)
+                    return
+                waiter = loop.create_future()
+                self.async_waiters.append((loop, waiter))
+            # Woken up by `_notify` when a slot frees up, or by the timeout when the pool pause is over
+            try:
+                await asyncio.wait_for(waiter, timeout=wait_time)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                with self.condition:
+                    if (loop, waiter) in self.async_waiters:
+                        self.async_waiters.remove((loop, waiter))
+
+    def _notify(self, num_async_waiters):
+        # Must be called with `self.condition` held.
+        # Blocked threads are few (at most `--num-threads`), so they are all woken up; waiting coroutines can number in the thousands, so they are woken up one at a time in FIFO order.
+        self.condition.notify_all()
+        woken_up = self.async_waiters[:num_async_waiters]
+        self.async_waiters = self.async_waiters[num_async_waiters:]
+        for loop, waiter in woken_up:
+            loop.call_soon_threadsafe(_wake_up, waiter)
+
+    def release(self):
+        with self.condition:
+            self.in_flight -= 1
+            self._notify(1)
+
+    def on_success(self):
+        with self.condition:
+            self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+            self._notify(1)
+
+    def on_throttle(self, e, attempt):
+        """
+        Records a throttled request and returns how long the caller should wait before retrying it.
+        """
+        delay = get_retry_after(e)
+        if delay is None:
+            delay = random.uniform(
+                0, min(BACKOFF_MAX_DELAY, BACKOFF_BASE_DELAY * 2**attempt)
+            )
+
+        with self.condition:
+            now = time.monotonic()
+            if now - self.last_decrease >= DECREASE_COOLDOWN:
+                self.limit = max(self.min_concurrency, self.limit / 2)
+                self.last_decrease = now
+            # Nobody in the pool sends to this endpoint until the delay has passed
+            self.blocked_until = max(self.blocked_until, now + delay)
+            # Waiting coroutines do not need to be woken up: whoever gets the next free slot sees the pause and waits it out
+            self._notify(0)
+
+        return delay
+
+    @property
+    def concurrency(self):
+        return int(self.limit)
+
+
+_RATE_CONTROLLERS = {}
+_RATE_CONTROLLERS_LOCK = threading.Lock()
+
+
+def get_rate_controller(model_name, max_concurrency):
+    # All workers (threads or coroutines) for the same model share one controller
+    with _RATE_CONTROLLERS_LOCK:
+        if model_name not in _RATE_CONTROLLERS:
+            _RATE_CONTROLLERS[model_name] = RateController(max_concurrency)
+        return _RATE_CONTROLLERS[model_name]
@@ -0,0 +1,122 @@
+import math
+import threading
+import time
+
+from model_handler.async_scheduler import estimate_request_tokens
+from model_handler.prefix_order import group_test_cases_by_prefix
+
+LATENCY_PERCENTILES = [50, 95, 99]
+
+
+def schedule_test_cases(test_cases, model_style, max_tokens):
+    """
+    Returns the test cases in the order they are dispatched: largest estimated request first, so that the longest
+    requests start early instead of deciding when the run ends. For the providers that cache prompt prefixes, requests
+    sharing one still go out together; such a group is placed by its largest request.
+    """
+    test_cases = sorted(
+        test_cases,
+        key=lambda test_case: estimate_request_tokens(test_case, max_tokens),
+        reverse=True,
+    )
+    return group_test_cases_by_prefix(test_cases, model_style)
+
+
+def percentile(sorted_values, p):
+    # Nearest-rank percentile of an already sorted list
+    return sorted_values[max(0, math.ceil(p / 100 * len(sorted_values)) - 1)]
+
+
+class RequestTiming:
+    """
+    Timing of one request. Queue time runs from dispatch until a worker (or an in-flight slot) starts on the request, and
+    service time from then until its result is ready, retries included.
+    """
+
+    def __init__(self):
+        self.dispatch_time = time.time()
+        self.start_time = None
+
+    def start(self):
+        # Only the first attempt ends the queue time
+        if self.start_time is None:
+            self.start_time = time.time()
+
+
+class RunStats:
+    """
+    Queue and service time of the requests of one model's run, reported per test category at the end of the run.
+    """
+
+    def __init__(self):
+        self.requests = {}
+        self.lock = threading.Lock()
+
+    def record(self, test_case, queue_time, service_time, end_time=None):
+        if end_time is None:
+            end_time = time.time()
+        test_category = test_case["id"].rsplit("_", 1)[0]
+        with self.lock:
+            self.requests.setdefault(test_category, []).append(
+                (queue_time, service_time, end_time)
+            )
+
+    def record_timing(self, test_case, timing):
+        end_time = time.time()
+        if timing.start_time is None:
+            timing.start_time = end_time
+        self.record(
+            test_case,
+            timing.start_time - timing.dispatch_time,
+            end_time - timing.start_time,
+            end_time,
+        )
+
+    def summarize(self):
+        """
+        Returns, for each test category and for the whole run ("total"), the number of requests, the throughput in
+        requests per second, and the percentiles of latency (queue + service), queue time and service time in seconds.
+        """
+        with self.lock:
+            groups = dict(self.requests)
+            groups["total"] = [
+                request for requests in self.requests.values() for request in requests
+            ]
+
+        summary = {}
+        for test_category, requests in groups.items():
+            if not requests:
+                continue
+            queue_times = sorted(request[0] for request in requests)
+            service_times = sorted(request[1] for request in requests)
+            latencies = sorted(request[0] + request[1] for request in requests)
+            # Requests of all categories run side by side, so a category's throughput is over the span it was served in
+            first_dispatch = min(request[2] - request[0] - request[1] for request in requests)
+            last_end = max(request[2] for request in requests)
+            summary[test_category] = {
+                "requests": len(requests),
+                "throughput": len(requests) / max(last_end - first_dispatch, 1e-9),
+            }
+            for name, values in [
+                ("latency", latencies),
+                ("queue_time", queue_times),
+                ("service_time", service_times),
+            ]:
+                for p in LATENCY_PERCENTILES:
+                    summary[test_category][f"{name}_p{p}"] = percentile(values, p)
+        return summary
+
+    def print_summary(self, model_name):
+        summary = self.summarize()
+        if not summary:
+            return
+        print(f"Run summary for {model_name} (seconds; latency = queue + service):")
+        header = f"    {'category':<28}{'requests':>9}{'req/s':>9}"
+        for name in ["latency", "queue", "service"]:
+            header += "".join(f"{f'{name} p{p}':>14}" for p in LATENCY_PERCENTILES)
+        print(header)
+        for test_category, stats in summary.items():
+            line = f"    {test_category:<28}{stats['requests']:>9}{stats['throughput']:>9.2f}"
+            for name in ["latency", "queue_time", "service_time"]:
+                line += "".join(f"{stats[f'{name}_p{p}']:>14.2f}" for p in LATENCY_PERCENTILES)
+            print(line)
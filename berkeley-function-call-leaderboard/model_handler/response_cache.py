@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from model_handler.constant import (
+    DEFAULT_SYSTEM_PROMPT,
+    GORILLA_TO_OPENAPI,
+    USER_PROMPT_FOR_CHAT_MODEL,
+)
+from model_handler.utils import func_doc_language_specific_pre_processing
+
+# Bump this when the handlers change how a test case is turned into a request, so that stale responses are not served.
+CACHE_VERSION = 1
+CACHE_MODES = ["off", "read", "readwrite", "refresh"]
+DEFAULT_CACHE_PATH = "./.cache/response_cache.sqlite3"
+DEFAULT_CACHE_MAX_SIZE_MB = 1024
+# When the cache grows past its size limit, least recently used entries are evicted until it is back under this fraction of the limit.
+EVICTION_TARGET_RATIO = 0.9
+
+
+def get_cache_key(model_name, prompt, functions, test_category, temperature, top_p, max_tokens):
+    """
+    Content address of one request: the same key means the handler would send exactly the same request to the endpoint.
+
+    Every handler builds its request from the prompt, the function docs after `func_doc_language_specific_pre_processing`
+    and the shared prompt templates / type mapping, so those are hashed instead of the provider-specific request body.
+    """
+    functions = func_doc_language_specific_pre_processing(functions, test_category)
+    key_material = {
+        "version": CACHE_VERSION,
+        "model_name": model_name,
+        "messages": prompt,
+        "functions": functions,
+        "test_category": test_category,
+        "system_prompt": DEFAULT_SYSTEM_PROMPT,
+        "user_prompt": USER_PROMPT_FOR_CHAT_MODEL,
+        "type_mapping": GORILLA_TO_OPENAPI,
+        "temperature": temperature,
+        "top_p": top_p,
+        "max_tokens": max_tokens,
+    }
+    return hashlib.sha256(
+        json.dumps(key_material, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk, content-addressed cache of model responses, stored in a single SQLite file.
+
+    `mode` is one of:
+        - `read`: serve cached responses, never store new ones.
+        - `readwrite`: serve cached responses and store new ones.
+        - `refresh`: ignore cached responses, but store (overwrite with) new ones.
+    The cache is bounded by `max_size_bytes`; least recently used entries are evicted first.
+    """
+
+    def __init__(self, path, mode, max_size_bytes):
+        self.path = path
+        self.mode = mode
+        self.max_size_bytes = max_size_bytes
+        self.stats = {}
+        # One connection is shared by all threads; the lock serializes access to it
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model_name TEXT NOT NULL,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)"
+        )
+        self.conn.commit()
+        self.total_size = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()[0]
+
+    def _get_model_stats(self, model_name):
+        return self.stats.setdefault(
+            model_name, {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        )
+
+    def get(self, key, model_name):
+        """
+        Returns the cached (result, metadata) pair for the key, or None on a miss.
+        """
+        if self.mode not in ["read", "readwrite"]:
+            return None
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT response FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self._get_model_stats(model_name)["misses"] += 1
+                return None
+
+            self._get_model_stats(model_name)["hits"] += 1
+            if self.mode == "readwrite":
+                self.conn.execute(
+                    "UPDATE responses SET last_access = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+                self.conn.commit()
+
+        response = json.loads(row[0])
+        return response["result"], response["metadata"]
+
+    def put(self, key, model_name, result, metadata):
+        if self.mode not in ["readwrite", "refresh"]:
+            return
+
+        response = json.dumps({"result": result, "metadata": metadata})
+        size = len(response)
+        now = time.time()
+        with self.lock:
+            old_row = self.conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_name, response, size, now, now),
+            )
+            self.total_size += size - (old_row[0] if old_row else 0)
+            self._get_model_stats(model_name)["writes"] += 1
+            if self.total_size > self.max_size_bytes:
+                self._evict(model_name)
+            self.conn.commit()
+
+    def _evict(self, model_name):
+        # Must be called with `self.lock` held
+        target_size = self.max_size_bytes * EVICTION_TARGET_RATIO
+        rows = self.conn.execute(
+            "SELECT key, size FROM responses ORDER BY last_access"
+        )
+        evicted_keys = []
+        for key, size in rows:
+            if self.total_size <= target_size:
+                break
+            evicted_keys.append((key,))
+            self.total_size -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", evicted_keys)
+        self._get_model_stats(model_name)["evictions"] += len(evicted_keys)
+
+    def get_stats(self, model_name):
+        with self.lock:
+            return dict(self._get_model_stats(model_name))
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+_RESPONSE_CACHES = {}
+_RESPONSE_CACHES_LOCK = threading.Lock()
+
+
+def get_response_cache(path, mode, max_size_mb):
+    # Returns None when caching is off. All models of a run share one cache per file.
+    if mode == "off":
+        return None
+    with _RESPONSE_CACHES_LOCK:
+        if path not in _RESPONSE_CACHES:
+            _RESPONSE_CACHES[path] = ResponseCache(
+                path, mode, max_size_mb * 1024 * 1024
+            )
+        return _RESPONSE_CACHES[path]
@@ -0,0 +1,81 @@
+import json
+import os
+
+# Bump this when the sidecar format changes, so that old sidecars are rebuilt instead of misread.
+INDEX_VERSION = 2
+# Every result entry is written with `json.dumps(entry)` and "id" as its first key, so the ID can be sliced out of the line without parsing it.
+ID_PREFIX = '{"id": "'
+
+
+def get_index_path(result_file_path):
+    directory, file_name = os.path.split(result_file_path)
+    return os.path.join(directory, f".{file_name}.idx")
+
+
+def _read_ids(result_file_path):
+    ids = []
+    with open(result_file_path) as f:
+        for line in f:
+            # A line cut off by an interrupted run does not end in "}\n", so it is only trusted if it parses
+            if line.endswith("}\n") and line.startswith(ID_PREFIX):
+                end = line.find('"', len(ID_PREFIX))
+                if end != -1:
+                    ids.append(line[len(ID_PREFIX) : end])
+                    continue
+            try:
+                ids.append(json.loads(line)["id"])
+            except (json.JSONDecodeError, KeyError, TypeError):
+                # Unparsable lines are skipped, so their test cases are regenerated
+                continue
+    return ids
+
+
+def write_index(result_file_path, ids, stat=None):
+    # `stat` should be taken before the IDs were read, so that entries appended in the meantime invalidate the index
+    if stat is None:
+        stat = os.stat(result_file_path)
+    index = {
+        "version": INDEX_VERSION,
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "ids": list(ids),
+    }
+    index_path = get_index_path(result_file_path)
+    temp_index_path = index_path + ".tmp"
+    with open(temp_index_path, "w") as f:
+        json.dump(index, f, separators=(",", ":"))
+    os.replace(temp_index_path, index_path)
+
+
+def load_completed_ids(result_file_path):
+    """
+    Returns the set of test case IDs that already have an entry in the given result file.
+
+    The IDs are cached in a sidecar file next to the result file, and only re-read from the result file when its mtime or size has changed.
+    """
+    if not os.path.exists(result_file_path):
+        return set()
+
+    stat = os.stat(result_file_path)
+    index_path = get_index_path(result_file_path)
+    if os.path.exists(index_path):
+        try:
+            with open(index_path) as f:
+                index = json.load(f)
+            if (
+                index["version"] == INDEX_VERSION
+                and index["mtime_ns"] == stat.st_mtime_ns
+                and index["size"] == stat.st_size
+            ):
+                return set(index["ids"])
+        except (json.JSONDecodeError, KeyError, TypeError):
+            # A corrupt sidecar is simply rebuilt
+            pass
+
+    ids = _read_ids(result_file_path)
+    try:
+        write_index(result_file_path, ids, stat)
+    except OSError:
+        # The index is only an optimization; a read-only result directory should not stop the run
+        pass
+    return set(ids)
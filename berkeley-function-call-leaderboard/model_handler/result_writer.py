@@ -0,0 +1,112 @@
+import json
+import os
+import threading
+
+# Buffer size for each result file handle. Entries are small, so this holds a few hundred of them.
+WRITE_BUFFER_SIZE = 1 << 20
+# Buffered entries are flushed (and fsync-ed) once this many are pending, or once this many seconds have passed.
+DEFAULT_FLUSH_EVERY = 16
+DEFAULT_FLUSH_INTERVAL = 5
+# Chunk size for scanning back from the end of a result file to its last complete line
+TAIL_CHUNK_SIZE = 1 << 16
+
+
+def _truncate_partial_line(file_path):
+    # If a previous run was interrupted mid-write, its last entry is cut off; it is dropped, so it is regenerated on resume
+    with open(file_path, "rb+") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - TAIL_CHUNK_SIZE)
+            f.seek(start)
+            last_newline = f.read(position - start).rfind(b"\n")
+            if last_newline != -1:
+                last_newline += start
+                break
+            position = start
+        else:
+            last_newline = -1
+        if last_newline + 1 < end:
+            f.truncate(last_newline + 1)
+
+
+class ResultWriter:
+    """
+    Keeps one buffered, append-mode handle open per `BFCL_v2_<category>_result.json` file of a model.
+
+    All writes go through a single lock, so entries from different threads never interleave.
+    Pending entries are flushed and fsync-ed when `flush_every` of them have accumulated, and a background thread
+    flushes them every `flush_interval` seconds so that a slow tail of requests does not keep finished results in memory.
+    """
+
+    def __init__(
+        self,
+        result_dir,
+        flush_every=DEFAULT_FLUSH_EVERY,
+        flush_interval=DEFAULT_FLUSH_INTERVAL,
+    ):
+        self.result_dir = result_dir
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.handles = {}
+        self.pending = 0
+        self.lock = threading.Lock()
+        self.flusher = None
+        self.stop_event = threading.Event()
+
+    def _get_handle(self, test_category):
+        if test_category not in self.handles:
+            os.makedirs(self.result_dir, exist_ok=True)
+            file_path = os.path.join(
+                self.result_dir, f"BFCL_v2_{test_category}_result.json"
+            )
+            if os.path.exists(file_path):
+                _truncate_partial_line(file_path)
+            self.handles[test_category] = open(file_path, "a", buffering=WRITE_BUFFER_SIZE)
+        return self.handles[test_category]
+
+    def _start_flusher(self):
+        def flush_periodically():
+            while not self.stop_event.wait(self.flush_interval):
+                self.flush()
+
+        self.stop_event.clear()
+        self.flusher = threading.Thread(target=flush_periodically, daemon=True)
+        self.flusher.start()
+
+    def _flush(self):
+        for f in self.handles.values():
+            f.flush()
+            os.fsync(f.fileno())
+        self.pending = 0
+
+    def write(self, result):
+        if type(result) is dict:
+            result = [result]
+
+        with self.lock:
+            if self.flusher is None:
+                self._start_flusher()
+            for entry in result:
+                test_category = entry["id"].rsplit("_", 1)[0]
+                self._get_handle(test_category).write(json.dumps(entry) + "\n")
+                self.pending += 1
+            if self.pending >= self.flush_every:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            if self.pending > 0:
+                self._flush()
+
+    def close(self):
+        # Stop the background flusher first, so it does not race with closing the handles
+        if self.flusher is not None:
+            self.stop_event.set()
+            self.flusher.join()
+            self.flusher = None
+        with self.lock:
+            self._flush()
+            for f in self.handles.values():
+                f.close()
+            self.handles = {}
@@ -0,0 +1,33 @@
+import threading
+
+from tree_sitter import Parser
+
+
+class ParserPool:
+    """
+    Hands out one tree-sitter `Parser` per thread, since a parser must not be used by two threads at once.
+    Each process builds its own parsers the first time it parses.
+    """
+
+    def __init__(self, language):
+        self.language = language
+        self.local = threading.local()
+
+    def parse(self, source_code):
+        parser = getattr(self.local, "parser", None)
+        if parser is None:
+            parser = Parser()
+            parser.set_language(self.language)
+            self.local.parser = parser
+        return parser.parse(bytes(source_code, "utf8"))
+
+
+def has_error_node(node):
+    # Same as `"ERROR" in node.sexp()`, without building the S-expression. `has_error` is also set for MISSING nodes,
+    # which the S-expression check lets through, so subtrees that have it are searched for an actual ERROR node.
+    if not node.has_error:
+        return False
+    if node.type == "ERROR":
+        return True
+    return any(has_error_node(child) for child in node.children)
+
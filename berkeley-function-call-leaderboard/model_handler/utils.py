@@ -1,8 +1,8 @@
 import re, ast, builtins, ast, json
 from model_handler.model_style import ModelStyle
-from model_handler.java_parser import parse_java_function_call
-from model_handler.js_parser import parse_javascript_function_call
+from model_handler.call_decoder import cache_decoded_calls, fold_constant, parse_flat_calls
 from model_handler.constant import GORILLA_TO_OPENAPI, USE_COHERE_OPTIMIZATION
+from model_handler.func_doc_store import derive_func_doc
 
 def _cast_to_openai_type(properties, mapping, test_category):
     for key, value in properties.items():
@@ -51,141 +51,156 @@ def _cast_to_openai_type(properties, mapping, test_category):
     return properties
 
 
-def convert_to_tool(
-    functions, mapping, model_style, test_category
-):
-    oai_tool = []
-    for item in functions:
-        if "." in item["name"] and (
-            model_style == ModelStyle.OpenAI
-            or model_style == ModelStyle.Mistral
-            or model_style == ModelStyle.Google
-            or model_style == ModelStyle.OSSMODEL
-            or model_style == ModelStyle.Anthropic
-            or model_style == ModelStyle.COHERE
-        ):
-            # OAI does not support "." in the function name so we replace it with "_". ^[a-zA-Z0-9_-]{1,64}$ is the regex for the name.
-            item["name"] = re.sub(r"\.", "_", item["name"])
+def _convert_func_doc_to_tool(item, mapping, model_style, test_category):
+    # The entries for one doc: a single one, or none for the model styles that take no tools
+    tool = []
+    if "." in item["name"] and (
+        model_style == ModelStyle.OpenAI
+        or model_style == ModelStyle.Mistral
+        or model_style == ModelStyle.Google
+        or model_style == ModelStyle.OSSMODEL
+        or model_style == ModelStyle.Anthropic
+        or model_style == ModelStyle.COHERE
+    ):
+        # OAI does not support "." in the function name so we replace it with "_". ^[a-zA-Z0-9_-]{1,64}$ is the regex for the name.
+        item["name"] = re.sub(r"\.", "_", item["name"])
             
-        item["parameters"]["type"] = "object"
-        item["parameters"]["properties"] = _cast_to_openai_type(
-            item["parameters"]["properties"], mapping, test_category
-        )
+    item["parameters"]["type"] = "object"
+    item["parameters"]["properties"] = _cast_to_openai_type(
+        item["parameters"]["properties"], mapping, test_category
+    )
+
+    if model_style == ModelStyle.Anthropic:
+        item["input_schema"] = item["parameters"]
+        del item["parameters"]
+    if model_style == ModelStyle.Google:
+        # Remove fields that are not supported by Gemini today.
+        for params in item["parameters"]["properties"].values():
+            if "default" in params:
+                params["description"] += "The Default is:" + str(params["default"])
+                del params["default"]
+            if "optional" in params:
+                del params["optional"]
+            if "maximum" in params:
+                del params["maximum"]
+            if "additionalProperties" in params:
+                params["description"] += "The additional properties:" +str(params["additionalProperties"])
+                del params["additionalProperties"]
+    if model_style == ModelStyle.COHERE:
+        if USE_COHERE_OPTIMIZATION:
+            if "required" not in item["parameters"]:
+                item["parameters"]["required"] = []
+            for param_name, params in item["parameters"]["properties"].items():
+                if "description" not in params:
+                    params["description"] = ""
 
-        if model_style == ModelStyle.Anthropic:
-            item["input_schema"] = item["parameters"]
-            del item["parameters"]
-        if model_style == ModelStyle.Google:
-            # Remove fields that are not supported by Gemini today.
-            for params in item["parameters"]["properties"].values():
                 if "default" in params:
-                    params["description"] += "The Default is:" + str(params["default"])
+                    params["description"] += " The default value is: " + str(params["default"])
+                    if param_name not in item["parameters"]["required"]:
+                        item["parameters"]["required"].append(param_name)
                     del params["default"]
-                if "optional" in params:
-                    del params["optional"]
-                if "maximum" in params:
-                    del params["maximum"]
                 if "additionalProperties" in params:
-                    params["description"] += "The additional properties:" +str(params["additionalProperties"])
+                    params["description"] += " Additional properties: " + str(params["additionalProperties"])
                     del params["additionalProperties"]
-        if model_style == ModelStyle.COHERE:
-            if USE_COHERE_OPTIMIZATION:
-                if "required" not in item["parameters"]:
-                    item["parameters"]["required"] = []
-                for param_name, params in item["parameters"]["properties"].items():
-                    if "description" not in params:
-                        params["description"] = ""
-
-                    if "default" in params:
-                        params["description"] += " The default value is: " + str(params["default"])
-                        if param_name not in item["parameters"]["required"]:
-                            item["parameters"]["required"].append(param_name)
-                        del params["default"]
-                    if "additionalProperties" in params:
-                        params["description"] += " Additional properties: " + str(params["additionalProperties"])
-                        del params["additionalProperties"]
-                    if "items" in params:
-                        inner_type = ""
-                        if "items" in params["items"] and "type" in params["items"]["items"]:
-                            # 2D list
-                            inner_type = params["items"]["items"]["type"]
-                            params["type"] = f"list[list[{inner_type}]]"
-                        elif "type" in params["items"]:
-                            # 1D list
-                            inner_type = params["items"]["type"]
-                            params["type"] = f"list[{inner_type}]"
-                        if "items" in params and "enum" in params["items"] and params["items"]["enum"]:
-                            params["description"] += " Possible enum values: "
-                            params["description"] += ", ".join(params["items"]["enum"])
-                            params["description"] += "."
-
-                        del params["items"]
-                    if "properties" in params:
-                        params["description"] += " Dictionary properties:"
-                        for name, property_ in params["properties"].items():
-                            property_type = property_.get("type", mapping["string"])
-                            property_description = property_.get("description", "")
-                            params["description"] += f" {name} ({property_type}): {property_description}"
-                        del params["properties"]
-                    if "enum" in params:
-                        params["description"] += " Possible enum values: " + str(params["enum"])
-                        del params["enum"]
-                    # add ranges to description
-                    if "percentage" not in params["description"]:
-                        params["description"] = params["description"].replace(
-                            "rate ", "rate (from 0.0 to 1.0) "
-                        )
+                if "items" in params:
+                    inner_type = ""
+                    if "items" in params["items"] and "type" in params["items"]["items"]:
+                        # 2D list
+                        inner_type = params["items"]["items"]["type"]
+                        params["type"] = f"list[list[{inner_type}]]"
+                    elif "type" in params["items"]:
+                        # 1D list
+                        inner_type = params["items"]["type"]
+                        params["type"] = f"list[{inner_type}]"
+                    if "items" in params and "enum" in params["items"] and params["items"]["enum"]:
+                        params["description"] += " Possible enum values: "
+                        params["description"] += ", ".join(params["items"]["enum"])
+                        params["description"] += "."
+
+                    del params["items"]
+                if "properties" in params:
+                    params["description"] += " Dictionary properties:"
+                    for name, property_ in params["properties"].items():
+                        property_type = property_.get("type", mapping["string"])
+                        property_description = property_.get("description", "")
+                        params["description"] += f" {name} ({property_type}): {property_description}"
+                    del params["properties"]
+                if "enum" in params:
+                    params["description"] += " Possible enum values: " + str(params["enum"])
+                    del params["enum"]
+                # add ranges to description
+                if "percentage" not in params["description"]:
                     params["description"] = params["description"].replace(
-                        "percentage ", "percentage (from 0 to 100) "
+                        "rate ", "rate (from 0.0 to 1.0) "
                     )
-                    params["description"] = params["description"].replace(
-                        "currency ", "currency (3 letter ISO code) "
-                    )
-            else:
-                for params in item["parameters"]["properties"].values():
-                    if "description" not in params:
-                        params["description"] = ""
-                    if "default" in params:
-                        params["description"] += " The default value is: " + str(params["default"])
-                        del params["default"]
-                    if "additionalProperties" in params:
-                        params["description"] += " Additional properties: " + str(params["additionalProperties"])
-                        del params["additionalProperties"]
-                    if "items" in params:
-                        params["description"] += " List Items type: " + str(params["items"])
-                        del params["items"]
-                    if "properties" in params:
-                        params["description"] += " Dictionary properties: " + str(params["properties"])
-                        del params["properties"]
-        if model_style in [
-            ModelStyle.Anthropic,
-            ModelStyle.Google,
-            ModelStyle.OSSMODEL,
-        ]:
-            oai_tool.append(item)
-        elif model_style == ModelStyle.COHERE:
-            parameter = item["parameters"]["properties"]
-            if "required" in item["parameters"]:
-                required = item["parameters"]["required"]
-            else:
-                required = []
-            parameter_definitions = {}
-            for key, value in parameter.items():
-                value["required"] = key in required
-                parameter_definitions[key] = value
-            oai_tool.append(
-                {
-                    "name": item["name"],
-                    "description": item["description"],
-                    "parameter_definitions": parameter_definitions,
-                }
+                params["description"] = params["description"].replace(
+                    "percentage ", "percentage (from 0 to 100) "
+                )
+                params["description"] = params["description"].replace(
+                    "currency ", "currency (3 letter ISO code) "
+                )
+        else:
+            for params in item["parameters"]["properties"].values():
+                if "description" not in params:
+                    params["description"] = ""
+                if "default" in params:
+                    params["description"] += " The default value is: " + str(params["default"])
+                    del params["default"]
+                if "additionalProperties" in params:
+                    params["description"] += " Additional properties: " + str(params["additionalProperties"])
+                    del params["additionalProperties"]
+                if "items" in params:
+                    params["description"] += " List Items type: " + str(params["items"])
+                    del params["items"]
+                if "properties" in params:
+                    params["description"] += " Dictionary properties: " + str(params["properties"])
+                    del params["properties"]
+    if model_style in [
+        ModelStyle.Anthropic,
+        ModelStyle.Google,
+        ModelStyle.OSSMODEL,
+    ]:
+        tool.append(item)
+    elif model_style == ModelStyle.COHERE:
+        parameter = item["parameters"]["properties"]
+        if "required" in item["parameters"]:
+            required = item["parameters"]["required"]
+        else:
+            required = []
+        parameter_definitions = {}
+        for key, value in parameter.items():
+            value["required"] = key in required
+            parameter_definitions[key] = value
+        tool.append(
+            {
+                "name": item["name"],
+                "description": item["description"],
+                "parameter_definitions": parameter_definitions,
+            }
+        )
+    elif model_style in [
+        ModelStyle.OpenAI,
+        ModelStyle.Mistral,
+        ModelStyle.FIREWORK_AI,
+    ]:
+        tool.append({"type": "function", "function": item})
+    return tool
+
+
+def convert_to_tool(
+    functions, mapping, model_style, test_category
+):
+    # Each distinct doc is converted once per style; the tools returned are shared and must not be modified
+    transformation = ("tool", tuple(mapping.items()), model_style, test_category)
+    oai_tool = []
+    for item in functions:
+        oai_tool.extend(
+            derive_func_doc(
+                item,
+                transformation,
+                lambda doc: _convert_func_doc_to_tool(doc, mapping, model_style, test_category),
             )
-        elif model_style in [
-            ModelStyle.OpenAI,
-            ModelStyle.Mistral,
-            ModelStyle.FIREWORK_AI,
-        ]:
-            oai_tool.append({"type": "function", "function": item})
+        )
     return oai_tool
 
 
@@ -226,23 +241,37 @@ def convert_value(value, type_str):
         return value
 
 
+@cache_decoded_calls
+def parse_python_function_call(input_str):
+    cleaned_input = input_str.strip("[]'")
+    # Most outputs are a flat list of calls with literal arguments, which are tokenized directly; anything else goes through `ast`
+    extracted = parse_flat_calls(cleaned_input)
+    if extracted is not None:
+        return extracted
+    parsed = ast.parse(cleaned_input, mode="eval")
+    extracted = []
+    if isinstance(parsed.body, ast.Call):
+        extracted.append(resolve_ast_call(parsed.body))
+    else:
+        for elem in parsed.body.elts:
+            assert isinstance(elem, ast.Call)
+            extracted.append(resolve_ast_call(elem))
+    return extracted
+
+
 def ast_parse(input_str, language="Python"):
     if language == "Python":
-        cleaned_input = input_str.strip("[]'")
-        parsed = ast.parse(cleaned_input, mode="eval")
-        extracted = []
-        if isinstance(parsed.body, ast.Call):
-            extracted.append(resolve_ast_call(parsed.body))
-        else:
-            for elem in parsed.body.elts:
-                assert isinstance(elem, ast.Call)
-                extracted.append(resolve_ast_call(elem))
-        return extracted
+        return parse_python_function_call(input_str)
     elif language == "Java":
+        # Imported here, so that tree-sitter is only loaded once a Java or JavaScript output is decoded
+        from model_handler.java_parser import parse_java_function_call
+
         return parse_java_function_call(
             input_str[1:-1]
         )  # Remove the [ and ] from the string
     elif language == "JavaScript":
+        from model_handler.js_parser import parse_javascript_function_call
+
         return parse_javascript_function_call(input_str[1:-1])
     else:
         raise NotImplementedError(f"Unsupported language: {language}")
@@ -287,7 +316,7 @@ def resolve_ast_by_type(value):
     elif isinstance(
         value, ast.BinOp
     ):  # Added this condition to handle function calls as arguments
-        output = eval(ast.unparse(value))
+        output = fold_constant(value)
     elif isinstance(value, ast.Name):
         output = value.id
     elif isinstance(value, ast.Call):
@@ -298,7 +327,7 @@ def resolve_ast_by_type(value):
     elif isinstance(value, ast.Tuple):
         output = tuple(resolve_ast_by_type(v) for v in value.elts)
     elif isinstance(value, ast.Lambda):
-        output = eval(ast.unparse(value.body[0].value))
+        output = fold_constant(value.body[0].value)
     elif isinstance(value, ast.Ellipsis):
         output = "..."
     elif isinstance(value, ast.Subscript):
@@ -377,57 +406,68 @@ def _get_language_specific_hint(test_category):
         return "Note that the provided function is in Python 3 syntax."
 
 
-def func_doc_language_specific_pre_processing(function, test_category):
-    if len(function) == 0:
-       return function
-
-    assert type(function) == list
-    for item in function:
-        properties = item["parameters"]["properties"]
-        if test_category == "java":
-            for key, value in properties.items():
-                if value["type"] == "any":
-                    properties[key]["description"] += (
-                        " This parameter can be of any type of Java object in string representation."
-                    )
-                else:
-                    value["description"] += (
-                        f" This is Java {value['type']} type parameter in string representation."
-                    )
-                if value["type"] == "ArrayList" or value["type"] == "Array":
-                    value["description"] += (
-                        f" The list elements are of type {value['items']['type']}; they are not in string representation."
-                    )
-                    del value["items"]
+def _pre_process_func_doc(item, test_category):
+    properties = item["parameters"]["properties"]
+    if test_category == "java":
+        for key, value in properties.items():
+            if value["type"] == "any":
+                properties[key]["description"] += (
+                    " This parameter can be of any type of Java object in string representation."
+                )
+            else:
+                value["description"] += (
+                    f" This is Java {value['type']} type parameter in string representation."
+                )
+            if value["type"] == "ArrayList" or value["type"] == "Array":
+                value["description"] += (
+                    f" The list elements are of type {value['items']['type']}; they are not in string representation."
+                )
+                del value["items"]
                     
-                value["type"] = "string"
+            value["type"] = "string"
                 
-        elif test_category == "javascript":
-            for key, value in properties.items():
-                if value["type"] == "any":
-                    properties[key]["description"] += (
-                        " This parameter can be of any type of JavaScript object in string representation."
-                    )
-                else:
-                    value["description"] += (
-                        f" This is JavaScript {value['type']} type parameter in string representation."
-                    )
-                if value["type"] == "array":
+    elif test_category == "javascript":
+        for key, value in properties.items():
+            if value["type"] == "any":
+                properties[key]["description"] += (
+                    " This parameter can be of any type of JavaScript object in string representation."
+                )
+            else:
+                value["description"] += (
+                    f" This is JavaScript {value['type']} type parameter in string representation."
+                )
+            if value["type"] == "array":
+                value["description"] += (
+                    f" The list elements are of type {value['items']['type']}; they are not in string representation."
+                )
+                del value["items"]
+                
+            if value["type"] == "dict":
+                if "properties" in value:    # not every dict has properties
                     value["description"] += (
-                        f" The list elements are of type {value['items']['type']}; they are not in string representation."
+                        f" The dictionary entries have the following schema; they are not in string representation. {json.dumps(value['properties'])}"
                     )
-                    del value["items"]
-                
-                if value["type"] == "dict":
-                    if "properties" in value:    # not every dict has properties
-                        value["description"] += (
-                            f" The dictionary entries have the following schema; they are not in string representation. {json.dumps(value['properties'])}"
-                        )
-                        del value["properties"]
-
-                value["type"] = "string"
+                    del value["properties"]
+
+            value["type"] = "string"
                 
-    return function
+    return item
+
+
+def func_doc_language_specific_pre_processing(function, test_category):
+    if len(function) == 0:
+       return function
+
+    assert type(function) == list
+    # Each distinct doc is pre-processed once per category; the docs returned are shared and must not be modified
+    return [
+        derive_func_doc(
+            item,
+            ("pre_processing", test_category),
+            lambda doc: _pre_process_func_doc(doc, test_category),
+        )
+        for item in function
+    ]
 
 
 def construct_tool_use_system_prompt(tools):
@@ -0,0 +1,279 @@
+import contextlib
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+# A worker that has not renewed its lease for this long is considered gone, and its test cases go back to the queue
+DEFAULT_LEASE_SECONDS = 300
+# Number of test cases a worker claims at a time
+DEFAULT_LEASE_BATCH_SIZE = 32
+# How often a worker that found nothing to claim checks the queue again, while leased tasks are unfinished
+POLL_INTERVAL = 10
+# Seconds to wait for another worker's transaction to finish before giving up
+BUSY_TIMEOUT = 120
+
+
+class SQLiteWorkQueue:
+    """
+    Work queue of a cooperative run, stored in one SQLite file that every worker opens. For workers on several machines,
+    the file must be on a shared filesystem with working POSIX locks, and the machines' clocks must be in sync.
+
+    A task is one test case of one model. Workers claim batches of pending tasks under a lease, which a background thread
+    renews every third of `lease_seconds`. The tasks of a lease that expires go back to the queue. A result is only
+    accepted from the worker that holds the task's lease, so each task ends up with exactly one result, even if a worker
+    that was presumed gone comes back.
+
+    Other backends (e.g. a server) can be plugged in through `WORK_QUEUE_BACKENDS` by implementing the same methods:
+    `add_tasks`, `claim`, `complete`, `release`, `has_unfinished`, `get_results` and `close`.
+    """
+
+    def __init__(self, path, lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        # One connection is shared with the heartbeat thread; the lock serializes access to it
+        self.lock = threading.Lock()
+        self.heartbeat = None
+        self.stop_event = threading.Event()
+        # (model name, test ID) of the tasks leased to this worker that it has not completed yet
+        self.held = set()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Transactions are managed explicitly, so that a claim holds the write lock from its read to its update
+        self.conn = sqlite3.connect(
+            path, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False
+        )
+        # WAL needs shared memory between the processes, which a network filesystem does not provide
+        self.conn.execute("PRAGMA journal_mode=DELETE")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tasks (
+                model_name TEXT NOT NULL,
+                test_category TEXT NOT NULL,
+                test_id TEXT NOT NULL,
+                state TEXT NOT NULL,
+                worker_id TEXT,
+                lease_expires REAL,
+                result TEXT,
+                PRIMARY KEY (model_name, test_id)
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS tasks_state ON tasks (model_name, state, test_category)"
+        )
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        # Takes the write lock up front, so the rows read in the transaction cannot be claimed by another worker meanwhile
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+
+    def _in_categories(self, test_categories):
+        return f"test_category IN ({', '.join('?' * len(test_categories))})"
+
+    def add_tasks(self, model_name, test_ids):
+        # Tasks already in the queue, whatever their state, are left alone, so every worker can add the same test cases
+        with self._transaction():
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO tasks (model_name, test_category, test_id, state) VALUES (?, ?, ?, 'pending')",
+                [
+                    (model_name, test_id.rsplit("_", 1)[0], test_id)
+                    for test_id in test_ids
+                ],
+            )
+
+    def claim(self, model_name, test_categories, batch_size):
+        """
+        Leases up to `batch_size` tasks of the model in the given categories to this worker, in the order they were
+        added. Tasks whose lease has expired are claimed like pending ones. Returns their test case IDs.
+        """
+        now = time.time()
+        with self._transaction():
+            test_ids = [
+                row[0]
+                for row in self.conn.execute(
+                    f"""
+                    SELECT test_id FROM tasks
+                    WHERE model_name = ? AND {self._in_categories(test_categories)}
+                    AND (state = 'pending' OR (state = 'leased' AND lease_expires < ?))
+                    ORDER BY rowid LIMIT ?
+                    """,
+                    (model_name, *test_categories, now, batch_size),
+                )
+            ]
+            self.conn.executemany(
+                "UPDATE tasks SET state = 'leased', worker_id = ?, lease_expires = ? WHERE model_name = ? AND test_id = ?",
+                [
+                    (self.worker_id, now + self.lease_seconds, model_name, test_id)
+                    for test_id in test_ids
+                ],
+            )
+            self.held.update((model_name, test_id) for test_id in test_ids)
+        if test_ids and self.heartbeat is None:
+            self._start_heartbeat()
+        return test_ids
+
+    def _start_heartbeat(self):
+        def renew_periodically():
+            while not self.stop_event.wait(self.lease_seconds / 3):
+                self.renew()
+
+        self.stop_event.clear()
+        self.heartbeat = threading.Thread(target=renew_periodically, daemon=True)
+        self.heartbeat.start()
+
+    def renew(self):
+        # A lease that expired and was claimed by another worker has that worker's ID, so it is not taken back here
+        with self.lock:
+            self.conn.execute(
+                "UPDATE tasks SET lease_expires = ? WHERE worker_id = ? AND state = 'leased'",
+                (time.time() + self.lease_seconds, self.worker_id),
+            )
+
+    def complete(self, model_name, entry):
+        """
+        Stores the result entry of a leased task. Returns False, and drops the entry, if this worker no longer holds the
+        lease, in which case another worker produces the result.
+        """
+        with self.lock:
+            cursor = self.conn.execute(
+                """
+                UPDATE tasks SET state = 'done', result = ?, lease_expires = NULL
+                WHERE model_name = ? AND test_id = ? AND state = 'leased' AND worker_id = ?
+                """,
+                (json.dumps(entry), model_name, entry["id"], self.worker_id),
+            )
+            self.held.discard((model_name, entry["id"]))
+        return cursor.rowcount == 1
+
+    def release(self, model_name):
+        # Tasks this worker leased but did not complete, e.g. because it was interrupted, go back to the queue right away
+        with self.lock:
+            self.conn.execute(
+                "UPDATE tasks SET state = 'pending', worker_id = NULL, lease_expires = NULL WHERE model_name = ? AND state = 'leased' AND worker_id = ?",
+                (model_name, self.worker_id),
+            )
+            self.held = {task for task in self.held if task[0] != model_name}
+
+    def holds_tasks(self, model_name):
+        with self.lock:
+            return any(task[0] == model_name for task in self.held)
+
+    def has_unfinished(self, model_name, test_categories):
+        with self.lock:
+            row = self.conn.execute(
+                f"SELECT 1 FROM tasks WHERE model_name = ? AND {self._in_categories(test_categories)} AND state != 'done' LIMIT 1",
+                (model_name, *test_categories),
+            ).fetchone()
+        return row is not None
+
+    def get_results(self, model_name, test_categories):
+        # Result entries of the model's completed tasks, by test category
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT test_category, result FROM tasks WHERE model_name = ? AND {self._in_categories(test_categories)} AND state = 'done'",
+                (model_name, *test_categories),
+            ).fetchall()
+        results = {}
+        for test_category, result in rows:
+            results.setdefault(test_category, []).append(json.loads(result))
+        return results
+
+    def iter_batches(self, model_name, test_categories, batch_size):
+        """
+        Yields batches of test case IDs leased to this worker until every task of the model in the given categories is
+        done. The caller takes a batch whenever it has room for more work, and the leases are held until their results
+        are completed, so they can overlap. An empty batch means there is nothing to claim while this worker still holds
+        unfinished tasks: the caller should ask again once one of them is done. Once it holds none, this waits for the
+        leases of other workers to finish or expire. Tasks still leased to this worker when the iteration stops go back to
+        the queue.
+        """
+        poll_interval = min(POLL_INTERVAL, self.lease_seconds)
+        next_poll = 0
+        try:
+            while True:
+                # While this worker has tasks of its own to finish, the queue is only polled every `poll_interval`
+                holds_tasks = self.holds_tasks(model_name)
+                if holds_tasks and time.time() < next_poll:
+                    yield []
+                    continue
+                test_ids = self.claim(model_name, test_categories, batch_size)
+                if test_ids:
+                    yield test_ids
+                elif not self.has_unfinished(model_name, test_categories):
+                    return
+                elif holds_tasks:
+                    next_poll = time.time() + poll_interval
+                    yield []
+                else:
+                    time.sleep(poll_interval)
+        finally:
+            self.release(model_name)
+
+    def close(self):
+        # Stop the heartbeat first, so it does not race with closing the connection
+        if self.heartbeat is not None:
+            self.stop_event.set()
+            self.heartbeat.join()
+            self.heartbeat = None
+        with self.lock:
+            self.conn.close()
+
+
+class QueueResultWriter:
+    """
+    Stands in for the handler's `ResultWriter` in a cooperative run: result entries are stored in the work queue, and
+    only written to the result files once every task of the model is done.
+    """
+
+    def __init__(self, work_queue, model_name):
+        self.work_queue = work_queue
+        self.model_name = model_name
+        # Entries go to the queue right away, so there is nothing to batch
+        self.flush_every = 1
+        self.dropped = 0
+
+    def write(self, result):
+        if type(result) is dict:
+            result = [result]
+        for entry in result:
+            if not self.work_queue.complete(self.model_name, entry):
+                self.dropped += 1
+
+    def flush(self):
+        pass
+
+    def close(self):
+        if self.dropped:
+            print(
+                f"{self.dropped} results of {self.model_name} were dropped because their lease had expired; other workers took over those test cases."
+            )
+            self.dropped = 0
+
+
+WORK_QUEUE_BACKENDS = {"sqlite": SQLiteWorkQueue}
+
+
+def open_work_queue(location, lease_seconds=DEFAULT_LEASE_SECONDS):
+    # `location` is `<backend>://<address>`, or the path of a SQLite file
+    backend, separator, address = location.partition("://")
+    if not separator:
+        backend, address = "sqlite", location
+    if backend not in WORK_QUEUE_BACKENDS:
+        raise ValueError(
+            f"Unknown work queue backend {backend}; choose from {list(WORK_QUEUE_BACKENDS)}."
+        )
+    return WORK_QUEUE_BACKENDS[backend](address, lease_seconds=lease_seconds)
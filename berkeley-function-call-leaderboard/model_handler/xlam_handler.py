@@ -41,10 +41,14 @@ class xLAMHandler(OSSHandler):
         def convert_to_xlam_tool(tools):
             """Convert the Gorilla function call format to xlam format"""
             if isinstance(tools, dict):
+                # The pre-processed docs are shared, so the parameters are copied before they are marked as required
                 xlam_tools = {
                     "name": tools["name"],
                     "description": tools["description"],
-                    "parameters": tools["parameters"].get("properties", {}),
+                    "parameters": {
+                        param: dict(details)
+                        for param, details in tools["parameters"].get("properties", {}).items()
+                    },
                 }
                 required = tools["parameters"].get("required", [])
                 for param in required:
@@ -1,14 +1,29 @@
-import argparse, json, os, time
+import argparse, asyncio, copy, json, os, uuid
 from tqdm import tqdm
+from model_handler.async_scheduler import build_provider_limiter, estimate_request_tokens
+from model_handler.func_doc_store import intern_test_case
 from model_handler.handler_map import handler_map
+from model_handler.jsonl_loader import JsonlIndex, loads
 from model_handler.model_style import ModelStyle
+from model_handler.request_scheduler import RequestTiming, RunStats, schedule_test_cases
+from model_handler.rate_controller import MAX_RETRIES, get_rate_controller
+from model_handler.response_cache import (
+    CACHE_MODES,
+    DEFAULT_CACHE_MAX_SIZE_MB,
+    DEFAULT_CACHE_PATH,
+    get_cache_key,
+    get_response_cache,
+)
+from model_handler.result_index import load_completed_ids, write_index
+from model_handler.work_queue import (
+    DEFAULT_LEASE_BATCH_SIZE,
+    DEFAULT_LEASE_SECONDS,
+    QueueResultWriter,
+    open_work_queue,
+)
 from model_handler.constant import USE_COHERE_OPTIMIZATION
 from eval_checker.eval_checker_constant import TEST_COLLECTION_MAPPING, TEST_FILE_MAPPING
-from concurrent.futures import ThreadPoolExecutor
-
-RETRY_LIMIT = 3
-# 60s for the timer to complete. But often we find that even with 60 there is a conflict. So 65 is a safe no.
-RETRY_DELAY = 65  # Delay in seconds
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 def get_args():
     parser = argparse.ArgumentParser()
@@ -24,7 +39,32 @@ def get_args():
     parser.add_argument("--num-gpus", default=1, type=int)
     parser.add_argument("--timeout", default=60, type=int)
     parser.add_argument("--num-threads", default=1, type=int)
+    # `async` keeps many requests in flight on one event loop instead of one thread per request. Not applicable for OSS models.
+    parser.add_argument("--backend", default="thread", choices=["thread", "async"])
+    # Per-provider limits for the async backend. When not set, the provider defaults in `model_handler/async_scheduler.py` are used.
+    parser.add_argument("--max-in-flight", default=None, type=int)
+    parser.add_argument("--tokens-per-minute", default=None, type=int)
+    # Run all the hosted models given in `--model` at the same time on the async backend, sharing one copy of the test corpus.
+    # Models of the same provider share that provider's limits; each model is additionally capped by `--max-in-flight-per-model`.
+    parser.add_argument("--fan-out", action="store_true", default=False)
+    parser.add_argument("--max-in-flight-per-model", default=None, type=int)
     parser.add_argument("--gpu-memory-utilization", default=0.9, type=float)
+    # Results are appended to the result file as soon as they complete, and flushed (and fsync-ed) every this many entries or every few seconds.
+    # An interrupted run loses at most one batch; re-running the same command resumes from there.
+    parser.add_argument("--write-batch-size", default=16, type=int)
+    # Opt-in on-disk cache of model responses, keyed on the model, the prompt, the function docs and the sampling parameters.
+    # `read` only serves cached responses, `readwrite` also stores new ones, and `refresh` re-queries the model and overwrites the cached response.
+    # Not applicable for OSS models.
+    parser.add_argument("--cache-mode", default="off", choices=CACHE_MODES)
+    parser.add_argument("--cache-path", default=DEFAULT_CACHE_PATH, type=str)
+    parser.add_argument("--cache-max-size-mb", default=DEFAULT_CACHE_MAX_SIZE_MB, type=int)
+    # Cooperative generation: every process started with the same `--work-queue` (a SQLite file, on a shared filesystem for
+    # several machines) takes batches of `--lease-batch-size` test cases from it under a lease, which it keeps renewing while
+    # it works. The test cases of a process that stops renewing for `--lease-seconds` go back to the queue.
+    # Results are kept in the queue and written to the result files once all test cases of a model are done. `--fan-out` is ignored.
+    parser.add_argument("--work-queue", default=None, type=str)
+    parser.add_argument("--lease-batch-size", default=DEFAULT_LEASE_BATCH_SIZE, type=int)
+    parser.add_argument("--lease-seconds", default=DEFAULT_LEASE_SECONDS, type=int)
     args = parser.parse_args()
     return args
 
@@ -56,6 +96,49 @@ def sort_key(entry):
     return (test_category, int(index))
 
 
+def sort_result_files(model_name, test_categories, new_entries=None):
+    """
+    Results are written in completion order, so this rewrites each result file in `sort_key` order once generation is done.
+    Duplicate entries and lines left truncated by an interrupted run are dropped.
+
+    `new_entries` maps test categories to result entries that are not in the files yet, such as those of a work queue.
+    They are merged in, and an entry already in a file is kept over a new one with the same ID.
+    """
+    if new_entries is None:
+        new_entries = {}
+    model_name_dir = model_name.replace("/", "_")
+    for test_category in test_categories:
+        file_path = f"./result/{model_name_dir}/BFCL_v2_{test_category}_result.json"
+        if not os.path.exists(file_path) and not new_entries.get(test_category):
+            continue
+
+        entries = {}
+        if os.path.exists(file_path):
+            with open(file_path) as f:
+                for line in f:
+                    try:
+                        entry = loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    entries.setdefault(entry["id"], entry)
+        for entry in new_entries.get(test_category, []):
+            entries.setdefault(entry["id"], entry)
+
+        # Write to a temporary file first so that a crash during the rewrite never leaves a half-written result file.
+        # Workers of a cooperative run may share the result directory, so each uses its own temporary file.
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        temp_file_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+        sorted_entries = sorted(entries.values(), key=sort_key)
+        with open(temp_file_path, "w") as f:
+            for entry in sorted_entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file_path, file_path)
+        # We already know every ID in the file, so the resume index can be refreshed without re-reading it
+        write_index(file_path, [entry["id"] for entry in sorted_entries])
+
+
 def parse_test_category_argument(test_category_args):
     test_name_total = set()
     test_filename_total = set()
@@ -72,44 +155,47 @@ def parse_test_category_argument(test_category_args):
     return list(test_name_total), list(test_filename_total)
 
 
-def collect_test_cases(test_filename_total, model_name):
+def load_test_corpus(test_filename_total):
+    # Only the IDs are read up front. A test case is parsed when a model first needs it, so a resumed run skips the finished ones.
+    test_corpus = {}
+    for file_to_open in test_filename_total:
+        test_corpus[file_to_open] = JsonlIndex("./data/" + file_to_open)
+    return test_corpus
+
+
+def collect_test_cases(test_filename_total, model_name, test_corpus=None):
+    # `test_corpus` lets several models share one parsed copy of the data files. Its entries must not be mutated.
+    if test_corpus is None:
+        test_corpus = load_test_corpus(test_filename_total)
+
     model_name_dir = model_name.replace("/", "_")
     test_cases_total = []
     for file_to_open in test_filename_total:
-        test_cases = []
-        with open("./data/" + file_to_open) as f:
-            for line in f:
-                test_cases.append(json.loads(line))
+        test_index = test_corpus[file_to_open]
 
-        existing_result = []
-        if os.path.exists(
+        existing_ids = load_completed_ids(
             "./result/"
             + model_name_dir
             + "/"
             + file_to_open.replace(".json", "_result.json")
-        ):
-            with open(
-                "./result/"
-                + model_name_dir
-                + "/"
-                + file_to_open.replace(".json", "_result.json")
-            ) as f:
-                for line in f:
-                    existing_result.append(json.loads(line))
-
-        existing_ids = [entry["id"] for entry in existing_result]
+        )
         test_cases_total.extend(
             [
-                test_case
-                for test_case in test_cases
-                if test_case["id"] not in existing_ids
+                intern_test_case(test_index.entry_at(position))
+                for position, test_case_id in enumerate(test_index.ids)
+                if test_case_id not in existing_ids
             ]
         )
 
     return sorted(test_cases_total, key=sort_key)
 
 
-def multi_threaded_inference(handler, test_case):
+def copy_prompt(test_case):
+    # Handlers modify the prompt in place, but not the function docs, which stay shared between test cases and models
+    return {**test_case, "question": copy.deepcopy(test_case["question"])}
+
+
+def unpack_test_case(test_case):
     user_question, functions, test_category = (
         test_case["question"],
         test_case["function"],
@@ -117,87 +203,460 @@ def multi_threaded_inference(handler, test_case):
     )
     if type(functions) is dict or type(functions) is str:
         functions = [functions]
+    return user_question, functions, test_category
+
+
+def is_rate_limit_error(e):
+    return "rate limit reached" in str(e).lower() or (
+        hasattr(e, "status_code") and (e.status_code in {429, 503, 500})
+    )
+
+
+def build_error_result(test_case, e):
+    # This is usually the case when the model getting stuck on one particular test case.
+    # For example, timeout error or FC model returning invalid JSON response.
+    # Since temperature is already set to 0.001, retrying the same test case will not help.
+    # So we continue the generation process and record the error message as the model response
+    print("-" * 100)
+    print(
+        "❗️❗️ Error occurred during inference. Maximum reties reached for rate limit or other error. Continuing to next test case."
+    )
+    print(f"❗️❗️ Test case ID: {test_case['id']}, Error: {str(e)}")
+    print("-" * 100)
+
+    return {
+        "id": test_case["id"],
+        "result": f"Error during inference: {str(e)}",
+    }
 
+
+def build_result_to_write(test_case, result, metadata):
+    result_to_write = {
+        "id": test_case["id"],
+        "result": result,
+        "input_token_count": metadata["input_tokens"],
+        "output_token_count": metadata["output_tokens"],
+        "latency": metadata["latency"],
+    }
+    # Only reported by OSS models, which are served in batches by vLLM
+    for key in ["time_to_first_token", "amortized_latency"]:
+        if key in metadata:
+            result_to_write[key] = metadata[key]
+    return result_to_write
+
+
+def get_cached_response(handler, test_case, response_cache):
+    # Returns the cache key (None when caching is off) and the cached (result, metadata) pair (None on a miss)
+    if response_cache is None:
+        return None, None
+    user_question, functions, test_category = unpack_test_case(test_case)
+    cache_key = get_cache_key(
+        handler.model_name,
+        user_question,
+        functions,
+        test_category,
+        handler.temperature,
+        handler.top_p,
+        handler.max_tokens,
+    )
+    return cache_key, response_cache.get(cache_key, handler.model_name)
+
+
+def multi_threaded_inference(
+    handler, test_case, rate_controller, response_cache=None, run_stats=None, timing=None
+):
+    # The key is computed from the untouched test case, before the handler gets to pre-process it
+    cache_key, cached_response = get_cached_response(handler, test_case, response_cache)
+    if cached_response is not None:
+        return build_result_to_write(test_case, *cached_response)
+
+    if timing is None:
+        timing = RequestTiming()
     retry_count = 0
+    error_result = None
 
     while True:
+        # Handlers modify the prompt in place, so each attempt works on its own copy.
+        # This keeps a retry from seeing an already pre-processed prompt, and lets several models share the same test case.
+        user_question, functions, test_category = unpack_test_case(
+            copy_prompt(test_case)
+        )
+        rate_controller.acquire()
+        timing.start()
         try:
             result, metadata = handler.inference(
                 user_question, functions, test_category
             )
+            rate_controller.on_success()
+            if response_cache is not None:
+                response_cache.put(cache_key, handler.model_name, result, metadata)
             break  # Success, exit the loop
         except Exception as e:
             # TODO: It might be better to handle the exception in the handler itself rather than a universal catch block here, as each handler use different ways to call the endpoint.
             # OpenAI has openai.RateLimitError while Anthropic has anthropic.RateLimitError. It would be more robust in the long run.
-            if retry_count < RETRY_LIMIT and (
-                "rate limit reached" in str(e).lower()
-                or (hasattr(e, "status_code") and (e.status_code in {429, 503, 500}))
-            ):
+            if retry_count < MAX_RETRIES and is_rate_limit_error(e):
+                delay = rate_controller.on_throttle(e, retry_count)
                 print(
-                    f"Rate limit reached. Sleeping for 65 seconds. Retry {retry_count + 1}/{RETRY_LIMIT}"
+                    f"Rate limit reached. Retrying in {delay:.1f} seconds with concurrency {rate_controller.concurrency}. Retry {retry_count + 1}/{MAX_RETRIES}"
                 )
-                time.sleep(RETRY_DELAY)
                 retry_count += 1
             else:
-                # This is usually the case when the model getting stuck on one particular test case.
-                # For example, timeout error or FC model returning invalid JSON response.
-                # Since temperature is already set to 0.001, retrying the same test case will not help.
-                # So we continue the generation process and record the error message as the model response
-                print("-" * 100)
+                error_result = build_error_result(test_case, e)
+                break
+        finally:
+            rate_controller.release()
+
+    if run_stats is not None:
+        run_stats.record_timing(test_case, timing)
+    if error_result is not None:
+        return error_result
+    return build_result_to_write(test_case, result, metadata)
+
+
+async def async_inference(
+    handler,
+    test_case,
+    limiter,
+    rate_controller,
+    max_tokens,
+    response_cache=None,
+    run_stats=None,
+):
+    cache_key, cached_response = get_cached_response(handler, test_case, response_cache)
+    if cached_response is not None:
+        return build_result_to_write(test_case, *cached_response)
+
+    # Tasks are created as they are dispatched, so the queue time starts here
+    timing = RequestTiming()
+    retry_count = 0
+    error_result = None
+
+    while True:
+        # Handlers modify the prompt in place, so each attempt works on its own copy
+        user_question, functions, test_category = unpack_test_case(
+            copy_prompt(test_case)
+        )
+        # The per-model rate controller is acquired first, so a throttled model does not hold on to the provider's in-flight slots while it waits
+        await rate_controller.acquire_async()
+        try:
+            async with limiter:
+                await limiter.reserve_tokens(
+                    estimate_request_tokens(test_case, max_tokens)
+                )
+                timing.start()
+                result, metadata = await handler.async_inference(
+                    user_question, functions, test_category
+                )
+            rate_controller.on_success()
+            if response_cache is not None:
+                response_cache.put(cache_key, handler.model_name, result, metadata)
+            break  # Success, exit the loop
+        except Exception as e:
+            if retry_count < MAX_RETRIES and is_rate_limit_error(e):
+                delay = rate_controller.on_throttle(e, retry_count)
                 print(
-                    "❗️❗️ Error occurred during inference. Maximum reties reached for rate limit or other error. Continuing to next test case."
+                    f"Rate limit reached. Retrying in {delay:.1f} seconds with concurrency {rate_controller.concurrency}. Retry {retry_count + 1}/{MAX_RETRIES}"
                 )
-                print(f"❗️❗️ Test case ID: {test_case['id']}, Error: {str(e)}")
-                print("-" * 100)
-
-                return {
-                    "id": test_case["id"],
-                    "result": f"Error during inference: {str(e)}",
-                }
+                retry_count += 1
+            else:
+                error_result = build_error_result(test_case, e)
+                break
+        finally:
+            rate_controller.release()
+
+    if run_stats is not None:
+        run_stats.record_timing(test_case, timing)
+    if error_result is not None:
+        return error_result
+    return build_result_to_write(test_case, result, metadata)
+
+
+async def generate_results_async(
+    args,
+    handler,
+    model_name,
+    test_cases_total,
+    limiter=None,
+    progress_position=0,
+    response_cache=None,
+    run_stats=None,
+    batches=None,
+):
+    """
+    With `batches`, an iterator of lists of test cases such as the batches of a work queue, the test cases come from it
+    instead of `test_cases_total`. The next batch is only taken once fewer than the in-flight limit of requests are
+    running; an empty batch means none are available yet, and the next one is asked for once a request finishes.
+    """
+    if limiter is None:
+        limiter = build_provider_limiter(
+            handler.model_style, args.max_in_flight, args.tokens_per_minute
+        )
+    max_in_flight = args.max_in_flight_per_model or limiter.max_in_flight
+    rate_controller = get_rate_controller(model_name, max_in_flight)
+    print(
+        f"Using async backend for {model_name} with up to {max_in_flight} requests in flight."
+    )
 
-    result_to_write = {
-        "id": test_case["id"],
-        "result": result,
-        "input_token_count": metadata["input_tokens"],
-        "output_token_count": metadata["output_tokens"],
-        "latency": metadata["latency"],
-    }
+    # The summary is printed here, unless the caller collects the timings of several calls
+    print_summary = run_stats is None
+    if run_stats is None:
+        run_stats = RunStats()
+    if batches is None:
+        batches = iter([test_cases_total])
+    tasks = set()
+    has_more_batches = True
+    with tqdm(
+        total=len(test_cases_total) if test_cases_total is not None else None,
+        desc=f"Generating results for {model_name}",
+        position=progress_position,
+    ) as pbar:
+        while True:
+            if has_more_batches and len(tasks) < max_in_flight:
+                # Taking a batch may wait on a work queue, which must not hold up the requests in flight
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    has_more_batches = False
+                elif batch:
+                    for test_case in schedule_test_cases(
+                        batch, handler.model_style, args.max_tokens
+                    ):
+                        tasks.add(
+                            asyncio.create_task(
+                                async_inference(
+                                    handler,
+                                    test_case,
+                                    limiter,
+                                    rate_controller,
+                                    args.max_tokens,
+                                    response_cache,
+                                    run_stats,
+                                )
+                            )
+                        )
+                    continue
+            if not tasks:
+                if has_more_batches:
+                    continue
+                break
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                # Results are written as soon as they complete; `sort_result_files` restores the order at the end
+                handler.write(task.result())
+                pbar.update()
+    if print_summary:
+        run_stats.print_summary(model_name)
+
+
+def print_cache_stats(response_cache, model_name):
+    if response_cache is None:
+        return
+    stats = response_cache.get_stats(model_name)
+    print(
+        f"Response cache for {model_name}: {stats['hits']} hits, {stats['misses']} misses, {stats['writes']} writes, {stats['evictions']} evictions."
+    )
 
-    return result_to_write
 
+def run_inference(
+    args, handler, model_name, test_cases_total, response_cache, run_stats, batches=None
+):
+    """
+    Generates the results of `test_cases_total`, or, with `batches`, of the test cases in that iterator of lists (e.g.
+    the batches of a work queue), which is only advanced when there is room for more requests. An empty batch means none
+    are available yet; the next one is asked for once a request finishes.
+    """
+    total = len(test_cases_total) if test_cases_total is not None else None
+    if batches is None:
+        batches = iter([test_cases_total])
 
-def generate_results(args, model_name, test_cases_total):
+    if handler.model_style == ModelStyle.OSSMODEL:
+        # Test cases by their index in the engine's output
+        test_cases = []
 
-    handler = build_handler(model_name, args.temperature, args.top_p, args.max_tokens)
+        def iter_test_questions():
+            for batch in batches:
+                test_cases.extend(batch)
+                # `process_input` modifies the prompts in place, and the test cases are shared with the other models of this run
+                yield [copy_prompt(test_case) for test_case in batch]
 
-    if handler.model_style == ModelStyle.OSSMODEL:
-        result, metadata = handler.inference(
-            test_question=test_cases_total,
+        outputs = handler.inference(
+            test_question=iter_test_questions(),
             num_gpus=args.num_gpus,
             gpu_memory_utilization=args.gpu_memory_utilization,
         )
-        for test_case, res in zip(test_cases_total, result):
-            result_to_write = {"id": test_case["id"], "result": res}
-            handler.write(result_to_write)
+        with tqdm(total=total, desc=f"Generating results for {model_name}") as pbar:
+            for index, result, metadata in outputs:
+                # Results are written as soon as vLLM finishes them; `sort_result_files` restores the order at the end
+                handler.write(build_result_to_write(test_cases[index], result, metadata))
+                run_stats.record(
+                    test_cases[index], metadata["queue_time"], metadata["latency"]
+                )
+                pbar.update()
+
+    elif args.backend == "async":
+        asyncio.run(
+            generate_results_async(
+                args,
+                handler,
+                model_name,
+                test_cases_total,
+                response_cache=response_cache,
+                run_stats=run_stats,
+                batches=batches,
+            )
+        )
 
     else:
-        futures = []
+        rate_controller = get_rate_controller(model_name, args.num_threads)
+        futures = set()
+        has_more_batches = True
         with ThreadPoolExecutor(max_workers=args.num_threads) as executor:
-            with tqdm(
-                total=len(test_cases_total), desc=f"Generating results for {model_name}"
-            ) as pbar:
+            with tqdm(total=total, desc=f"Generating results for {model_name}") as pbar:
+                while True:
+                    # The next batch is only taken once a thread is free for it
+                    if has_more_batches and len(futures) < args.num_threads:
+                        batch = next(batches, None)
+                        if batch is None:
+                            has_more_batches = False
+                        elif batch:
+                            for test_case in schedule_test_cases(
+                                batch, handler.model_style, args.max_tokens
+                            ):
+                                futures.add(
+                                    executor.submit(
+                                        multi_threaded_inference,
+                                        handler,
+                                        test_case,
+                                        rate_controller,
+                                        response_cache,
+                                        run_stats,
+                                        RequestTiming(),
+                                    )
+                                )
+                            continue
+                    if not futures:
+                        if has_more_batches:
+                            continue
+                        break
+                    done, futures = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        # Results are written as soon as they complete; `sort_result_files` restores the order at the end
+                        handler.write(future.result())
+                        pbar.update()
+
+
+def get_test_case(test_corpus, test_id):
+    for test_index in test_corpus.values():
+        if test_id in test_index:
+            return intern_test_case(test_index.get(test_id))
+    raise KeyError(f"Test case {test_id} is not in the selected test categories.")
+
+
+def generate_results(args, model_name, test_cases_total, test_corpus=None, work_queue=None):
+    """
+    With a `work_queue`, this process is one worker of a cooperative run: the test cases are added to the queue, and the
+    worker runs the batches it claims from it, whoever added them, until the queue has none left for this model. The
+    result files are then written from the queue, so every worker ends up with the complete files.
+    """
+    handler = build_handler(model_name, args.temperature, args.top_p, args.max_tokens)
+    handler.writer.flush_every = args.write_batch_size
+    response_cache = get_response_cache(
+        args.cache_path, args.cache_mode, args.cache_max_size_mb
+    )
+    test_categories = sorted(
+        {test_case["id"].rsplit("_", 1)[0] for test_case in test_cases_total}
+    )
+    if work_queue is not None:
+        # Largest test cases first, so they are claimed first
+        work_queue.add_tasks(
+            model_name,
+            [
+                test_case["id"]
+                for test_case in schedule_test_cases(
+                    test_cases_total, handler.model_style, args.max_tokens
+                )
+            ],
+        )
+        handler.writer = QueueResultWriter(work_queue, model_name)
+
+    # Queue and service time of each request, for the summary at the end
+    run_stats = RunStats()
+    # Closing the writer flushes whatever is still buffered, even if the run is interrupted
+    try:
+        if work_queue is None:
+            run_inference(
+                args, handler, model_name, test_cases_total, response_cache, run_stats
+            )
+        else:
+            # One run of the backend takes batches from the queue as it has room for them, so leases overlap
+            leased_batches = work_queue.iter_batches(
+                model_name, test_categories, args.lease_batch_size
+            )
+            batches = (
+                [get_test_case(test_corpus, test_id) for test_id in test_ids]
+                for test_ids in leased_batches
+            )
+            try:
+                run_inference(
+                    args,
+                    handler,
+                    model_name,
+                    None,
+                    response_cache,
+                    run_stats,
+                    batches,
+                )
+            finally:
+                # Puts the tasks this worker still holds back in the queue, if the run was interrupted
+                leased_batches.close()
+    finally:
+        handler.close()
+
+    run_stats.print_summary(model_name)
+    print_cache_stats(response_cache, model_name)
+    sort_result_files(
+        model_name,
+        test_categories,
+        work_queue.get_results(model_name, test_categories) if work_queue else None,
+    )
+
+
+async def generate_results_fan_out(args, jobs):
+    """
+    Runs the given (handler, model_name, test_cases_total) jobs concurrently on one event loop.
+    Models of the same provider share one `ProviderLimiter`, so the provider's in-flight and tokens-per-minute limits hold across all of them.
+    """
+    provider_limiters = {}
+    response_cache = get_response_cache(
+        args.cache_path, args.cache_mode, args.cache_max_size_mb
+    )
 
-                for test_case in test_cases_total:
-                    future = executor.submit(
-                        multi_threaded_inference, handler, test_case
-                    )
-                    futures.append(future)
+    async def run_job(position, handler, model_name, test_cases_total):
+        if handler.model_style not in provider_limiters:
+            provider_limiters[handler.model_style] = build_provider_limiter(
+                handler.model_style, args.max_in_flight, args.tokens_per_minute
+            )
+        try:
+            await generate_results_async(
+                args,
+                handler,
+                model_name,
+                test_cases_total,
+                limiter=provider_limiters[handler.model_style],
+                progress_position=position,
+                response_cache=response_cache,
+            )
+        finally:
+            handler.close()
 
-                for future in futures:
-                    # This will wait for the task to complete, so that we are always writing in order
-                    result = future.result()
-                    handler.write(result)
-                    pbar.update()
+        print_cache_stats(response_cache, model_name)
+        sort_result_files(
+            model_name,
+            {test_case["id"].rsplit("_", 1)[0] for test_case in test_cases_total},
+        )
+
+    await asyncio.gather(
+        *[run_job(position, *job) for position, job in enumerate(jobs)]
+    )
 
 
 if __name__ == "__main__":
@@ -212,15 +671,50 @@ if __name__ == "__main__":
 
     print(f"Generating results for {args.model} on test category: {test_name_total}.")
 
+    model_names = []
     for model_name in args.model:
         if USE_COHERE_OPTIMIZATION and "command-r-plus" in model_name:
             model_name = model_name + "-optimized"
+        model_names.append(model_name)
+
+    # The data files are parsed once and shared by all models
+    test_corpus = load_test_corpus(test_filename_total)
 
-        test_cases_total = collect_test_cases(test_filename_total, model_name)
+    fan_out_jobs = []
+    sequential_jobs = []
+    for model_name in model_names:
+        test_cases_total = collect_test_cases(test_filename_total, model_name, test_corpus)
 
         if len(test_cases_total) == 0:
             print(
                 f"All selected test cases have been previously generated for {model_name}. No new test cases to generate."
             )
-        else:
-            generate_results(args, model_name, test_cases_total)
+            continue
+
+        if args.fan_out and args.work_queue is None:
+            handler = build_handler(
+                model_name, args.temperature, args.top_p, args.max_tokens
+            )
+            # OSS models need the GPUs to themselves, so they still run one after another
+            if handler.model_style != ModelStyle.OSSMODEL:
+                handler.writer.flush_every = args.write_batch_size
+                fan_out_jobs.append((handler, model_name, test_cases_total))
+                continue
+
+        sequential_jobs.append((model_name, test_cases_total))
+
+    if fan_out_jobs:
+        asyncio.run(generate_results_fan_out(args, fan_out_jobs))
+
+    work_queue = None
+    if args.work_queue is not None:
+        work_queue = open_work_queue(args.work_queue, args.lease_seconds)
+        print(f"Working on {args.work_queue} as {work_queue.worker_id}.")
+    try:
+        for model_name, test_cases_total in sequential_jobs:
+            generate_results(
+                args, model_name, test_cases_total, test_corpus, work_queue
+            )
+    finally:
+        if work_queue is not None:
+            work_queue.close()
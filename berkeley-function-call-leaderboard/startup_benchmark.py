@@ -0,0 +1,94 @@
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# Working directory and module of each entry point, as they are normally run
+ENTRY_POINTS = {
+    "openfunctions_evaluation": (ROOT, "openfunctions_evaluation"),
+    "eval_runner": (os.path.join(ROOT, "eval_checker"), "eval_runner"),
+}
+# Only the handlers of some models need these, so starting an entry point must not import them
+LAZY_MODULES = [
+    "openai",
+    "anthropic",
+    "cohere",
+    "mistralai",
+    "vertexai",
+    "google.generativeai",
+    "torch",
+    "vllm",
+    "ray",
+    "tree_sitter",
+]
+DEFAULT_MAX_SECONDS = 1.0
+
+
+def get_args():
+    parser = argparse.ArgumentParser(
+        description="Measure the import time of the BFCL entry points with `python -X importtime`."
+    )
+    parser.add_argument(
+        "--entry-point", type=str, default=list(ENTRY_POINTS), nargs="+", choices=list(ENTRY_POINTS)
+    )
+    parser.add_argument("--max-seconds", type=float, default=DEFAULT_MAX_SECONDS)
+    parser.add_argument("--top", type=int, default=10)
+    return parser.parse_args()
+
+
+def measure_imports(entry_point):
+    """
+    Imports the entry point in a fresh interpreter. Returns the seconds its import took, the modules it imports directly
+    as (module, seconds) pairs, where a module's time includes the imports under it, and the names of all imported modules.
+    """
+    cwd, module = ENTRY_POINTS[entry_point]
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, '.'); import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {entry_point} failed:\n{result.stderr[-2000:]}")
+
+    # Each line reads `import time: <self us> | <cumulative us> | <module>`. Nested imports are indented two more spaces
+    # than the module importing them, and listed before it.
+    imported = set()
+    children = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.endswith("imported package"):
+            continue
+        _, cumulative_us, name = line.split("|")
+        indent = len(name) - len(name.lstrip(" "))
+        name = name.strip()
+        imported.add(name)
+        children.setdefault(indent, []).append((name, int(cumulative_us) / 1e6))
+        if name == module:
+            return children[indent][-1][1], children.get(indent + 2, []), imported
+        # Modules listed so far deeper than this one were imported by it
+        for deeper_indent in [key for key in children if key > indent]:
+            del children[deeper_indent]
+    raise RuntimeError(f"{module} is missing from the import times of {entry_point}.")
+
+
+def main(args):
+    failed = False
+    for entry_point in args.entry_point:
+        total_seconds, direct_imports, imported = measure_imports(entry_point)
+        print(f"{entry_point}: {total_seconds:.3f}s to import")
+        for name, seconds in sorted(direct_imports, key=lambda item: item[1], reverse=True)[: args.top]:
+            print(f"    {seconds:8.3f}s  {name}")
+
+        eager_modules = [module for module in LAZY_MODULES if module in imported]
+        if eager_modules:
+            print(f"❗️ {entry_point} imports {', '.join(eager_modules)} on startup.")
+            failed = True
+        if total_seconds > args.max_seconds:
+            print(f"❗️ {entry_point} takes longer than {args.max_seconds}s to import.")
+            failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(get_args()))